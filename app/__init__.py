@@ -4,9 +4,10 @@ import logging
 import os
 from logging.handlers import RotatingFileHandler
 from flask import Flask, request
-from .extensions import db, migrate, csrf, login_manager, limiter
+from .extensions import db, migrate, csrf, login_manager, limiter, configure_engine_options, init_sqlite_profile
 from .routes import main_bp, register_error_pages
 from .middleware.request_ids import register_request_id
+from .middleware.metrics import register_metrics
 from .logging_config import init_logging
 from .errors.handlers import errors_bp
 from . import model  # noqa: F401  # ensure Alembic sees models
@@ -27,6 +28,10 @@ from .demo.routes import demo_bp
 from .ai.health import ai_health_bp
 from .cli.pitch import register_cli 
 from .cli.pitch_full import register_cli_full
+from .cli.ai_worker import register_ai_worker_cli
+from .cli.questions_drain import register_questions_drain_cli
+from .cli.journal_tags import register_journal_tags_cli
+from .cli.emotion_rollups import register_emotion_rollups_cli
 from .main.routes import about_bp
 from .debug_tools import assert_unique_endpoints
 from flask_wtf import CSRFProtect
@@ -42,7 +47,9 @@ def create_app(config_object: str | object = "config.DevelopmentConfig") -> Flas
     app.config["WTF_CSRF_SECRET_KEY"] = os.getenv("WTF_CSRF_SECRET_KEY", app.config["SECRET_KEY"])
 
     # Init extensions
+    configure_engine_options(app)
     db.init_app(app)
+    init_sqlite_profile(app)
     migrate.init_app(app, db)
     csrf.init_app(app)
     login_manager.init_app(app)
@@ -68,6 +75,7 @@ def create_app(config_object: str | object = "config.DevelopmentConfig") -> Flas
 
     register_error_pages(app)
     register_request_id(app)
+    register_metrics(app)
     app.register_blueprint(errors_bp)
     init_logging(app)
 
@@ -99,6 +107,10 @@ def create_app(config_object: str | object = "config.DevelopmentConfig") -> Flas
 
     register_cli(app)
     register_cli_full(app)
+    register_ai_worker_cli(app)
+    register_questions_drain_cli(app)
+    register_journal_tags_cli(app)
+    register_emotion_rollups_cli(app)
 
     # Dev safeguard for duplicate endpoints
     if app.debug or app.config.get("FLASK_ENV") == "development":
@@ -2,6 +2,10 @@
 
 Expose a singleton-ish client getter so routes/services can import:
     from app.ai.gemini_client import get_ai_client
+
+Async views/workers use ``get_async_ai_client`` (one AsyncGeminiClient per event loop).
+Importing the package registers the post-fork reset of process-wide AI state (app.ai.lifecycle).
 """
 from __future__ import annotations
-from .gemini_client import get_ai_client  # re-export
+from .gemini_client import get_ai_client, get_async_ai_client  # re-export
+from . import lifecycle  # noqa: F401  # registers the post-fork reset
@@ -0,0 +1,267 @@
+"""Circuit breaker for provider calls, keyed by ``model:text:task``.
+
+States: closed -> open (after AI_BREAKER_FAILURE_THRESHOLD qualifying failures) -> half_open
+(after the cooldown; exactly one probe allowed) -> closed on success / open with a doubled
+cooldown on a qualifying failure.
+
+Two interchangeable backends share the same transition functions:
+
+- ``memory`` (default): per-process dict guarded by a lock.
+- ``sqlite``: one row per key in a host-local SQLite file, every transition inside a
+  ``BEGIN IMMEDIATE`` transaction, so all gunicorn workers see one breaker and the half-open
+  probe is single host-wide instead of once per worker.
+
+A half-open probe that never reports back (worker crash, non-qualifying error) is re-granted
+after AI_BREAKER_HALF_OPEN_INTERVAL_S so the breaker cannot stay half-open forever.
+"""
+from __future__ import annotations
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, astuple
+from typing import Any, Dict, Optional
+
+from flask import current_app
+
+from app.logging_config import get_logger, log_extra_safe
+from .local_store import LocalSQLite, resolve_store_path
+
+logger = get_logger("sahai.ai")
+
+QUALIFYING_FAILURES = {"timeout", "rate_limit", "server_error", "network"}
+
+
+@dataclass
+class _BreakerState:
+    failures: int = 0
+    state: str = "closed"  # closed|open|half_open
+    next_try_at: float = 0.0
+    last_log_at: float = 0.0
+    cooldown_s: int = 0
+    half_open_token: bool = True  # only one probe allowed
+
+
+# --- Transitions (pure: mutate state, return decision) ------------------------
+def _allow(st: _BreakerState, key: str, now: float, *, log_rate_limit_s: int, half_open_interval_s: int) -> bool:
+    if st.state == "closed":
+        return True
+    if st.state == "open":
+        if now >= st.next_try_at:
+            # transition to half-open; this caller is the probe
+            st.state = "half_open"
+            st.half_open_token = False
+            st.next_try_at = now + half_open_interval_s
+            return True
+        # deny; rate-limited log
+        if now - st.last_log_at > log_rate_limit_s:
+            log_extra_safe(logger, "warning", "ai_breaker_open", extra={"key": key, "cooldown_s": int(st.next_try_at - now)})
+            st.last_log_at = now
+        return False
+    if st.state == "half_open":
+        if st.half_open_token or now >= st.next_try_at:
+            # token free, or the previous probe went silent: grant one more probe
+            st.half_open_token = False
+            st.next_try_at = now + half_open_interval_s
+            return True
+        return False
+    return True
+
+
+def _success(st: _BreakerState) -> None:
+    st.failures = 0
+    st.state = "closed"
+    st.next_try_at = 0.0
+    st.cooldown_s = 0
+    st.half_open_token = True
+
+
+def _failure(st: _BreakerState, key: str, now: float, *, reason: str, cfg: Any) -> None:
+    if reason not in QUALIFYING_FAILURES:
+        # Non-qualifying failures do not increment breaker counters; still leave state as-is.
+        return
+    st.failures += 1
+    thresh = cfg.get("AI_BREAKER_FAILURE_THRESHOLD", 3)
+    base_cd = cfg.get("AI_BREAKER_BASE_COOLDOWN_S", 30)
+    max_cd = cfg.get("AI_BREAKER_MAX_COOLDOWN_S", 120)
+    log_rl = cfg.get("AI_LOG_RATE_LIMIT_S", 60)
+    if st.state == "half_open":
+        # failed qualifying probe -> exponential backoff increase
+        st.cooldown_s = min(max_cd, max(base_cd, (st.cooldown_s or base_cd) * 2))
+        st.state = "open"
+        st.next_try_at = now + st.cooldown_s + random.randint(0, 5)
+        st.half_open_token = True
+        if now - st.last_log_at > log_rl:
+            log_extra_safe(logger, "warning", "ai_breaker_reopen", extra={"key": key, "reason": reason, "cooldown_s": st.cooldown_s})
+            st.last_log_at = now
+        return
+    if st.failures >= thresh and st.state != "open":
+        # initial open
+        st.cooldown_s = min(max_cd, base_cd + random.randint(0, (max_cd - base_cd)))
+        st.state = "open"
+        st.next_try_at = now + st.cooldown_s
+        if now - st.last_log_at > log_rl:
+            log_extra_safe(logger, "warning", "ai_breaker_open", extra={"key": key, "reason": reason, "cooldown_s": st.cooldown_s})
+            st.last_log_at = now
+
+
+def _cooldown_left(st: _BreakerState, now: float) -> int:
+    if st.state != "open":
+        return 0
+    return max(0, int(st.next_try_at - now))
+
+
+# --- Backends -----------------------------------------------------------------
+class _CircuitBreakerRegistry:
+    """In-process backend (thread-safe)."""
+
+    def __init__(self):
+        self._states: Dict[str, _BreakerState] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> _BreakerState:
+        st = self._states.get(key)
+        if not st:
+            st = _BreakerState()
+            self._states[key] = st
+        return st
+
+    def allow(self, key: str, *, log_rate_limit_s: int, half_open_interval_s: int = 10) -> bool:
+        with self._lock:
+            return _allow(self._get(key), key, time.time(),
+                          log_rate_limit_s=log_rate_limit_s, half_open_interval_s=half_open_interval_s)
+
+    def record_success(self, key: str):
+        with self._lock:
+            _success(self._get(key))
+
+    def record_failure(self, key: str, *, reason: str, cfg: Any):
+        with self._lock:
+            _failure(self._get(key), key, time.time(), reason=reason, cfg=cfg)
+
+    def cooldown_left(self, key: str) -> int:
+        with self._lock:
+            return _cooldown_left(self._get(key), time.time())
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._states[key] = _BreakerState()
+
+    def snapshot(self) -> Dict[str, str]:
+        with self._lock:
+            return {k: st.state for k, st in self._states.items()}
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ai_breaker (
+    key TEXT PRIMARY KEY,
+    failures INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    next_try_at REAL NOT NULL,
+    last_log_at REAL NOT NULL,
+    cooldown_s INTEGER NOT NULL,
+    half_open_token INTEGER NOT NULL
+);
+"""
+
+
+class SQLiteCircuitBreakerRegistry:
+    """Host-wide backend: breaker rows in SQLite, each transition one IMMEDIATE transaction.
+
+    If the store itself misbehaves we fail open to the in-process backend rather than
+    blocking AI calls on a local file problem.
+    """
+
+    def __init__(self, path: str):
+        self._db = LocalSQLite(path, schema=_SCHEMA)
+        self._fallback = _CircuitBreakerRegistry()
+
+    def _txn(self, key: str, fn):
+        conn = self._db.conn()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT failures, state, next_try_at, last_log_at, cooldown_s, half_open_token "
+                "FROM ai_breaker WHERE key = ?", (key,),
+            ).fetchone()
+            st = _BreakerState(*row) if row else _BreakerState()
+            st.half_open_token = bool(st.half_open_token)
+            before = astuple(st)
+            out = fn(st)
+            if astuple(st) != before or row is None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ai_breaker "
+                    "(key, failures, state, next_try_at, last_log_at, cooldown_s, half_open_token) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, st.failures, st.state, st.next_try_at, st.last_log_at, st.cooldown_s, int(st.half_open_token)),
+                )
+            conn.execute("COMMIT")
+            return out
+        except sqlite3.Error:
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            log_extra_safe(logger, "warning", "ai_breaker_store_error", extra={"key": key})
+            raise
+
+    def allow(self, key: str, *, log_rate_limit_s: int, half_open_interval_s: int = 10) -> bool:
+        try:
+            return self._txn(key, lambda st: _allow(st, key, time.time(), log_rate_limit_s=log_rate_limit_s,
+                                                     half_open_interval_s=half_open_interval_s))
+        except sqlite3.Error:
+            return self._fallback.allow(key, log_rate_limit_s=log_rate_limit_s, half_open_interval_s=half_open_interval_s)
+
+    def record_success(self, key: str):
+        try:
+            self._txn(key, _success)
+        except sqlite3.Error:
+            self._fallback.record_success(key)
+
+    def record_failure(self, key: str, *, reason: str, cfg: Any):
+        if reason not in QUALIFYING_FAILURES:
+            return
+        try:
+            self._txn(key, lambda st: _failure(st, key, time.time(), reason=reason, cfg=cfg))
+        except sqlite3.Error:
+            self._fallback.record_failure(key, reason=reason, cfg=cfg)
+
+    def cooldown_left(self, key: str) -> int:
+        try:
+            row = self._db.conn().execute(
+                "SELECT state, next_try_at FROM ai_breaker WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            return self._fallback.cooldown_left(key)
+        if not row:
+            return 0
+        return _cooldown_left(_BreakerState(state=row[0], next_try_at=row[1]), time.time())
+
+    def reset(self, key: str) -> None:
+        try:
+            self._db.conn().execute("DELETE FROM ai_breaker WHERE key = ?", (key,))
+        except sqlite3.Error:
+            pass
+        self._fallback.reset(key)
+
+    def snapshot(self) -> Dict[str, str]:
+        try:
+            return {k: s for k, s in self._db.conn().execute("SELECT key, state FROM ai_breaker")}
+        except sqlite3.Error:
+            return self._fallback.snapshot()
+
+
+_registry: Optional[Any] = None
+_registry_lock = threading.Lock()
+
+
+def get_breaker_registry():
+    """Process-wide breaker backend chosen by AI_BREAKER_BACKEND ('memory' | 'sqlite')."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                backend = (current_app.config.get("AI_BREAKER_BACKEND") or "memory").lower()
+                path = resolve_store_path("AI_BREAKER_DB_PATH", "ai_breaker.sqlite3") if backend == "sqlite" else None
+                _registry = SQLiteCircuitBreakerRegistry(path) if path else _CircuitBreakerRegistry()
+    return _registry
@@ -0,0 +1,240 @@
+"""Two-tier response cache for non-personal AI generations.
+
+Only tasks whose prompts are built from small enumerable inputs (mood label, language,
+theme, duration, mode) are cacheable; the task builders in `gemini_client` decide that by
+setting ``_TaskCall.cache_inputs``. Free text never reaches this module.
+
+Key = sha256(task, model, prompt-template version, normalized inputs).
+
+Tiers:
+- in-process LRU (``AI_CACHE_LRU_SIZE`` entries) for the hot set of each worker,
+- SQLite file (``AI_CACHE_DB_PATH``) shared by every worker on the host.
+
+Entries expire per task (``AI_CACHE_TTLS``); the SQLite tier is trimmed to
+``AI_CACHE_MAX_ROWS`` by least-recent hit.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from flask import current_app
+
+from app.logging_config import get_logger, log_extra_safe
+from .local_store import LocalSQLite, resolve_store_path
+
+log = get_logger("sahai.ai.cache")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ai_response_cache (
+    key TEXT PRIMARY KEY,
+    task TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_hit_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_ai_cache_expires ON ai_response_cache (expires_at);
+CREATE INDEX IF NOT EXISTS ix_ai_cache_last_hit ON ai_response_cache (last_hit_at);
+"""
+
+# Purge expired / over-limit rows once every N writes (cheap amortized eviction).
+_PURGE_EVERY = 50
+
+
+def make_cache_key(task: str, model: str, template_version: str, inputs: Dict[str, Any]) -> str:
+    payload = json.dumps(
+        {"task": task, "model": model, "tmpl": template_version, "inputs": inputs},
+        sort_keys=True, ensure_ascii=False, separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _LRU:
+    def __init__(self, max_size: int):
+        self.max_size = max(0, int(max_size))
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, now: float) -> Tuple[bool, Any]:
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                return False, None
+            expires_at, value = hit
+            if expires_at <= now:
+                del self._data[key]
+                return False, None
+            self._data.move_to_end(key)
+            return True, value
+
+    def set(self, key: str, value: Any, expires_at: float) -> None:
+        if not self.max_size:
+            return
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class _SQLiteTier:
+    def __init__(self, path: str, max_rows: int):
+        self.path = path
+        self.max_rows = max(1, int(max_rows))
+        self._db = LocalSQLite(path, schema=_SCHEMA)
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        return self._db.conn()
+
+    def get(self, key: str, now: float) -> Tuple[bool, Any, float]:
+        row = self._conn().execute(
+            "SELECT value, expires_at FROM ai_response_cache WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        if row is None:
+            return False, None, 0.0
+        self._conn().execute(
+            "UPDATE ai_response_cache SET hits = hits + 1, last_hit_at = ? WHERE key = ?", (now, key)
+        )
+        return True, json.loads(row[0]), float(row[1])
+
+    def set(self, key: str, task: str, value: Any, now: float, expires_at: float) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO ai_response_cache (key, task, value, created_at, expires_at, last_hit_at, hits) "
+            "VALUES (?, ?, ?, ?, ?, ?, 0)",
+            (key, task, json.dumps(value, ensure_ascii=False), now, expires_at, now),
+        )
+        with self._lock:
+            self._writes += 1
+            due = self._writes % _PURGE_EVERY == 0
+        if due:
+            self.purge(now)
+
+    def purge(self, now: Optional[float] = None) -> int:
+        now = now or time.time()
+        conn = self._conn()
+        removed = conn.execute("DELETE FROM ai_response_cache WHERE expires_at <= ?", (now,)).rowcount
+        removed += conn.execute(
+            "DELETE FROM ai_response_cache WHERE key IN ("
+            " SELECT key FROM ai_response_cache ORDER BY last_hit_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_rows,),
+        ).rowcount
+        return removed
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM ai_response_cache")
+
+    def count(self) -> int:
+        return int(self._conn().execute("SELECT COUNT(*) FROM ai_response_cache").fetchone()[0])
+
+
+class ResponseCache:
+    def __init__(self, *, ttls: Dict[str, int], lru_size: int = 256, db_path: str = "", max_rows: int = 5000):
+        self.ttls = dict(ttls or {})
+        self._lru = _LRU(lru_size)
+        self._sqlite: Optional[_SQLiteTier] = None
+        if db_path:
+            try:
+                self._sqlite = _SQLiteTier(db_path, max_rows)
+            except sqlite3.Error:
+                log_extra_safe(log, "warning", "ai_cache_sqlite_unavailable", extra={"path": os.path.basename(db_path)})
+        self._stats = {"hits_memory": 0, "hits_sqlite": 0, "misses": 0, "sets": 0}
+        self._stats_lock = threading.Lock()
+
+    def ttl_for(self, task: str) -> int:
+        return int(self.ttls.get(task, 0))
+
+    def _bump(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def get(self, key: str) -> Tuple[Optional[str], Any]:
+        """Return (tier, value); tier is None on a miss."""
+        now = time.time()
+        hit, value = self._lru.get(key, now)
+        if hit:
+            self._bump("hits_memory")
+            return "memory", value
+        if self._sqlite is not None:
+            try:
+                hit, value, expires_at = self._sqlite.get(key, now)
+            except sqlite3.Error:
+                hit = False
+            if hit:
+                self._lru.set(key, value, expires_at)
+                self._bump("hits_sqlite")
+                return "sqlite", value
+        self._bump("misses")
+        return None, None
+
+    def set(self, key: str, task: str, value: Any) -> None:
+        ttl = self.ttl_for(task)
+        if ttl <= 0:
+            return
+        now = time.time()
+        expires_at = now + ttl
+        self._lru.set(key, value, expires_at)
+        if self._sqlite is not None:
+            try:
+                self._sqlite.set(key, task, value, now, expires_at)
+            except sqlite3.Error:
+                log_extra_safe(log, "warning", "ai_cache_write_failed", extra={"task": task})
+        self._bump("sets")
+
+    def clear(self) -> None:
+        self._lru.clear()
+        if self._sqlite is not None:
+            self._sqlite.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            out = dict(self._stats)
+        out["lru_entries"] = len(self._lru)
+        if self._sqlite is not None:
+            try:
+                out["sqlite_entries"] = self._sqlite.count()
+            except sqlite3.Error:
+                pass
+        return out
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Process-wide cache built from app config; None when AI_CACHE_ENABLED is off."""
+    global _cache
+    cfg = current_app.config
+    if not cfg.get("AI_CACHE_ENABLED", True):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                db_path = resolve_store_path("AI_CACHE_DB_PATH", "ai_cache.sqlite3") or ""
+                _cache = ResponseCache(
+                    ttls=cfg.get("AI_CACHE_TTLS", {}),
+                    lru_size=int(cfg.get("AI_CACHE_LRU_SIZE", 256)),
+                    db_path=db_path,
+                    max_rows=int(cfg.get("AI_CACHE_MAX_ROWS", 5000)),
+                )
+    return _cache
+
+
+def cache_stats() -> Dict[str, int]:
+    return _cache.stats() if _cache is not None else {}
@@ -0,0 +1,171 @@
+"""Adaptive (AIMD) concurrency limit per breaker key (``model:text:task``).
+
+Each key starts at ``AI_LIMITER_INITIAL`` in-flight provider calls. While at least half the
+limit is in use, a success within ``AI_LIMITER_LATENCY_TARGET_S`` raises it by ``1/limit``
+(about +1 per full window of calls); a 429 or timeout multiplies it by ``AI_LIMITER_BACKOFF``
+(at most once per ``_CUT_COOLDOWN_S``, so one burst of failures counts as one congestion
+signal). Callers above the limit wait up to ``AI_LIMITER_QUEUE_TIMEOUT_S`` (at most ``AI_LIMITER_MAX_QUEUE`` waiters),
+then get AIOverloadedError, which bypasses retries and the breaker like executor rejections.
+
+The limiter sits in front of the bounded executor: the executor caps the process, this caps
+each task at what the provider currently sustains.
+"""
+from __future__ import annotations
+import threading
+import time
+from typing import Dict, Optional
+
+from flask import current_app
+
+from app.logging_config import get_logger, log_extra_safe
+from app.utils import metrics
+from .exceptions import AIOverloadedError
+
+log = get_logger("sahai.ai.concurrency")
+
+_CUT_COOLDOWN_S = 1.0
+# Outcomes that mean "the provider is saturated" (see GeminiClient._classify_exception).
+DROP_REASONS = frozenset({"rate_limit", "timeout"})
+
+
+class _KeyLimit:
+    __slots__ = ("limit", "inflight", "waiting", "last_cut", "rejected_total")
+
+    def __init__(self, limit: float):
+        self.limit = limit
+        self.inflight = 0
+        self.waiting = 0
+        self.last_cut = 0.0
+        self.rejected_total = 0
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        *,
+        initial: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        backoff: float = 0.5,
+        latency_target_s: float = 10.0,
+        queue_timeout_s: float = 2.0,
+        max_queue: int = 32,
+    ):
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit))
+        self.initial = min(self.max_limit, max(self.min_limit, int(initial)))
+        self.backoff = min(0.95, max(0.1, float(backoff)))
+        self.latency_target_s = float(latency_target_s)
+        self.queue_timeout_s = float(queue_timeout_s)
+        self.max_queue = max(0, int(max_queue))
+        self._cond = threading.Condition()
+        self._keys: Dict[str, _KeyLimit] = {}
+
+    def _state(self, key: str) -> _KeyLimit:
+        st = self._keys.get(key)
+        if st is None:
+            st = self._keys[key] = _KeyLimit(float(self.initial))
+        return st
+
+    def _publish(self, key: str, st: _KeyLimit) -> None:
+        metrics.set_gauge("ai_limiter_limit", int(st.limit), key=key)
+        metrics.set_gauge("ai_limiter_inflight", st.inflight, key=key)
+        metrics.set_gauge("ai_limiter_queued", st.waiting, key=key)
+
+    def _reject(self, key: str, st: _KeyLimit) -> None:
+        st.rejected_total += 1
+        metrics.inc("ai_limiter_rejected_total", key=key)
+        log_extra_safe(
+            log, "warning", "ai_limiter_reject",
+            extra={"key": key, "limit": int(st.limit), "inflight": st.inflight, "waiting": st.waiting}
+        )
+        raise AIOverloadedError(f"ai_limiter_full:{key}")
+
+    def acquire(self, key: str, timeout: Optional[float] = None) -> None:
+        """Take an in-flight slot for ``key``, waiting at most the queue timeout (or ``timeout`` if shorter)."""
+        wait_s = self.queue_timeout_s if timeout is None else min(self.queue_timeout_s, max(0.0, timeout))
+        with self._cond:
+            st = self._state(key)
+            if st.inflight < int(st.limit):
+                st.inflight += 1
+                self._publish(key, st)
+                return
+            if st.waiting >= self.max_queue or wait_s <= 0:
+                self._reject(key, st)
+            st.waiting += 1
+            self._publish(key, st)
+            give_up_at = time.monotonic() + wait_s
+            try:
+                while st.inflight >= int(st.limit):
+                    left = give_up_at - time.monotonic()
+                    if left <= 0:
+                        self._reject(key, st)
+                    self._cond.wait(left)
+                st.inflight += 1
+            finally:
+                st.waiting -= 1
+                self._publish(key, st)
+
+    def release(self, key: str, outcome: str, dur_s: float) -> None:
+        """Return the slot and adapt the limit: ``outcome`` is "ok" or a _classify_exception reason."""
+        with self._cond:
+            st = self._state(key)
+            was_inflight = st.inflight
+            st.inflight = max(0, st.inflight - 1)
+            if outcome == "ok":
+                # Only grow while the limit is actually being used, so idle keys don't drift to max.
+                if dur_s <= self.latency_target_s and was_inflight * 2 >= st.limit:
+                    st.limit = min(float(self.max_limit), st.limit + 1.0 / max(1.0, st.limit))
+            elif outcome in DROP_REASONS:
+                now = time.monotonic()
+                if now - st.last_cut >= _CUT_COOLDOWN_S:
+                    st.last_cut = now
+                    st.limit = max(float(self.min_limit), st.limit * self.backoff)
+                    log_extra_safe(
+                        log, "info", "ai_limiter_cut",
+                        extra={"key": key, "reason": outcome, "limit": int(st.limit)}
+                    )
+            self._publish(key, st)
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._cond:
+            return {
+                key: {
+                    "limit": int(st.limit),
+                    "limit_exact": round(st.limit, 2),
+                    "inflight": st.inflight,
+                    "queued": st.waiting,
+                    "rejected_total": st.rejected_total,
+                }
+                for key, st in self._keys.items()
+            }
+
+
+_limiter: Optional[AdaptiveLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_concurrency_limiter() -> Optional[AdaptiveLimiter]:
+    """Process-wide limiter from app config; None when AI_LIMITER_ENABLED is off."""
+    global _limiter
+    cfg = current_app.config
+    if not cfg.get("AI_LIMITER_ENABLED", True):
+        return None
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = AdaptiveLimiter(
+                    initial=int(cfg.get("AI_LIMITER_INITIAL", 4)),
+                    min_limit=int(cfg.get("AI_LIMITER_MIN", 1)),
+                    max_limit=int(cfg.get("AI_LIMITER_MAX", 16)),
+                    backoff=float(cfg.get("AI_LIMITER_BACKOFF", 0.5)),
+                    latency_target_s=float(cfg.get("AI_LIMITER_LATENCY_TARGET_S", 10)),
+                    queue_timeout_s=float(cfg.get("AI_LIMITER_QUEUE_TIMEOUT_S", 2)),
+                    max_queue=int(cfg.get("AI_LIMITER_MAX_QUEUE", 32)),
+                )
+    return _limiter
+
+
+def limiter_stats() -> Dict[str, Dict[str, float]]:
+    return _limiter.snapshot() if _limiter is not None else {}
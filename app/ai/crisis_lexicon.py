@@ -0,0 +1,255 @@
+"""Compiled crisis-phrase detector behind ``safety.detect_crisis``.
+
+The lexicon (built-in English / Hindi / Hinglish phrases, plus ``CRISIS_WORDS`` and an optional
+JSON file at ``CRISIS_LEXICON_PATH``) is compiled once into a single regex shaped like a
+character trie, so one ``finditer`` pass scans the text no matter how many phrases there are.
+
+Matching rules:
+- text and phrases are NFKC-normalised and case-folded, zero-width joiners are dropped and curly
+  apostrophes straightened, so full-width Latin, nukta forms and ZWJ/ZWNJ spellings agree;
+- matches are whole words: Latin and Devanagari letters (including matras) count as word chars;
+- a space in a phrase matches any run of spaces / hyphens / underscores ("self harm" finds
+  "self-harm", "self  harm");
+- a trailing ``*`` makes a prefix phrase ("suicid*" finds "suicide", "suicidal").
+
+Each phrase has a category and a weight in (0, 1]. Distinct phrases combine as independent
+evidence (``1 - prod(1 - w)``); the category with the highest summed weight wins.
+``CRISIS_MIN_CONFIDENCE`` decides ``triggered``. There is deliberately no negation handling:
+"I don't want to die" still triggers, because a false alarm here only shows grounding steps.
+Weak phrases (hopelessness) are weighted below the default threshold so one alone does not.
+
+Lexicon file format: ``{"category": {"phrase": weight, ...}, ...}``. The file is re-checked at
+most every ``CRISIS_LEXICON_RELOAD_S`` seconds and recompiled when its mtime/size changes; a
+broken file is logged and the previous lexicon stays active.
+"""
+from __future__ import annotations
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from flask import current_app
+
+from app.logging_config import get_logger, log_extra_safe
+from .schemas import CrisisSignal
+
+log = get_logger("sahai.ai.crisis")
+
+DEFAULT_CATEGORY = "self_harm"
+CONFIG_WORD_WEIGHT = 0.85  # CRISIS_WORDS entries (the old detector's fixed confidence)
+
+_BUILTIN: Dict[str, Dict[str, float]] = {
+    "suicidal_ideation": {
+        "suicid*": 0.9, "kill myself": 0.95, "end my life": 0.95, "end it all": 0.7, "take my own life": 0.95,
+        "i want to die": 0.9, "want to die": 0.8, "wanna die": 0.8, "better off dead": 0.85,
+        "no reason to live": 0.85, "don't want to live": 0.85, "dont want to live": 0.85,
+        "khudkushi": 0.9, "khud khushi": 0.9, "aatmahatya": 0.9, "atmahatya": 0.9,
+        "marna chahta": 0.85, "marna chahti": 0.85, "mar jana chahta": 0.9, "mar jana chahti": 0.9,
+        "mar jaana chahta": 0.9, "mar jaana chahti": 0.9, "jeena nahi chahta": 0.85, "jeena nahi chahti": 0.85,
+        "jina nahi chahta": 0.85, "jina nahi chahti": 0.85, "zindagi khatam": 0.8, "jeene ka mann nahi": 0.75,
+        "आत्महत्या*": 0.9, "ख़ुदकुशी": 0.9, "खुदकुशी": 0.9, "मरना चाहता": 0.85, "मरना चाहती": 0.85,
+        "मर जाना चाहता": 0.9, "मर जाना चाहती": 0.9, "जीना नहीं चाहता": 0.85, "जीना नहीं चाहती": 0.85,
+        "ज़िंदगी ख़त्म": 0.8, "जिंदगी खत्म": 0.8,
+    },
+    "self_harm": {
+        "self harm": 0.85, "self harming": 0.85, "hurt myself": 0.85, "hurting myself": 0.85,
+        "cut myself": 0.9, "cutting myself": 0.9, "harm myself": 0.85,
+        "khud ko nuksan": 0.8, "khud ko chot": 0.8, "khud ko hurt": 0.8,
+        "खुद को नुकसान": 0.8, "ख़ुद को नुकसान": 0.8, "खुद को चोट": 0.8, "ख़ुद को चोट": 0.8,
+    },
+    "hopelessness": {
+        "no way out": 0.4, "can't go on": 0.45, "cant go on": 0.45, "nothing to live for": 0.8,
+        "koi umeed nahi": 0.45, "sab khatam": 0.45, "कोई उम्मीद नहीं": 0.45, "सब ख़त्म": 0.45, "सब खत्म": 0.45,
+    },
+}
+
+_ZERO_WIDTH = re.compile("[\u200b\u200c\u200d\u2060\ufeff]")
+_WORD = r"\w\u0900-\u097F"
+_SEP = r"[\s\-_]+"
+_SEP_RUN = re.compile(_SEP)
+_WILD = "\x00"  # trie marker for "phrase ends in *"
+_END = ""
+
+
+def normalize(text: str) -> str:
+    if not text.isascii():  # ASCII is already NFKC and has no zero-width / curly quotes
+        text = _ZERO_WIDTH.sub("", unicodedata.normalize("NFKC", text))
+        text = text.replace("\u2019", "'").replace("\u2018", "'")
+    return text.casefold()
+
+
+def _canonical(phrase: str) -> Tuple[str, bool]:
+    """Normalised phrase with single-space separators, and whether it is a prefix (``*``)."""
+    p = normalize(phrase).strip()
+    prefix = p.endswith("*")
+    return _SEP_RUN.sub(" ", p.rstrip("*").strip()), prefix
+
+
+def _trie_regex(phrases: List[Tuple[str, bool]]) -> str:
+    trie: Dict[str, dict] = {}
+    for phrase, prefix in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[_WILD if prefix else _END] = {}
+
+    def emit(node: Dict[str, dict]) -> str:
+        alts = []
+        for ch in sorted(k for k in node if k not in (_END, _WILD)):
+            alts.append((_SEP if ch == " " else re.escape(ch)) + emit(node[ch]))
+        if _WILD in node:
+            alts.append(f"[{_WORD}]*")
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        if _END in node:
+            return f"(?:{body})?"
+        return body
+
+    return f"(?<![{_WORD}])(?:{emit(trie)})(?![{_WORD}])"
+
+
+@dataclass(frozen=True)
+class CrisisMatch:
+    phrase: str
+    category: str
+    weight: float
+    start: int
+    end: int
+
+
+class CrisisDetector:
+    """One compiled lexicon. Immutable; safe to share between threads."""
+
+    def __init__(self, lexicon: Dict[str, Dict[str, float]]):
+        self.exact: Dict[str, Tuple[str, float]] = {}
+        prefixes: Dict[str, Tuple[str, float]] = {}
+        for category, phrases in lexicon.items():
+            for raw, weight in phrases.items():
+                phrase, prefix = _canonical(raw)
+                if not phrase:
+                    continue
+                weight = min(1.0, max(0.0, float(weight)))
+                target = prefixes if prefix else self.exact
+                if weight > target.get(phrase, ("", -1.0))[1]:
+                    target[phrase] = (category, weight)
+        # Longest first so "suicid*" loses to a more specific prefix if one is ever added.
+        self.prefixes = sorted(prefixes.items(), key=lambda kv: -len(kv[0]))
+        entries = [(p, False) for p in self.exact] + [(p, True) for p in prefixes]
+        self.pattern = re.compile(_trie_regex(entries)) if entries else None
+        self.size = len(entries)
+
+    def _lookup(self, matched: str) -> Tuple[str, Tuple[str, float]]:
+        key = _SEP_RUN.sub(" ", matched)
+        hit = self.exact.get(key)
+        if hit is not None:
+            return key, hit
+        for prefix, hit in self.prefixes:
+            if key.startswith(prefix):
+                return prefix + "*", hit
+        return key, (DEFAULT_CATEGORY, 0.0)  # unreachable: the regex only matches lexicon phrases
+
+    def matches(self, text: str, normalized: bool = False) -> List[CrisisMatch]:
+        """Lexicon hits in ``text`` (pass ``normalized=True`` if it already went through ``normalize``)."""
+        if not text or self.pattern is None:
+            return []
+        out = []
+        for m in self.pattern.finditer(text if normalized else normalize(text)):
+            phrase, (category, weight) = self._lookup(m.group(0))
+            out.append(CrisisMatch(phrase, category, weight, m.start(), m.end()))
+        return out
+
+    def detect(self, text: str, min_confidence: float = 0.5, normalized: bool = False) -> CrisisSignal:
+        hits = self.matches(text, normalized)
+        if not hits:
+            return CrisisSignal(triggered=False, category=None, confidence=0.0)
+        best: Dict[str, float] = {}
+        per_category: Dict[str, float] = {}
+        for h in hits:
+            best[h.phrase] = max(best.get(h.phrase, 0.0), h.weight)
+            per_category[h.category] = per_category.get(h.category, 0.0) + h.weight
+        miss = 1.0
+        for w in best.values():
+            miss *= 1.0 - w
+        confidence = round(1.0 - miss, 3)
+        category = max(per_category.items(), key=lambda kv: kv[1])[0]
+        if confidence < min_confidence:
+            return CrisisSignal(triggered=False, category=None, confidence=confidence)
+        return CrisisSignal(triggered=True, category=category, confidence=confidence)
+
+
+def build_lexicon(config_words, file_lexicon: Optional[Dict[str, Dict[str, float]]] = None) -> Dict[str, Dict[str, float]]:
+    lexicon = {cat: dict(phrases) for cat, phrases in _BUILTIN.items()}
+    own = lexicon.setdefault(DEFAULT_CATEGORY, {})
+    for w in config_words or []:
+        own[w] = max(own.get(w, 0.0), CONFIG_WORD_WEIGHT)
+    for cat, phrases in (file_lexicon or {}).items():
+        lexicon.setdefault(cat, {}).update(phrases)
+    return lexicon
+
+
+def _read_file(path: str) -> Dict[str, Dict[str, float]]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not all(isinstance(v, dict) for v in data.values()):
+        raise ValueError("crisis lexicon must map category -> {phrase: weight}")
+    return {str(cat): {str(p): float(w) for p, w in phrases.items()} for cat, phrases in data.items()}
+
+
+class _Holder:
+    """Current detector + the config/file version it was compiled from."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.detector: Optional[CrisisDetector] = None
+        self.version: Optional[tuple] = None
+        self.checked_at = 0.0
+
+    def get(self) -> CrisisDetector:
+        cfg = current_app.config
+        words = tuple(cfg.get("CRISIS_WORDS", []) or ())
+        path = cfg.get("CRISIS_LEXICON_PATH") or None
+        now = time.monotonic()
+        if self.detector is not None and self.version is not None and self.version[:2] == (words, path):
+            if path is None or now - self.checked_at < float(cfg.get("CRISIS_LEXICON_RELOAD_S", 5)):
+                return self.detector
+        with self.lock:
+            self.checked_at = now
+            stamp = None
+            if path:
+                try:
+                    st = os.stat(path)
+                    stamp = (st.st_mtime_ns, st.st_size)
+                except OSError:
+                    stamp = "missing"
+            version = (words, path, stamp)
+            if self.detector is not None and version == self.version:
+                return self.detector
+            file_lexicon = None
+            if path and stamp != "missing":
+                try:
+                    file_lexicon = _read_file(path)
+                except (OSError, ValueError) as e:
+                    log_extra_safe(log, "warning", "crisis_lexicon_load_fail", extra={"etype": type(e).__name__})
+                    if self.detector is not None:
+                        self.version = version  # don't re-read the same broken file on every call
+                        return self.detector
+            t0 = time.perf_counter()
+            self.detector = CrisisDetector(build_lexicon(words, file_lexicon))
+            self.version = version
+            log_extra_safe(log, "info", "crisis_lexicon_compiled", extra={
+                "phrases": self.detector.size, "from_file": file_lexicon is not None,
+                "ms": round((time.perf_counter() - t0) * 1000, 1),
+            })
+            return self.detector
+
+
+_holder = _Holder()
+
+
+def get_crisis_detector() -> CrisisDetector:
+    return _holder.get()
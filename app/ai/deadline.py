@@ -0,0 +1,70 @@
+"""Per-request time budget for AI work.
+
+Routes create one ``Deadline`` (``AI_ROUTE_BUDGET_S``, kept below the gunicorn worker timeout)
+and pass it down through `app.ai.tasks` into `GeminiClient._call_model`, which trims each
+attempt's timeout to what is left and skips retries / fallbacks the budget cannot cover.
+Time spent is recorded per named phase so routes can log where the budget went.
+"""
+from __future__ import annotations
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from flask import current_app
+
+from .exceptions import AITimeoutError
+
+
+class Deadline:
+    def __init__(self, budget_s: float, *, min_attempt_s: float = 2.0):
+        self.budget_s = float(budget_s)
+        self.min_attempt_s = float(min_attempt_s)
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + self.budget_s
+        self._phases: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, budget_s: Optional[float] = None) -> "Deadline":
+        cfg = current_app.config
+        return cls(
+            budget_s if budget_s is not None else float(cfg.get("AI_ROUTE_BUDGET_S", 25)),
+            min_attempt_s=float(cfg.get("AI_DEADLINE_MIN_ATTEMPT_S", 2)),
+        )
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def can_afford(self, seconds: float = 0.0) -> bool:
+        """True if ``seconds`` of overhead still leaves room for a minimally useful attempt."""
+        return self.remaining() - seconds >= self.min_attempt_s
+
+    def trim(self, timeout_s: float) -> float:
+        """Clamp an attempt timeout to the remaining budget; raise if not even one attempt fits."""
+        left = self.remaining()
+        if left < self.min_attempt_s:
+            raise AITimeoutError("deadline_exceeded")
+        return min(float(timeout_s), left)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator["Deadline"]:
+        t0 = time.monotonic()
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._phases[name] = round(self._phases.get(name, 0.0) + (time.monotonic() - t0), 3)
+
+    def summary(self) -> Dict[str, object]:
+        with self._lock:
+            phases = dict(self._phases)
+        return {
+            "budget_s": self.budget_s,
+            "used_s": round(time.monotonic() - self.started_at, 3),
+            "remaining_s": round(self.remaining(), 3),
+            "phases": phases,
+        }
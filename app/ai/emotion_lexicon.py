@@ -0,0 +1,238 @@
+"""Local lexicon emotion scorer over the Emotion Lens key order (no network, microseconds).
+
+Text is NFKC-normalised, case-folded and tokenised (Latin and Devanagari). Unigrams and short
+phrases from a weighted English / Hindi / Hinglish lexicon add to a fixed 19-slot vector in
+``EMOTION_KEY_ORDER``; intensifiers ("very", "bahut", "बहुत") scale a hit, and negators flip it:
+English negators are checked just before the term, Hindi/Hinglish ones ("nahi", "नहीं") before
+or just after it ("khush nahi hoon"). A negated term moves part of its weight to its opposite
+emotion where one is defined ("not happy" -> sad), otherwise it is dropped.
+
+Raw sums are squashed to 0..1 per emotion. ``confidence`` combines how much evidence there is
+with how dominant the top emotion is, so callers can gate on it (``AI_LEXICON_MIN_CONFIDENCE``).
+"""
+from __future__ import annotations
+import math
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from flask import current_app, has_app_context
+
+from .schemas import EMOTION_KEY_ORDER, EmotionAnalysis
+
+_LEXICON_SPEC: Dict[str, Dict[str, float]] = {
+    "calm": {
+        "calm": 1.0, "peaceful": 1.0, "relaxed": 0.9, "at peace": 1.0, "serene": 0.9, "chill": 0.6,
+        "settled": 0.6, "content": 0.6, "shaant": 1.0, "shant": 1.0, "sukoon": 0.9, "aaram": 0.5,
+        "शांत": 1.0, "सुकून": 0.9, "आराम": 0.5,
+    },
+    "anxious": {
+        "anxious": 1.0, "anxiety": 1.0, "worried": 0.9, "worry": 0.8, "nervous": 0.9, "panic": 1.0,
+        "panicking": 1.0, "scared": 0.8, "afraid": 0.8, "fear": 0.7, "uneasy": 0.7, "restless": 0.6,
+        "overthinking": 0.8, "ghabrahat": 1.0, "ghabra": 0.9, "chinta": 0.9, "dar": 0.7, "darr": 0.7,
+        "tension": 0.7, "घबराहट": 1.0, "चिंता": 0.9, "डर": 0.7, "बेचैन": 0.8,
+    },
+    "sad": {
+        "sad": 1.0, "unhappy": 0.9, "depressed": 1.0, "down": 0.5, "low": 0.5, "cry": 0.8, "crying": 0.8,
+        "cried": 0.8, "heartbroken": 1.0, "miserable": 1.0, "upset": 0.7, "hopeless": 0.8, "empty": 0.6,
+        "dukhi": 1.0, "udaas": 1.0, "udas": 1.0, "rona": 0.8, "dukh": 0.8,
+        "दुखी": 1.0, "उदास": 1.0, "दुख": 0.8, "रोना": 0.8,
+    },
+    "angry": {
+        "angry": 1.0, "anger": 1.0, "mad": 0.7, "furious": 1.0, "irritated": 0.7, "annoyed": 0.6,
+        "rage": 1.0, "hate": 0.7, "pissed": 0.8, "gussa": 1.0, "ghussa": 1.0, "naraz": 0.8, "naraaz": 0.8,
+        "गुस्सा": 1.0, "क्रोध": 1.0, "नाराज़": 0.8, "नाराज": 0.8,
+    },
+    "hopeful": {
+        "hopeful": 1.0, "hope": 0.8, "optimistic": 1.0, "positive": 0.6, "looking forward": 0.8,
+        "better tomorrow": 0.8, "ummeed": 1.0, "umeed": 1.0, "asha": 0.9, "उम्मीद": 1.0, "आशा": 0.9,
+    },
+    "tired": {
+        "tired": 1.0, "exhausted": 1.0, "sleepy": 0.8, "drained": 0.9, "fatigued": 1.0, "worn out": 0.9,
+        "burnt out": 0.9, "burned out": 0.9, "burnout": 0.9, "no energy": 0.9, "thak": 0.9, "thaka": 1.0,
+        "thaki": 1.0, "thakaan": 1.0, "neend": 0.5, "थका": 1.0, "थकी": 1.0, "थकान": 1.0, "नींद": 0.5,
+    },
+    "stressed": {
+        "stressed": 1.0, "stress": 0.9, "stressful": 0.9, "pressure": 0.8, "overwhelmed": 1.0,
+        "deadline": 0.5, "deadlines": 0.5, "too much": 0.5, "exam": 0.3, "exams": 0.3, "pareshan": 0.9,
+        "pareshaan": 0.9, "dabav": 0.8, "dabaav": 0.8, "तनाव": 1.0, "परेशान": 0.9, "दबाव": 0.8,
+    },
+    "motivated": {
+        "motivated": 1.0, "determined": 0.9, "focused": 0.8, "driven": 0.8, "productive": 0.7,
+        "inspired": 0.8, "pumped": 0.7, "josh": 0.8, "jazba": 0.8, "prerit": 0.9,
+        "प्रेरित": 0.9, "जोश": 0.8,
+    },
+    "happy": {
+        "happy": 1.0, "joy": 0.9, "joyful": 1.0, "glad": 0.8, "cheerful": 0.9, "great": 0.5, "good": 0.4,
+        "awesome": 0.6, "delighted": 1.0, "smile": 0.6, "khush": 1.0, "khushi": 1.0, "maza": 0.6,
+        "mazaa": 0.6, "खुश": 1.0, "खुशी": 1.0, "आनंद": 0.9,
+    },
+    "lonely": {
+        "lonely": 1.0, "alone": 0.8, "isolated": 0.9, "left out": 0.8, "no one": 0.5, "nobody": 0.5,
+        "akela": 1.0, "akeli": 1.0, "akelapan": 1.0, "tanha": 0.9, "अकेला": 1.0, "अकेली": 1.0, "अकेलापन": 1.0,
+    },
+    "confused": {
+        "confused": 1.0, "confusing": 0.8, "lost": 0.6, "unsure": 0.7, "don't know": 0.4, "dont know": 0.4,
+        "uncertain": 0.7, "samajh": 0.3, "uljhan": 1.0, "confuse": 0.9, "उलझन": 1.0, "भ्रम": 0.8,
+    },
+    "grateful": {
+        "grateful": 1.0, "thankful": 1.0, "thanks": 0.5, "thank": 0.5, "blessed": 0.8, "appreciate": 0.7,
+        "shukr": 1.0, "shukriya": 0.7, "dhanyavaad": 0.7, "aabhari": 1.0, "आभारी": 1.0, "शुक्र": 1.0, "धन्यवाद": 0.7,
+    },
+    "excited": {
+        "excited": 1.0, "exciting": 0.8, "thrilled": 1.0, "can't wait": 0.9, "cant wait": 0.9, "eager": 0.8,
+        "utsahit": 1.0, "utsah": 0.9, "excitement": 0.9, "उत्साहित": 1.0, "उत्साह": 0.9,
+    },
+    "frustrated": {
+        "frustrated": 1.0, "frustrating": 0.9, "fed up": 1.0, "stuck": 0.6, "sick of": 0.8, "pointless": 0.5,
+        "chidchida": 0.9, "pak gaya": 0.8, "तंग": 0.8, "चिढ़": 0.9,
+    },
+    "guilty": {
+        "guilty": 1.0, "guilt": 1.0, "my fault": 0.9, "regret": 0.8, "ashamed": 0.7, "sorry": 0.4,
+        "galti": 0.8, "pachtava": 1.0, "pachtawa": 1.0, "गलती": 0.8, "पछतावा": 1.0, "दोषी": 1.0,
+    },
+    "embarrassed": {
+        "embarrassed": 1.0, "embarrassing": 0.9, "humiliated": 1.0, "awkward": 0.6, "shame": 0.6,
+        "sharam": 0.9, "sharminda": 1.0, "sharmindgi": 1.0, "शर्म": 0.9, "शर्मिंदा": 1.0,
+    },
+    "insecure": {
+        "insecure": 1.0, "not good enough": 1.0, "worthless": 0.9, "inferior": 0.8, "self doubt": 0.9,
+        "doubt myself": 0.9, "compare": 0.4, "comparing": 0.5, "kamzor": 0.7, "asurakshit": 1.0,
+        "असुरक्षित": 1.0, "कमज़ोर": 0.7, "कमजोर": 0.7,
+    },
+    "relieved": {
+        "relieved": 1.0, "relief": 1.0, "finally": 0.4, "phew": 0.8, "weight off": 0.8, "rahat": 1.0,
+        "raahat": 1.0, "राहत": 1.0,
+    },
+    "proud": {
+        "proud": 1.0, "accomplished": 0.9, "achieved": 0.7, "did it": 0.6, "nailed": 0.6, "garv": 1.0,
+        "fakhr": 0.9, "गर्व": 1.0,
+    },
+}
+
+# Negated term -> share of weight moved to the opposite emotion.
+_OPPOSITES: Dict[str, str] = {
+    "happy": "sad", "calm": "anxious", "hopeful": "sad", "motivated": "tired", "relieved": "stressed",
+    "proud": "insecure", "excited": "tired", "grateful": "frustrated",
+}
+_NEGATED_SHARE = 0.5
+
+_PRE_NEGATORS = frozenset({
+    "not", "no", "never", "dont", "don't", "didnt", "didn't", "isnt", "isn't", "wasnt", "wasn't",
+    "arent", "aren't", "cant", "can't", "cannot", "hardly", "barely", "without", "nothing",
+})
+_HI_NEGATORS = frozenset({"nahi", "nahin", "nahinn", "nai", "na", "mat", "नहीं", "नही", "ना", "न", "मत"})
+_INTENSIFIERS = frozenset({
+    "very", "really", "so", "extremely", "too", "super", "totally", "bahut", "bohot", "bahot",
+    "itna", "kaafi", "bilkul", "बहुत", "बेहद", "काफी", "इतना",
+})
+_INTENSITY = 1.5
+
+_TOKEN_RE = re.compile(r"[\wऀ-ॿ']+")
+
+_INDEX = {k: i for i, k in enumerate(EMOTION_KEY_ORDER)}
+
+
+def _tokens(text: str) -> List[str]:
+    norm = unicodedata.normalize("NFKC", text or "").casefold().replace("’", "'")
+    return [t.strip("'") for t in _TOKEN_RE.findall(norm) if t.strip("'")]
+
+
+def _compile() -> Tuple[Dict[Tuple[str, ...], Tuple[int, float]], int]:
+    table: Dict[Tuple[str, ...], Tuple[int, float]] = {}
+    for emotion, terms in _LEXICON_SPEC.items():
+        idx = _INDEX[emotion]
+        for term, weight in terms.items():
+            key = tuple(_tokens(term))
+            # A phrase listed under two emotions keeps its strongest reading.
+            if key not in table or table[key][1] < weight:
+                table[key] = (idx, weight)
+    return table, max(len(k) for k in table)
+
+
+_TABLE, _MAX_NGRAM = _compile()
+# Only tokens that start a multi-word entry need the n-gram probe; the rest are one dict lookup.
+_PHRASE_HEADS = frozenset(k[0] for k in _TABLE if len(k) > 1)
+_NEGATORS = _PRE_NEGATORS | _HI_NEGATORS
+
+
+@dataclass(frozen=True)
+class LexiconScores:
+    vector: Tuple[float, ...]     # 0..1 per emotion, EMOTION_KEY_ORDER
+    label: Optional[str]
+    confidence: float
+    hits: int
+
+    @property
+    def scores(self) -> Dict[str, float]:
+        """Non-zero scores keyed by emotion (EmotionSnapshot.score_map shape)."""
+        return {k: v for k, v in zip(EMOTION_KEY_ORDER, self.vector) if v > 0}
+
+    def confident(self, min_confidence: Optional[float] = None) -> bool:
+        return self.label is not None and self.confidence >= _threshold(min_confidence)
+
+    def as_emotion_analysis(self) -> EmotionAnalysis:
+        return EmotionAnalysis(
+            primary_label=self.label or "",
+            scores=self.scores,
+            confidence=self.confidence,
+            explanations=["local lexicon"],
+        )
+
+
+def _threshold(min_confidence: Optional[float]) -> float:
+    if min_confidence is not None:
+        return float(min_confidence)
+    if has_app_context():
+        return float(current_app.config.get("AI_LEXICON_MIN_CONFIDENCE", 0.6))
+    return 0.6
+
+
+def score_emotions(text: str) -> LexiconScores:
+    toks = _tokens(text)
+    raw = [0.0] * len(EMOTION_KEY_ORDER)
+    hits = 0
+    n = len(toks)
+    i = 0
+    while i < n:
+        entry = None
+        size = 1
+        if toks[i] in _PHRASE_HEADS:
+            for size in range(min(_MAX_NGRAM, n - i), 0, -1):
+                entry = _TABLE.get(tuple(toks[i:i + size]))
+                if entry is not None:
+                    break
+        else:
+            entry = _TABLE.get((toks[i],))
+        if entry is None:
+            i += 1
+            continue
+        idx, weight = entry
+        before = toks[max(0, i - 3):i]
+        after = toks[i + size:i + size + 2]
+        if not _INTENSIFIERS.isdisjoint(before[-2:]):
+            weight *= _INTENSITY
+        negated = not _NEGATORS.isdisjoint(before) or not _HI_NEGATORS.isdisjoint(after)
+        if negated:
+            opposite = _OPPOSITES.get(EMOTION_KEY_ORDER[idx])
+            if opposite is not None:
+                raw[_INDEX[opposite]] += weight * _NEGATED_SHARE
+        else:
+            raw[idx] += weight
+        hits += 1
+        i += size
+
+    total = sum(raw)
+    if total <= 0:
+        return LexiconScores(vector=tuple(0.0 for _ in raw), label=None, confidence=0.0, hits=hits)
+    top = max(range(len(raw)), key=raw.__getitem__)
+    vector = tuple(round(1.0 - math.exp(-r), 3) for r in raw)
+    confidence = round((raw[top] / total) * (1.0 - math.exp(-raw[top])), 3)
+    return LexiconScores(vector=vector, label=EMOTION_KEY_ORDER[top], confidence=confidence, hits=hits)
+
+
+def confident_label(text: str, min_confidence: Optional[float] = None) -> Optional[str]:
+    """Mood label for free text when the lexicon is confident enough, else None."""
+    res = score_emotions(text)
+    return res.label if res.confident(min_confidence) else None
@@ -23,3 +23,11 @@ class AIUnavailableError(RuntimeError):
 
 class AIStructuredOutputError(RuntimeError):
     """Model failed to produce required JSON structure (repair attempts exhausted). May count if repeated."""
+
+
+class AIOverloadedError(AIUnavailableError):
+    """Local capacity exhausted (bounded executor full). Fails fast; never retried and never opens breaker."""
+
+
+class AICancelledError(AIUnavailableError):
+    """Caller no longer wants the result (hedge loser). Stops before the next attempt; never opens breaker."""
@@ -0,0 +1,131 @@
+"""Bounded, shared executor for blocking provider calls.
+
+`GeminiClient._with_timeout` used to spawn a fresh daemon thread per attempt; a timed-out
+thread kept running (and holding its HTTP connection) after the caller gave up. All blocking
+SDK calls now go through one size-limited pool per process:
+
+- at most ``AI_EXECUTOR_MAX_WORKERS`` provider calls run at once,
+- at most ``AI_EXECUTOR_MAX_QUEUE`` more wait for a worker,
+- anything beyond that is rejected immediately with AIOverloadedError.
+
+A call whose caller timed out is "abandoned": it still occupies its worker until the SDK
+returns, but it can never push the process past the cap.
+"""
+from __future__ import annotations
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Optional
+
+from flask import current_app
+
+from app.logging_config import get_logger, log_extra_safe
+from .exceptions import AIOverloadedError, AITimeoutError
+
+log = get_logger("sahai.ai.executor")
+
+
+class BoundedCallExecutor:
+    def __init__(self, max_workers: int = 16, max_queue: int = 16, *, name: str = "ai-call"):
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(0, int(max_queue))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        # One slot per running or waiting call; acquiring never blocks.
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+        self._lock = threading.Lock()
+        self._running = 0
+        self._queued = 0
+        self._abandoned = 0
+        self._abandoned_total = 0
+        self._rejected_total = 0
+
+    def run(self, func: Callable[..., Any], *args, timeout: float, **kwargs) -> Any:
+        """Run ``func`` on the pool and wait at most ``timeout`` seconds for its result."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected_total += 1
+            log_extra_safe(log, "warning", "ai_executor_reject", extra=self.stats())
+            raise AIOverloadedError("ai_executor_full")
+
+        # Both flags are only touched under self._lock: the task's ``finally`` can run before the
+        # future reports done(), so "abandoned" is decided from ``finished``, not from the future.
+        state = {"abandoned": False, "finished": False}
+
+        def task():
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    state["finished"] = True
+                    if state["abandoned"]:
+                        self._abandoned -= 1
+                self._slots.release()
+
+        with self._lock:
+            self._queued += 1
+        try:
+            fut = self._pool.submit(task)
+        except RuntimeError:
+            with self._lock:
+                self._queued -= 1
+            self._slots.release()
+            raise AIOverloadedError("ai_executor_shutdown")
+
+        try:
+            return fut.result(timeout=timeout)
+        except FutureTimeout:
+            if fut.cancel():
+                # Never started: give its slot back right away.
+                with self._lock:
+                    self._queued -= 1
+                self._slots.release()
+                raise AITimeoutError("AI request timed out (queued)")
+            with self._lock:
+                finished = state["finished"]
+                if not finished:
+                    state["abandoned"] = True
+                    self._abandoned += 1
+                    self._abandoned_total += 1
+            if finished:
+                return fut.result()
+            raise AITimeoutError("AI request timed out")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "live": self._running,
+                "queued": self._queued,
+                "abandoned": self._abandoned,
+                "abandoned_total": self._abandoned_total,
+                "rejected_total": self._rejected_total,
+            }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executor: Optional[BoundedCallExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_call_executor() -> BoundedCallExecutor:
+    """Process-wide executor, sized from app config on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                cfg = current_app.config
+                _executor = BoundedCallExecutor(
+                    max_workers=int(cfg.get("AI_EXECUTOR_MAX_WORKERS", 16)),
+                    max_queue=int(cfg.get("AI_EXECUTOR_MAX_QUEUE", 16)),
+                )
+    return _executor
+
+
+def executor_stats() -> Dict[str, int]:
+    return _executor.stats() if _executor is not None else {}
@@ -0,0 +1,195 @@
+"""Offline fake of the Gemini model API with latency and fault injection.
+
+Structured calls get JSON generated from the requested ``response_schema`` (so it validates
+against every task schema); plain-text calls get a short canned sentence. Per call, in order:
+
+1. sleep a sample from ``AI_FAKE_LATENCY`` (``fixed:S``, ``uniform:A:B``, ``normal:MU:SD`` or
+   ``lognormal:MEDIAN:SIGMA``, seconds);
+2. with ``AI_FAKE_RATE_429`` / ``AI_FAKE_RATE_5XX`` raise an error carrying that status code;
+3. with ``AI_FAKE_RATE_TIMEOUT`` hang for ``AI_FAKE_HANG_S`` so the client's watchdog fires;
+4. with ``AI_FAKE_RATE_MALFORMED`` return truncated / trailing-comma JSON, and with
+   ``AI_FAKE_RATE_FENCED`` wrap it in a Markdown code fence.
+
+``AI_FAKE_SEED`` makes a run reproducible.
+"""
+from __future__ import annotations
+import asyncio
+import json
+import math
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Iterator, List, Optional
+
+from .schemas import EMOTION_KEY_ORDER
+
+_WORDS = (
+    "take a slow breath and notice one small thing that went okay today "
+    "it is fine to rest a little before you begin again one step at a time"
+).split()
+
+
+class FakeProviderError(Exception):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class FakeSettings:
+    latency: str = "lognormal:0.8:0.5"
+    rate_429: float = 0.0
+    rate_5xx: float = 0.0
+    rate_timeout: float = 0.0
+    rate_malformed: float = 0.0
+    rate_fenced: float = 0.0
+    hang_s: float = 120.0
+    seed: Optional[int] = None
+
+    @classmethod
+    def from_config(cls, cfg) -> "FakeSettings":
+        seed = cfg.get("AI_FAKE_SEED")
+        return cls(
+            latency=str(cfg.get("AI_FAKE_LATENCY", cls.latency)),
+            rate_429=float(cfg.get("AI_FAKE_RATE_429", 0.0)),
+            rate_5xx=float(cfg.get("AI_FAKE_RATE_5XX", 0.0)),
+            rate_timeout=float(cfg.get("AI_FAKE_RATE_TIMEOUT", 0.0)),
+            rate_malformed=float(cfg.get("AI_FAKE_RATE_MALFORMED", 0.0)),
+            rate_fenced=float(cfg.get("AI_FAKE_RATE_FENCED", 0.0)),
+            hang_s=float(cfg.get("AI_FAKE_HANG_S", 120.0)),
+            seed=int(seed) if seed not in (None, "") else None,
+        )
+
+
+def sample_latency(spec: str, rng: random.Random) -> float:
+    kind, _, rest = (spec or "fixed:0").partition(":")
+    args = [float(x) for x in rest.split(":") if x]
+    if kind == "fixed":
+        return max(0.0, args[0] if args else 0.0)
+    if kind == "uniform":
+        return rng.uniform(args[0], args[1])
+    if kind == "normal":
+        return max(0.0, rng.gauss(args[0], args[1]))
+    if kind == "lognormal":
+        return rng.lognormvariate(math.log(max(args[0], 1e-6)), args[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class _Response:
+    def __init__(self, text: str):
+        self.text = text
+
+
+def _sentence(rng: random.Random, n: int = 8) -> str:
+    start = rng.randrange(len(_WORDS))
+    words = [_WORDS[(start + i) % len(_WORDS)] for i in range(n)]
+    return " ".join(words).capitalize() + "."
+
+
+def fake_value(schema: dict, rng: random.Random, name: str = "") -> Any:
+    """Schema-valid value for a cleaned Gemini schema, with field-name hints for plausible content."""
+    if "anyOf" in schema:
+        options = [s for s in schema["anyOf"] if s.get("type") != "null"] or schema["anyOf"]
+        return fake_value(options[0], rng, name)
+    typ = schema.get("type")
+    if typ == "object":
+        props = schema.get("properties") or {}
+        if name == "scores" and not props:
+            props = {emo: {"type": "number"} for emo in EMOTION_KEY_ORDER[:8]}
+        return {k: fake_value(v, rng, k) for k, v in props.items()}
+    if typ == "array":
+        n = {"panels": 3, "steps": 4, "prompts": 3}.get(name, rng.randint(1, 3))
+        items = schema.get("items") or {"type": "string"}
+        if name == "detected_emotions":
+            return rng.sample(EMOTION_KEY_ORDER[:8], n)
+        return [fake_value(items, rng, name) for _ in range(n)]
+    if typ == "string":
+        if name == "primary_label":
+            return rng.choice(EMOTION_KEY_ORDER[:8])
+        if name == "language":
+            return "en"
+        if name == "tone":
+            return "supportive"
+        if name == "reading_grade":
+            return "6"
+        if name in ("keywords", "references"):
+            return rng.choice(_WORDS)
+        return _sentence(rng, 4 if name in ("title", "panel_caption", "visual_style", "reason", "moral") else 12)
+    if typ == "integer":
+        return 180 if name == "duration_sec" else rng.randint(1, 10)
+    if typ == "number":
+        return round(rng.random(), 2)
+    if typ == "boolean":
+        return name != "triggered"
+    return None
+
+
+class FakeModel:
+    def __init__(self, model_name: str, settings: FakeSettings):
+        self.model_name = model_name
+        self.settings = settings
+        self._rng = random.Random(settings.seed)
+
+    # --- behaviour shared by sync/async/stream ---------------------------------
+    def _plan(self) -> tuple[float, Optional[Exception], bool]:
+        """(latency, error to raise, hang) for one call."""
+        s, rng = self.settings, self._rng
+        latency = sample_latency(s.latency, rng)
+        roll = rng.random()
+        if roll < s.rate_429:
+            return latency, FakeProviderError(429, "fake: 429 resource exhausted"), False
+        roll -= s.rate_429
+        if roll < s.rate_5xx:
+            return latency, FakeProviderError(503, "fake: 503 service unavailable"), False
+        roll -= s.rate_5xx
+        return latency, None, roll < s.rate_timeout
+
+    def _body(self, generation_config: Optional[dict]) -> str:
+        s, rng = self.settings, self._rng
+        schema = (generation_config or {}).get("response_schema")
+        if not schema:
+            return _sentence(rng, 14)
+        text = json.dumps(fake_value(schema, rng), ensure_ascii=False)
+        if rng.random() < s.rate_malformed:
+            if rng.random() < 0.5:
+                text = text[: max(1, int(len(text) * rng.uniform(0.5, 0.9)))]
+            else:
+                text = text[:-1] + ",}" if text.endswith("}") else text
+        if rng.random() < s.rate_fenced:
+            text = f"```json\n{text}\n```"
+        return text
+
+    @staticmethod
+    def _chunks(text: str, n: int = 8) -> List[str]:
+        step = max(1, len(text) // n)
+        return [text[i:i + step] for i in range(0, len(text), step)]
+
+    # --- GenerativeModel API -----------------------------------------------------
+    def generate_content(self, contents: Any, generation_config: Optional[dict] = None, stream: bool = False, **_: Any):
+        latency, err, hang = self._plan()
+        body = self._body(generation_config)
+        if not stream:
+            time.sleep(self.settings.hang_s if hang else latency)
+            if err is not None:
+                raise err
+            return _Response(body)
+        # Time to first token is ~30% of the call; the rest is spread over the chunks.
+        time.sleep(self.settings.hang_s if hang else latency * 0.3)
+        if err is not None:
+            raise err
+        return self._stream(body, latency * 0.7)
+
+    def _stream(self, body: str, remaining_s: float) -> Iterator[_Response]:
+        parts = self._chunks(body)
+        for i, part in enumerate(parts):
+            if i:
+                time.sleep(remaining_s / len(parts))
+            yield _Response(part)
+
+    async def generate_content_async(self, contents: Any, generation_config: Optional[dict] = None, **_: Any):
+        latency, err, hang = self._plan()
+        body = self._body(generation_config)
+        await asyncio.sleep(self.settings.hang_s if hang else latency)
+        if err is not None:
+            raise err
+        return _Response(body)
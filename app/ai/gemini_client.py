@@ -1,145 +1,84 @@
 from __future__ import annotations
+import asyncio
 import json
 import logging
 import random
 import threading
 import time
+import weakref
 from dataclasses import dataclass, field
-from typing import Any, Optional, Dict
-import google.generativeai as genai
+from typing import Any, Callable, Dict, Iterator, Optional
 
 from flask import current_app
 
 from .exceptions import (
-    AIConfigError, AIRateLimitError, AITimeoutError, AIUnavailableError, AIStructuredOutputError, AISafetyError
+    AIConfigError, AIRateLimitError, AITimeoutError, AIUnavailableError, AIStructuredOutputError, AISafetyError,
+    AIOverloadedError, AICancelledError,
 )
+from .executor import get_call_executor, executor_stats
+from .breaker import get_breaker_registry
+from .hedging import get_latency_tracker, latency_key
+from .deadline import Deadline
+from app.utils import metrics
+from .concurrency import get_concurrency_limiter, limiter_stats
+from .providers import get_provider
+from .json_repair import FieldTextStream, JSONRepairError, tolerant_loads
+from .image_prep import prepare_image
+from .text_analysis import TextLike, analyze_text
 from .schemas import (
     EmotionAnalysis, JournalSummary, MeditationPlan, CulturalStory as StorySchema,
     ResiliencePrompts as PromptsSchema, QAAnswer, PeerModeration, CrisisSignal, ComicScript,
-    JournalInsightsUnified, normalize_insights
+    JournalInsightsUnified, ModeratedAnswer, normalize_insights, EMOTION_KEY_ORDER, gemini_schema, validate_output
 )
 from . import safety
 from .prompt_library import (
     SYSTEM_STYLE, DISCLAIMER, PROMPT_EMOTION_ANALYSIS, PROMPT_JOURNAL_SUMMARY, PROMPT_MEDITATION_PLAN,
     PROMPT_CULTURAL_STORY, PROMPT_RESILIENCE_PROMPTS, PROMPT_QA_SIMPLE_LANGUAGE, PROMPT_PEER_MODERATION,
     PROMPT_EXAM_COPILOT_SNACKS, PROMPT_MUSIC_RATIONALE, PROMPT_VISION_DESCRIBE, PROMPT_ART_ABSTRACT,
-    PROMPT_COMIC_SCRIPT, PROMPT_COMIC_SCRIPT_SHORT
+    PROMPT_COMIC_SCRIPT, PROMPT_COMIC_SCRIPT_SHORT, PROMPT_MODERATED_QA, template_version
 )
+from .cache import get_response_cache, make_cache_key, cache_stats
+from .singleflight import get_singleflight, flight_key, singleflight_stats
 
 from app.logging_config import log_extra_safe
 import json
 logger = logging.getLogger("sahai.ai")
 
 
-@dataclass
-class _BreakerState:
-    failures: int = 0
-    state: str = "closed"  # closed|open|half_open
-    next_try_at: float = 0.0
-    last_log_at: float = 0.0
-    cooldown_s: int = 0
-    half_open_token: bool = True  # only one probe allowed
 
 
-class _CircuitBreakerRegistry:
-    def __init__(self):
-        self._states: Dict[str, _BreakerState] = {}
-
-    def _get(self, key: str) -> _BreakerState:
-        st = self._states.get(key)
-        if not st:
-            st = _BreakerState()
-            self._states[key] = st
-        return st
-
-    def allow(self, key: str, *, log_rate_limit_s: int) -> bool:
-        st = self._get(key)
-        now = time.time()
-        if st.state == "closed":
-            return True
-        if st.state == "open":
-            if now >= st.next_try_at:
-                # transition to half-open
-                st.state = "half_open"
-                st.half_open_token = True
-                return True
-            # deny; rate-limited log
-            if now - st.last_log_at > log_rate_limit_s:
-                log_extra_safe(logger, "warning", "ai_breaker_open", extra={"key": key, "cooldown_s": int(st.next_try_at - now)})
-                st.last_log_at = now
-            return False
-        if st.state == "half_open":
-            if st.half_open_token:
-                st.half_open_token = False
-                return True
-            return False
-        return True
-
-    def record_success(self, key: str):
-        st = self._get(key)
-        st.failures = 0
-        st.state = "closed"
-        st.next_try_at = 0.0
-        st.cooldown_s = 0
-        st.half_open_token = True
-
-    def record_failure(self, key: str, *, reason: str, cfg: Any):
-        st = self._get(key)
-        qualifying = {"timeout", "rate_limit", "server_error", "network"}
-        if reason not in qualifying:
-            # Non-qualifying failures do not increment breaker counters; still leave state as-is.
-            return
-        st.failures += 1
-        thresh = cfg.get("AI_BREAKER_FAILURE_THRESHOLD", 3)
-        base_cd = cfg.get("AI_BREAKER_BASE_COOLDOWN_S", 30)
-        max_cd = cfg.get("AI_BREAKER_MAX_COOLDOWN_S", 120)
-        log_rl = cfg.get("AI_LOG_RATE_LIMIT_S", 60)
-        now = time.time()
-        if st.state == "half_open":
-            # failed qualifying probe -> exponential backoff increase
-            st.cooldown_s = min(max_cd, max(base_cd, (st.cooldown_s or base_cd) * 2))
-            st.state = "open"
-            st.next_try_at = now + st.cooldown_s + random.randint(0, 5)
-            if now - st.last_log_at > log_rl:
-                log_extra_safe(logger, "warning", "ai_breaker_reopen", extra={"key": key, "reason": reason, "cooldown_s": st.cooldown_s})
-                st.last_log_at = now
-            return
-        if st.failures >= thresh and st.state != "open":
-            # initial open
-            st.cooldown_s = min(max_cd, base_cd + random.randint(0, (max_cd - base_cd)))
-            st.state = "open"
-            st.next_try_at = now + st.cooldown_s
-            if now - st.last_log_at > log_rl:
-                log_extra_safe(logger, "warning", "ai_breaker_open", extra={"key": key, "reason": reason, "cooldown_s": st.cooldown_s})
-                st.last_log_at = now
-
-    def cooldown_left(self, key: str) -> int:
-        st = self._get(key)
-        if st.state != "open":
-            return 0
-        import time as _t
-        return max(0, int(st.next_try_at - _t.time()))
-
-    def reset(self, key: str) -> None:
-        st = self._get(key)
-        st.failures = 0
-        st.state = "closed"
-        st.next_try_at = 0.0
-        st.cooldown_s = 0
-        st.half_open_token = True
-        
-_breaker_registry = _CircuitBreakerRegistry()
-
-
-class GeminiClient:
-    """Robust Gemini wrapper with redaction, retries and structured output.
+@dataclass(frozen=True)
+class _TaskCall:
+    """One provider round trip for a task method (prompt + schema + post-processing).
 
-    Missing/invalid API key raises AIConfigError (callers surface the error; no synthetic content is generated).
+    Built once by the shared ``_*_call`` helpers so the sync and async clients send
+    identical prompts and validate identically.
     """
+    key: str
+    contents: Any
+    schema_cls: Optional[type] = None  # pydantic model; None => plain text
+    label: str = ""
+    timeout_override: Optional[int] = None
+    short_prompt: bool = False
+    finish: Optional[Callable[[Any], Any]] = None
+    # Set only for non-personal tasks built from enumerable inputs (see app.ai.cache).
+    cache_inputs: Optional[Dict[str, Any]] = None
+    template_version: str = ""
+    # Property whose text is shown while a structured call streams (see FieldTextStream).
+    stream_field: Optional[str] = None
+
+    @property
+    def task(self) -> str:
+        return self.key.rsplit(":", 1)[-1]
+
+
+class _GeminiBase:
+    """Config, provider setup, prompt building and parsing shared by both clients."""
 
     def __init__(self):
+        self.provider = get_provider()
         self.api_key = current_app.config.get("GEMINI_API_KEY", "")
-        if not self.api_key:
+        if not self.api_key and self.provider.requires_api_key:
             raise AIConfigError("GEMINI_API_KEY not configured.")
         self.text_model_name = current_app.config.get("GEMINI_TEXT_MODEL", "gemini-2.5-flash")
         self.vision_model_name = current_app.config.get("GEMINI_VISION_MODEL", "gemini-1.5-pro-vision")
@@ -154,58 +93,317 @@ class GeminiClient:
         self.brk_half_interval = int(current_app.config.get("AI_BREAKER_HALF_OPEN_INTERVAL_S", 10))
         self.log_rate_limit = int(current_app.config.get("AI_LOG_RATE_LIMIT_S", 60))
 
-        self._genai = None
         self._text_model = None
         self._vision_model = None
-        self._init_provider()
+        self._model_lock = threading.Lock()
+        self._init_provider(lazy_vision=bool(current_app.config.get("AI_VISION_LAZY_INIT", True)))
+
+    def _init_provider(self, *, lazy_vision: bool):
+        """Configure the backend and build the text model (see app.ai.providers); vision on demand."""
+        self.provider.configure(self.api_key)
+        self._text_model = self.provider.build_model(self.text_model_name)
+        if not lazy_vision:
+            self._vision_model = self.provider.build_model(self.vision_model_name)
+
+    def _get_vision_model(self):
+        # Built in the caller's thread (app context available), not inside the executor.
+        if self._vision_model is None:
+            with self._model_lock:
+                if self._vision_model is None:
+                    self._vision_model = self.provider.build_model(self.vision_model_name)
+        return self._vision_model
+
+    @staticmethod
+    def _generation_config(json_schema: Optional[dict]) -> Optional[dict]:
+        if not json_schema:
+            return None
+        return {"response_mime_type": "application/json", "response_schema": json_schema}
+
+    def _backoff_s(self, attempt: int) -> float:
+        return min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1))) + random.uniform(0, 0.2)
+
+    def _cache_lookup(self, call: _TaskCall) -> tuple[Optional[str], Any, Optional[str]]:
+        """Return (cache_key, value, tier) for cacheable calls; tier is None on a miss."""
+        if call.cache_inputs is None:
+            return None, None, None
+        cache = get_response_cache()
+        if cache is None or cache.ttl_for(call.task) <= 0:
+            return None, None, None
+        ck = make_cache_key(call.task, self.text_model_name, call.template_version, call.cache_inputs)
+        start = time.time()
+        tier, value = cache.get(ck)
+        if tier is not None:
+            log_extra_safe(
+                logger, "info", "ai_call_ok",
+                extra={
+                    "dur_s": round(time.time() - start, 4),
+                    "attempt": 0,
+                    "retries": 0,
+                    "structured": call.schema_cls is not None,
+                    "key": call.key,
+                    "short_prompt": call.short_prompt,
+                    "cache_hit": True,
+                    "cache_tier": tier,
+                }
+            )
+        return ck, value, tier
 
-    def _init_provider(self):
-        try:
-            import google.generativeai as genai  # type: ignore
-        except Exception as exc:  # pragma: no cover
-            raise AIConfigError("google-generativeai not installed") from exc
+    def _cache_store(self, call: _TaskCall, cache_key: Optional[str], data: Any) -> None:
+        if cache_key is None:
+            return
+        cache = get_response_cache()
+        if cache is not None:
+            cache.set(cache_key, call.task, data)
+
+    def _finish(self, call: _TaskCall, data: Any) -> Any:
+        """Validate provider output against the call's schema and apply post-processing."""
+        obj = data
+        if call.schema_cls is not None:
+            try:
+                obj = validate_output(call.schema_cls, data)
+            except Exception as e:
+                raise AIStructuredOutputError(f"Invalid {call.label or call.schema_cls.__name__}: {e}")
+        return call.finish(obj) if call.finish else obj
+
+    def _classify_exception(self, exc: Exception) -> str:
+        # Attempt to map provider exceptions. Keep generic.
+        code = getattr(exc, "status_code", None)
+        msg = str(exc).lower()
+        if code in (401, 403) or "api key" in msg:
+            return "config"
+        if code and 400 <= code < 500 and code not in (429, 408):
+            # treat 4xx (except rate/timeout) as safety/content issues
+            return "safety"
+        if code == 429:
+            return "rate_limit"
+        if isinstance(exc, AITimeoutError):
+            return "timeout"
+        if code and code >= 500:
+            return "server_error"
+        if "timeout" in msg:
+            return "timeout"
+        if any(w in msg for w in ["dns", "network", "connection"]):
+            return "network"
+        return "unknown"
 
+    # --- JSON repair ---------------------------------------------------------
+    def _parse_json_with_repair(self, raw: str, target_schema: Optional[dict]):
+        """Parse model JSON, completing truncated output where the schema allows (see app.ai.json_repair).
+
+        We never log raw content (privacy), only the names of the repairs applied.
+        On failure we raise AIStructuredOutputError.
+        """
+        from .exceptions import AIStructuredOutputError
         try:
-            genai.configure(api_key=self.api_key)
-            self._genai = genai
-            self._text_model = genai.GenerativeModel(self.text_model_name)
-            self._vision_model = genai.GenerativeModel(self.vision_model_name)
-        except Exception as exc:  # pragma: no cover
-            raise AIConfigError(f"Failed to initialize Gemini models: {exc}") from exc
+            data, repairs = tolerant_loads(raw, target_schema)
+        except JSONRepairError as exc:
+            metrics.inc("ai_json_parse_total", outcome="failed")
+            raise AIStructuredOutputError("Could not parse structured JSON output") from exc
+        if not repairs:
+            metrics.inc("ai_json_parse_total", outcome="clean")
+            return data
+        metrics.inc("ai_json_parse_total", outcome="repaired")
+        for repair in repairs:
+            metrics.inc("ai_json_repairs_total", repair=repair)
+        log_extra_safe(logger, "info", "ai_json_repaired", extra={"repairs": repairs, "len": len(raw or "")})
+        return data
+
+    # --- Task call builders (shared by sync + async clients) -----------------
+    def _analyze_emotions_call(self, text: TextLike, language: str, short_prompt: bool) -> _TaskCall:
+        truncated = analyze_text(text).head(800 if short_prompt else 1600)
+        prompt = SYSTEM_STYLE + PROMPT_EMOTION_ANALYSIS.format(disclaimer=DISCLAIMER, language=language, content=truncated)
+        return _TaskCall(
+            key=f"{self.text_model_name}:text:analyze_emotions", contents=prompt,
+            schema_cls=EmotionAnalysis, timeout_override=60, short_prompt=short_prompt,
+        )
 
-    def _with_timeout(self, func, *args, timeout=None, **kwargs):
-        """Run func in a thread with a watchdog timeout."""
-        join_timeout = timeout or getattr(self, "timeout", 60)
-        print(f"[DEBUG:_with_timeout] starting func={getattr(func, '__name__', str(func))}, "
-            f"timeout={join_timeout}, args={args}, kwargs={kwargs}")
+    def _summarize_journal_call(self, text: TextLike, language: str, short_prompt: bool) -> _TaskCall:
+        truncated = analyze_text(text).head(800 if short_prompt else 1600)
+        prompt = SYSTEM_STYLE + PROMPT_JOURNAL_SUMMARY.format(disclaimer=DISCLAIMER, language=language, content=truncated)
+        return _TaskCall(
+            key=f"{self.text_model_name}:text:summarize_journal", contents=prompt,
+            schema_cls=JournalSummary, timeout_override=60, short_prompt=short_prompt,
+        )
 
-        result = {"done": False, "value": None, "error": None}
+    def _journal_insights_call(self, text: TextLike, language: str, timeout_override: int, short_prompt: bool) -> _TaskCall:
+        from .prompt_library import PROMPT_JOURNAL_INSIGHTS_UNIFIED, PROMPT_JOURNAL_INSIGHTS_UNIFIED_SHORT
+        truncated = analyze_text(text).head(1500)
+        tmpl = PROMPT_JOURNAL_INSIGHTS_UNIFIED_SHORT if short_prompt else PROMPT_JOURNAL_INSIGHTS_UNIFIED
+        prompt = tmpl.format(disclaimer=DISCLAIMER, language=language, entry=truncated)
+        return _TaskCall(
+            key=f"{self.text_model_name}:text:journal_insights_unified", contents=prompt,
+            schema_cls=JournalInsightsUnified, timeout_override=timeout_override, short_prompt=short_prompt,
+            # Light normalization (no invention)
+            finish=normalize_insights,
+        )
 
-        def target():
-            try:
-                print(f"[DEBUG:_with_timeout] >>> thread started for {func.__name__}")
-                result["value"] = func(*args, **kwargs)
-                result["done"] = True
-                print(f"[DEBUG:_with_timeout] <<< thread finished successfully for {func.__name__}")
-            except Exception as e:
-                result["error"] = e
-                print(f"[DEBUG:_with_timeout] !!! thread raised exception in {func.__name__}: {e}")
+    def _meditation_call(self, emotions: list[str], duration_hint: int, language: str) -> _TaskCall:
+        prompt = SYSTEM_STYLE + PROMPT_MEDITATION_PLAN.format(
+            disclaimer=DISCLAIMER, emotions=emotions, duration_sec=duration_hint, language=language
+        )
+        labels = sorted({(e or "").strip().lower() for e in emotions})
+        cacheable = bool(labels) and all(l in EMOTION_KEY_ORDER for l in labels)
+        return _TaskCall(
+            key=f"{self.text_model_name}:text:generate_meditation", contents=prompt, schema_cls=MeditationPlan,
+            stream_field="steps",
+            cache_inputs={"emotions": labels, "duration": int(duration_hint), "language": language} if cacheable else None,
+            template_version=template_version(PROMPT_MEDITATION_PLAN),
+        )
+
+    def _cultural_story_call(self, theme: str, language: str) -> _TaskCall:
+        prompt = SYSTEM_STYLE + PROMPT_CULTURAL_STORY.format(disclaimer=DISCLAIMER, theme=theme, language=language)
+        return _TaskCall(
+            key=f"{self.text_model_name}:text:tell_cultural_story", contents=json.dumps(prompt),
+            schema_cls=StorySchema, label="CulturalStory", stream_field="story",
+            cache_inputs={"theme": theme.strip().lower(), "language": language},
+            template_version=template_version(PROMPT_CULTURAL_STORY),
+        )
+
+    def _resilience_prompts_call(self, context: TextLike, language: str) -> _TaskCall:
+        masked = analyze_text(context).masked
+        prompt = SYSTEM_STYLE + PROMPT_RESILIENCE_PROMPTS.format(disclaimer=DISCLAIMER, context=masked, language=language)
+        return _TaskCall(
+            key=f"{self.text_model_name}:text:make_resilience_prompts", contents=prompt,
+            schema_cls=PromptsSchema, label="ResiliencePrompts",
+        )
+
+    def _answer_question_call(self, question: TextLike, language: str) -> _TaskCall:
+        masked = analyze_text(question).masked
+        prompt = SYSTEM_STYLE + PROMPT_QA_SIMPLE_LANGUAGE.format(disclaimer=DISCLAIMER, language=language, question=masked)
+        return _TaskCall(
+            key=f"{self.text_model_name}:text:answer_question_simple", contents=prompt, schema_cls=QAAnswer,
+            stream_field="answer",
+        )
+
+    def _moderate_peer_post_call(self, text: TextLike, language: str) -> _TaskCall:
+        masked = analyze_text(text).masked
+        prompt = PROMPT_PEER_MODERATION.format(text=masked)
+        return _TaskCall(key=f"{self.text_model_name}:text:moderate_peer_post", contents=prompt, schema_cls=PeerModeration)
+
+    def _moderated_answer_call(self, question: TextLike, language: str) -> _TaskCall:
+        masked = analyze_text(question).masked
+        prompt = SYSTEM_STYLE + PROMPT_MODERATED_QA.format(disclaimer=DISCLAIMER, language=language, question=masked)
+        return _TaskCall(
+            key=f"{self.text_model_name}:text:moderate_and_answer", contents=prompt, schema_cls=ModeratedAnswer,
+            finish=lambda obj: obj.split(),
+        )
+
+    def _exam_snack_call(self, mode: str, duration_min: int, language: str) -> _TaskCall:
+        prompt = SYSTEM_STYLE + PROMPT_EXAM_COPILOT_SNACKS.format(disclaimer=DISCLAIMER, mode=mode, duration_min=duration_min, language=language)
+        return _TaskCall(
+            key=f"{self.text_model_name}:text:exam_snack", contents=prompt,
+            schema_cls=QAAnswer, label="QAAnswer (exam)",
+            cache_inputs={"mode": mode, "duration": int(duration_min), "language": language},
+            template_version=template_version(PROMPT_EXAM_COPILOT_SNACKS),
+        )
+
+    def _comic_script_call(self, situation: TextLike, language: str, short_prompt: bool) -> _TaskCall:
+        masked = analyze_text(situation).masked
+        tmpl = PROMPT_COMIC_SCRIPT_SHORT if short_prompt else PROMPT_COMIC_SCRIPT
+        prompt = SYSTEM_STYLE + tmpl.format(disclaimer=DISCLAIMER, situation=masked, language=language)
+        return _TaskCall(
+            key=f"{self.text_model_name}:text:generate_comic_script", contents=prompt,
+            schema_cls=ComicScript, short_prompt=short_prompt,
+        )
+
+    def _music_rationale_call(self, mood: str, language: str) -> _TaskCall:
+        if not mood:
+            raise ValueError("mood required")
+        prompt = SYSTEM_STYLE + PROMPT_MUSIC_RATIONALE.format(disclaimer=DISCLAIMER, language=language, mood=mood)
+        return _TaskCall(
+            key=f"{self.text_model_name}:text:music_rationale", contents=prompt,
+            finish=lambda data: safety.apply_response_safety(str(data).strip()),
+            cache_inputs={"mood": mood.strip().lower(), "language": language},
+            template_version=template_version(PROMPT_MUSIC_RATIONALE),
+        )
+
+    def _art_prompt_call(self, mood: str, language: str) -> _TaskCall:
+        if not mood:
+            raise ValueError("mood required")
+        prompt = SYSTEM_STYLE + PROMPT_ART_ABSTRACT.format(disclaimer=DISCLAIMER, mood=mood, language=language)
+        return _TaskCall(
+            key=f"{self.text_model_name}:text:generate_art_prompt", contents=prompt,
+            finish=lambda data: str(data).strip().replace("\n", " ")[:200],
+            # Art moods may be free text (e.g. a journal summary): cache only plain mood labels
+            # (tasks.generate_art_prompt maps free text to a label when the local lexicon is confident).
+            cache_inputs={"mood": mood.strip().lower(), "language": language}
+            if mood.strip().lower() in EMOTION_KEY_ORDER else None,
+            template_version=template_version(PROMPT_ART_ABSTRACT),
+        )
+
+    def _vision_contents(self, image_bytes: bytes, language: str) -> list:
+        # Build the text instruction prompt
+        prompt = SYSTEM_STYLE + PROMPT_VISION_DESCRIBE.format(
+            disclaimer=DISCLAIMER,
+            language=language
+        )
+        image = prepare_image(image_bytes)
+        return [
+            {"mime_type": image.mime, "data": image.data},
+            prompt
+        ]
+
+    # --- Heuristic crisis detection -----------------------------------------
+    def detect_crisis_ai(self, text: TextLike) -> CrisisSignal:
+        return analyze_text(text).crisis
+
+    # --- Health -------------------------------------------------------------
+    def health_probe(self) -> dict:
+        """Non-invasive status probe (no user text)."""
+        try:
+            # We do not call the model (cost & latency); rely on breaker state & config presence.
+            ok = (bool(self.api_key) or not self.provider.requires_api_key) and self._text_model is not None
+            return {
+                "ok": ok,
+                "meta": {
+                    "provider": self.provider.name,
+                    "text_model": self.text_model_name,
+                    "vision_ready": self._vision_model is not None,
+                    "timeout_s": self.timeout,
+                    "retries": self.max_retries,
+                    "executor": executor_stats(),
+                    "cache": cache_stats(),
+                    "singleflight": singleflight_stats(),
+                    "breakers": get_breaker_registry().snapshot(),
+                    "limiter": limiter_stats(),
+                },
+            }
+        except Exception:  # pragma: no cover
+            return {"ok": False, "meta": {}}
 
-        th = threading.Thread(target=target, daemon=True)
-        th.start()
-        th.join(join_timeout)
 
-        if not result["done"]:
-            print(f"[DEBUG:_with_timeout] TIMED OUT waiting {join_timeout}s for {func.__name__}")
-            raise AITimeoutError("AI request timed out")
+class GeminiClient(_GeminiBase):
+    """Robust Gemini wrapper with redaction, retries and structured output.
 
-        if result["error"]:
-            print(f"[DEBUG:_with_timeout] ERROR bubbled up from {func.__name__}: {result['error']}")
-            raise result["error"]
+    Missing/invalid API key raises AIConfigError (callers surface the error; no synthetic content is generated).
+    """
 
-        print(f"[DEBUG:_with_timeout] returning result from {func.__name__}")
-        return result["value"]
+    def _with_timeout(self, func, *args, timeout=None, **kwargs):
+        """Run func on the shared bounded executor with a watchdog timeout.
 
+        Raises AITimeoutError on timeout (the call is abandoned, not leaked past the pool cap)
+        and AIOverloadedError when the executor is already full.
+        """
+        join_timeout = timeout or getattr(self, "timeout", 60)
+        return get_call_executor().run(func, *args, timeout=join_timeout, **kwargs)
+
+    def _limited(self, key: str, deadline: Optional[Deadline], func, *args, timeout=None, **kwargs):
+        """_with_timeout behind the adaptive per-key concurrency limit (see app.ai.concurrency)."""
+        limiter = get_concurrency_limiter()
+        if limiter is None:
+            return self._with_timeout(func, *args, timeout=timeout, **kwargs)
+        limiter.acquire(key, timeout=deadline.remaining() if deadline is not None else None)
+        start = time.time()
+        outcome = "error"
+        try:
+            resp = self._with_timeout(func, *args, timeout=timeout, **kwargs)
+            outcome = "ok"
+            return resp
+        except Exception as exc:
+            outcome = self._classify_exception(exc)
+            raise
+        finally:
+            limiter.release(key, outcome, time.time() - start)
 
     def _call_model(
         self,
@@ -215,15 +413,51 @@ class GeminiClient:
         json_schema: Optional[dict] = None,
         vision: bool = False,
         timeout_override: Optional[int] = None,
-        short_prompt: bool = False
+        short_prompt: bool = False,
+        deadline: Optional[Deadline] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Any:
+        """Coalesce identical concurrent calls (see app.ai.singleflight), then call the provider.
+
+        Cancellable calls (hedge legs) are not coalesced: cancelling one must not fail followers.
+        """
+        kwargs = dict(
+            key=key, contents=contents, json_schema=json_schema, vision=vision,
+            timeout_override=timeout_override, short_prompt=short_prompt, deadline=deadline, cancel=cancel,
+        )
+        sf = get_singleflight()
+        if sf is None or cancel is not None:
+            return self._call_model_direct(**kwargs)
+        client_timeout = timeout_override or getattr(self, "timeout", 60)
+        wait_timeout = self.max_retries * (client_timeout + self.backoff_max + 1)
+        if deadline is not None:
+            wait_timeout = min(wait_timeout, deadline.remaining())
+        return sf.do(
+            flight_key(key, contents, json_schema),
+            lambda: self._call_model_direct(**kwargs),
+            wait_timeout=wait_timeout,
+        )
+
+    def _call_model_direct(
+        self,
+        *,
+        key: str,
+        contents: str,
+        json_schema: Optional[dict] = None,
+        vision: bool = False,
+        timeout_override: Optional[int] = None,
+        short_prompt: bool = False,
+        deadline: Optional[Deadline] = None,
+        cancel: Optional[threading.Event] = None,
     ) -> Any:
         # Debug: input arguments
         print(f"[DEBUG:_call_model] key={key}, vision={vision}, json_schema={bool(json_schema)}, "
             f"timeout_override={timeout_override}, short_prompt={short_prompt}")
 
-        if not _breaker_registry.allow(key, log_rate_limit_s=self.log_rate_limit):
-            cd = _breaker_registry.cooldown_left(key)
+        if not get_breaker_registry().allow(key, log_rate_limit_s=self.log_rate_limit, half_open_interval_s=self.brk_half_interval):
+            cd = get_breaker_registry().cooldown_left(key)
             print(f"[DEBUG:_call_model] breaker OPEN for key={key}, cooldown={cd}s")
+            metrics.inc("ai_breaker_open_total", key=key)
             raise AIUnavailableError(f"breaker_open:{cd}")
 
         last_err = None
@@ -231,8 +465,14 @@ class GeminiClient:
         print(f"[DEBUG:_call_model] using client_timeout={client_timeout}")
 
         for attempt in range(1, self.max_retries + 1):
+            if cancel is not None and cancel.is_set():
+                raise AICancelledError("AI call cancelled")
             start = time.time()
             print(f"[DEBUG:_call_model] attempt={attempt}/{self.max_retries}, key={key}")
+            attempt_timeout = client_timeout
+            if deadline is not None:
+                # Raises AITimeoutError when not even a minimal attempt fits in the request budget.
+                attempt_timeout = deadline.trim(client_timeout)
 
             try:
                 if vision:
@@ -240,29 +480,30 @@ class GeminiClient:
 
                 if json_schema:
                     print(f"[DEBUG:_call_model] calling generate_content with JSON schema...")
-                    resp = self._with_timeout(
+                    resp = self._limited(
+                        key, deadline,
                         self._text_model.generate_content,
                         contents,
-                        generation_config={
-                            "response_mime_type": "application/json",
-                            "response_schema": json_schema,
-                        },
-                        timeout=client_timeout,
+                        generation_config=self._generation_config(json_schema),
+                        timeout=attempt_timeout,
                     )
                     raw = resp.text or "{}"
                     print(f"[DEBUG:_call_model] raw JSON response length={len(raw)}")
                     data = self._parse_json_with_repair(raw, target_schema=json_schema)
                 else:
                     print(f"[DEBUG:_call_model] calling generate_content (plain text)...")
-                    resp = self._with_timeout(
+                    resp = self._limited(
+                        key, deadline,
                         self._text_model.generate_content,
                         contents,
-                        timeout=client_timeout,
+                        timeout=attempt_timeout,
                     )
                     data = resp.text or ""
                     print(f"[DEBUG:_call_model] plain response length={len(data)}")
 
                 dur = round(time.time() - start, 3)
+                get_latency_tracker().record(latency_key(key, short_prompt), dur)
+                metrics.observe("ai_call_duration_seconds", dur, key=key, attempt=attempt, outcome="ok")
                 print(f"[DEBUG:_call_model] SUCCESS key={key}, duration={dur}s, attempt={attempt}")
                 log_extra_safe(
                     logger, "info", "ai_call_ok",
@@ -275,282 +516,429 @@ class GeminiClient:
                         "short_prompt": short_prompt,
                     }
                 )
-                _breaker_registry.record_success(key)
+                get_breaker_registry().record_success(key)
                 return data
 
+            except AIOverloadedError:
+                # Local capacity, not a provider failure: fail fast, leave breaker alone.
+                raise
             except Exception as exc:  # pragma: no cover
                 last_err = exc
                 reason = self._classify_exception(exc)
                 print(f"[DEBUG:_call_model] ERROR on attempt={attempt}, key={key}, reason={reason}, exc={exc}")
+                metrics.observe("ai_call_duration_seconds", time.time() - start, key=key, attempt=attempt, outcome=reason)
 
                 if reason == "config":
                     raise AIConfigError(str(exc)) from exc
                 if reason == "safety":
                     raise AISafetyError(str(exc)) from exc
                 if reason == "rate_limit" and attempt == self.max_retries:
-                    _breaker_registry.record_failure(key, reason=reason, cfg=current_app.config)
+                    get_breaker_registry().record_failure(key, reason=reason, cfg=current_app.config)
                     log_extra_safe(
                         logger, "warning", "ai_call_fail",
                         extra={"reason": reason, "attempt": attempt, "final": True, "key": key}
                     )
                     raise AIRateLimitError("AI rate limited") from exc
 
-                _breaker_registry.record_failure(key, reason=reason, cfg=current_app.config)
+                get_breaker_registry().record_failure(key, reason=reason, cfg=current_app.config)
                 log_extra_safe(
                     logger, "warning", "ai_call_retry",
                     extra={"reason": reason, "attempt": attempt, "will_retry": attempt < self.max_retries, "key": key}
                 )
+                if attempt == self.max_retries:
+                    break  # no backoff after the last attempt
+                metrics.inc("ai_retries_total", key=key, reason=reason)
 
-                sleep_s = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1))) + random.uniform(0, 0.2)
+                sleep_s = self._backoff_s(attempt)
+                if deadline is not None and not deadline.can_afford(sleep_s):
+                    log_extra_safe(
+                        logger, "warning", "ai_call_budget_exhausted",
+                        extra={"key": key, "attempt": attempt, "remaining_s": round(deadline.remaining(), 3)}
+                    )
+                    break
                 print(f"[DEBUG:_call_model] sleeping {sleep_s:.2f}s before retry...")
-                time.sleep(sleep_s)
+                if cancel is None:
+                    time.sleep(sleep_s)
+                elif cancel.wait(sleep_s):
+                    raise AICancelledError("AI call cancelled") from exc
 
         print(f"[DEBUG:_call_model] FAILED after {self.max_retries} attempts, key={key}, last_err={last_err}")
         raise AIUnavailableError(str(last_err) if last_err else "AI unavailable")
 
+    def _run(self, call: _TaskCall, deadline: Optional[Deadline] = None, cancel: Optional[threading.Event] = None) -> Any:
+        cache_key, cached, tier = self._cache_lookup(call)
+        if tier is not None:
+            return self._finish(call, cached)
+        schema = gemini_schema(call.schema_cls) if call.schema_cls is not None else None
+        data = self._call_model(
+            key=call.key,
+            contents=call.contents,
+            json_schema=schema,
+            timeout_override=call.timeout_override,
+            short_prompt=call.short_prompt,
+            deadline=deadline,
+            cancel=cancel,
+        )
+        result = self._finish(call, data)
+        self._cache_store(call, cache_key, data)
+        return result
+
+    # --- Streaming ------------------------------------------------------------
+    def _stream_model(self, *, key: str, contents: Any, json_schema: Optional[dict] = None,
+                      timeout_override: Optional[int] = None, deadline: Optional[Deadline] = None) -> Iterator[str]:
+        """Yield text chunks from the SDK's ``stream=True`` mode.
+
+        Single attempt (tokens already sent cannot be retried); each chunk read is bounded by the
+        client timeout on the shared executor, and by what is left of ``deadline``. Breaker
+        bookkeeping matches _call_model.
+        """
+        breaker = get_breaker_registry()
+        if not breaker.allow(key, log_rate_limit_s=self.log_rate_limit, half_open_interval_s=self.brk_half_interval):
+            metrics.inc("ai_breaker_open_total", key=key)
+            raise AIUnavailableError(f"breaker_open:{breaker.cooldown_left(key)}")
+        client_timeout = timeout_override or getattr(self, "timeout", 60)
+        if deadline is not None:
+            client_timeout = deadline.trim(client_timeout)
+        start = time.time()
+        first_chunk_s = None
+        try:
+            kwargs: Dict[str, Any] = {"stream": True}
+            if json_schema:
+                kwargs["generation_config"] = self._generation_config(json_schema)
+            resp = self._with_timeout(self._text_model.generate_content, contents, timeout=client_timeout, **kwargs)
+            chunks = iter(resp)
+            while True:
+                read_timeout = client_timeout if deadline is None else min(client_timeout, deadline.remaining())
+                chunk = self._with_timeout(next, chunks, None, timeout=read_timeout)
+                if chunk is None:
+                    break
+                text = getattr(chunk, "text", "") or ""
+                if text:
+                    if first_chunk_s is None:
+                        first_chunk_s = round(time.time() - start, 3)
+                    yield text
+        except (AIOverloadedError, GeneratorExit):
+            raise
+        except Exception as exc:  # pragma: no cover
+            reason = self._classify_exception(exc)
+            if reason == "config":
+                raise AIConfigError(str(exc)) from exc
+            if reason == "safety":
+                raise AISafetyError(str(exc)) from exc
+            breaker.record_failure(key, reason=reason, cfg=current_app.config)
+            metrics.observe("ai_call_duration_seconds", time.time() - start, key=key, attempt=1, outcome=reason)
+            log_extra_safe(logger, "warning", "ai_call_fail", extra={"reason": reason, "attempt": 1, "final": True, "key": key, "mode": "stream"})
+            if isinstance(exc, AITimeoutError):
+                raise
+            raise AIUnavailableError(str(exc)) from exc
+        dur = round(time.time() - start, 3)
+        get_latency_tracker().record(latency_key(key), dur)
+        metrics.observe("ai_call_duration_seconds", dur, key=key, attempt=1, outcome="ok")
+        log_extra_safe(
+            logger, "info", "ai_call_ok",
+            extra={"dur_s": dur, "ttfb_s": first_chunk_s, "attempt": 1, "retries": 0,
+                   "structured": bool(json_schema), "key": key, "short_prompt": False, "mode": "stream"}
+        )
+        breaker.record_success(key)
 
-    def _classify_exception(self, exc: Exception) -> str:
-        # Attempt to map provider exceptions. Keep generic.
-        code = getattr(exc, "status_code", None)
-        msg = str(exc).lower()
-        if code in (401, 403) or "api key" in msg:
-            return "config"
-        if code and 400 <= code < 500 and code not in (429, 408):
-            # treat 4xx (except rate/timeout) as safety/content issues
-            return "safety"
-        if code == 429:
-            return "rate_limit"
-        if isinstance(exc, AITimeoutError):
-            return "timeout"
-        if code and code >= 500:
-            return "server_error"
-        if "timeout" in msg:
-            return "timeout"
-        if any(w in msg for w in ["dns", "network", "connection"]):
-            return "network"
-        return "unknown"
-
-    # --- JSON repair ---------------------------------------------------------
-    def _parse_json_with_repair(self, raw: str, target_schema: Optional[dict]):
-        """Attempt to parse JSON; strip fences and repair minor issues.
+    def stream(self, call: _TaskCall, deadline: Optional[Deadline] = None) -> Iterator[tuple[str, Any]]:
+        """Yield ("token", text) events as the model writes, then one ("final", validated_object).
 
-        We never log raw content (privacy). On failure we raise AIStructuredOutputError.
+        For structured calls the tokens are the decoded text of ``call.stream_field`` only, never
+        raw JSON; without a stream field nothing is previewed until the final event.
         """
-        from .exceptions import AIStructuredOutputError
-        txt = raw.strip()
-        # Remove markdown fences / code blocks
-        if txt.startswith("```"):
-            # Strip code fences (```json ... ```)
-            lines = [l for l in txt.splitlines() if not l.strip().startswith("```")]
-            txt = "\n".join(lines).strip()
-        # Common: model adds leading text before JSON
-        first_brace = txt.find("{")
-        if first_brace > 0:
-            txt = txt[first_brace:]
-        # First attempt
-        try:
-            return json.loads(txt)
-        except Exception:
-            pass
-        # Lightweight repairs
-        repaired = txt
-        # Remove trailing commas before } or ]
-        import re as _re
-        repaired = _re.sub(r",\s*(\}|\])", r"\1", repaired)
-        # Replace single quotes with double quotes only if double quotes scarce
-        if repaired.count('"') < 2 and repaired.count("'") >= 2:
-            repaired = repaired.replace("'", '"')
-        try:
-            return json.loads(repaired)
-        except Exception as exc:
-            raise AIStructuredOutputError("Could not parse structured JSON output") from exc
+        cache_key, cached, tier = self._cache_lookup(call)
+        if tier is not None:
+            yield "final", self._finish(call, cached)
+            return
+        schema = gemini_schema(call.schema_cls) if call.schema_cls is not None else None
+        prose = FieldTextStream(call.stream_field) if schema and call.stream_field else None
+        parts: list[str] = []
+        for text in self._stream_model(key=call.key, contents=call.contents, json_schema=schema,
+                                       timeout_override=call.timeout_override, deadline=deadline):
+            parts.append(text)
+            shown = text if schema is None else (prose.feed(text) if prose is not None else "")
+            if shown:
+                yield "token", shown
+        raw = "".join(parts)
+        data = self._parse_json_with_repair(raw or "{}", target_schema=schema) if schema else raw
+        result = self._finish(call, data)
+        self._cache_store(call, cache_key, data)
+        yield "final", result
+
+    def stream_cultural_story(self, theme: str, language: str) -> Iterator[tuple[str, Any]]:
+        return self.stream(self._cultural_story_call(theme, language))
+
+    def stream_meditation(self, emotions: list[str], duration_hint: int, language: str) -> Iterator[tuple[str, Any]]:
+        return self.stream(self._meditation_call(emotions, duration_hint, language))
+
+    def stream_answer_question(self, question: TextLike, language: str, *, deadline: Optional[Deadline] = None) -> Iterator[tuple[str, Any]]:
+        return self.stream(self._answer_question_call(question, language), deadline)
 
     # --- Structured JSON outputs --------------------------------------------
-    def analyze_emotions(self, text: str, language: str, *, short_prompt: bool = False) -> EmotionAnalysis:
-        masked, _ = safety.redact_pii(text)
-        truncated = masked[:800] if short_prompt else masked[:1600]
-        prompt = SYSTEM_STYLE + PROMPT_EMOTION_ANALYSIS.format(disclaimer=DISCLAIMER, language=language, content=truncated)
-        key = f"{self.text_model_name}:text:analyze_emotions"
-        data = self._call_model(key=key, contents=prompt, json_schema=EmotionAnalysis.as_schema(), timeout_override=60, short_prompt=short_prompt)
-        try:
-            return EmotionAnalysis.model_validate(data)
-        except Exception as e:
-            raise AIStructuredOutputError(f"Invalid EmotionAnalysis: {e}")
+    def analyze_emotions(self, text: TextLike, language: str, *, short_prompt: bool = False, deadline: Optional[Deadline] = None) -> EmotionAnalysis:
+        return self._run(self._analyze_emotions_call(text, language, short_prompt), deadline)
 
-    def summarize_journal(self, text: str, language: str, store_raw: bool, *, short_prompt: bool = False) -> JournalSummary:
-        masked, _ = safety.redact_pii(text)
-        truncated = masked[:800] if short_prompt else masked[:1600]
-        prompt = SYSTEM_STYLE + PROMPT_JOURNAL_SUMMARY.format(disclaimer=DISCLAIMER, language=language, content=truncated)
-        key = f"{self.text_model_name}:text:summarize_journal"
-        data = self._call_model(key=key, contents=prompt, json_schema=JournalSummary.as_schema(), timeout_override=60, short_prompt=short_prompt)
-        try:
-            return JournalSummary.model_validate(data)
-        except Exception as e:
-            raise AIStructuredOutputError(f"Invalid JournalSummary: {e}")
+    def summarize_journal(self, text: TextLike, language: str, store_raw: bool, *, short_prompt: bool = False, deadline: Optional[Deadline] = None) -> JournalSummary:
+        return self._run(self._summarize_journal_call(text, language, short_prompt), deadline)
 
     # Unified insights (single structured call). No synthetic fallback here.
-    def journal_insights_unified(self, text: str, language: str, *, timeout_override: int = 60, short_prompt: bool = False) -> JournalInsightsUnified:
-        from .prompt_library import PROMPT_JOURNAL_INSIGHTS_UNIFIED, PROMPT_JOURNAL_INSIGHTS_UNIFIED_SHORT
-        masked, _ = safety.redact_pii(text)
-        truncated = masked[:1500]
-        tmpl = PROMPT_JOURNAL_INSIGHTS_UNIFIED_SHORT if short_prompt else PROMPT_JOURNAL_INSIGHTS_UNIFIED
-        prompt = tmpl.format(disclaimer=DISCLAIMER, language=language, entry=truncated)
-        key = f"{self.text_model_name}:text:journal_insights_unified"
-        data = self._call_model(
-            key=key,
-            contents=prompt,
-            json_schema=JournalInsightsUnified.as_schema(),
-            timeout_override=timeout_override,
-            short_prompt=short_prompt,
-        )
-        try:
-            model_obj = JournalInsightsUnified.model_validate(data)
-        except Exception as e:
-            raise AIStructuredOutputError(f"Invalid JournalInsightsUnified: {e}")
-        # Light normalization (no invention)
-        return normalize_insights(model_obj)
+    def journal_insights_unified(self, text: TextLike, language: str, *, timeout_override: int = 60, short_prompt: bool = False, deadline: Optional[Deadline] = None, cancel: Optional[threading.Event] = None) -> JournalInsightsUnified:
+        return self._run(self._journal_insights_call(text, language, timeout_override, short_prompt), deadline, cancel)
 
-    def generate_meditation(self, emotions: list[str], duration_hint: int, language: str) -> MeditationPlan:
-        prompt = SYSTEM_STYLE + PROMPT_MEDITATION_PLAN.format(
-            disclaimer=DISCLAIMER, emotions=emotions, duration_sec=duration_hint, language=language
-        )
-        key = f"{self.text_model_name}:text:generate_meditation"
-        data = self._call_model(key=key, contents=prompt, json_schema=MeditationPlan.as_schema())
-        try:
-            return MeditationPlan.model_validate(data)
-        except Exception as e:
-            raise AIStructuredOutputError(f"Invalid MeditationPlan: {e}")
+    def generate_meditation(self, emotions: list[str], duration_hint: int, language: str, *, deadline: Optional[Deadline] = None) -> MeditationPlan:
+        return self._run(self._meditation_call(emotions, duration_hint, language), deadline)
 
-    def tell_cultural_story(self, theme: str, language: str) -> StorySchema:
-        prompt = SYSTEM_STYLE + PROMPT_CULTURAL_STORY.format(disclaimer=DISCLAIMER, theme=theme, language=language)
-        key = f"{self.text_model_name}:text:tell_cultural_story"
-        data = self._call_model(key=key, contents=json.dumps(prompt), json_schema=StorySchema.as_schema())
-        try:
-            return StorySchema.model_validate(data)
-        except Exception as e:
-            raise AIStructuredOutputError(f"Invalid CulturalStory: {e}")
+    def tell_cultural_story(self, theme: str, language: str, *, deadline: Optional[Deadline] = None) -> StorySchema:
+        return self._run(self._cultural_story_call(theme, language), deadline)
 
-    def make_resilience_prompts(self, context: str, language: str) -> PromptsSchema:
-        masked, _ = safety.redact_pii(context or "")
-        prompt = SYSTEM_STYLE + PROMPT_RESILIENCE_PROMPTS.format(disclaimer=DISCLAIMER, context=masked, language=language)
-        key = f"{self.text_model_name}:text:make_resilience_prompts"
-        data = self._call_model(key=key, contents=prompt, json_schema=PromptsSchema.as_schema())
-        try:
-            return PromptsSchema.model_validate(data)
-        except Exception as e:
-            raise AIStructuredOutputError(f"Invalid ResiliencePrompts: {e}")
+    def make_resilience_prompts(self, context: TextLike, language: str, *, deadline: Optional[Deadline] = None) -> PromptsSchema:
+        return self._run(self._resilience_prompts_call(context, language), deadline)
 
-    def answer_question_simple(self, question: str, language: str) -> QAAnswer:
-        masked, _ = safety.redact_pii(question)
-        prompt = SYSTEM_STYLE + PROMPT_QA_SIMPLE_LANGUAGE.format(disclaimer=DISCLAIMER, language=language, question=masked)
-        key = f"{self.text_model_name}:text:answer_question_simple"
-        data = self._call_model(key=key, contents=prompt, json_schema=QAAnswer.as_schema())
-        try:
-            return QAAnswer.model_validate(data)
-        except Exception as e:
-            raise AIStructuredOutputError(f"Invalid QAAnswer: {e}")
+    def answer_question_simple(self, question: TextLike, language: str, *, deadline: Optional[Deadline] = None) -> QAAnswer:
+        return self._run(self._answer_question_call(question, language), deadline)
 
-    def moderate_peer_post(self, text: str, language: str) -> PeerModeration:
-        masked, _ = safety.redact_pii(text)
-        prompt = PROMPT_PEER_MODERATION.format(text=masked)
-        key = f"{self.text_model_name}:text:moderate_peer_post"
-        data = self._call_model(key=key, contents=prompt, json_schema=PeerModeration.as_schema())
-        try:
-            return PeerModeration.model_validate(data)
-        except Exception as e:
-            raise AIStructuredOutputError(f"Invalid PeerModeration: {e}")
+    def moderate_peer_post(self, text: TextLike, language: str, *, deadline: Optional[Deadline] = None) -> PeerModeration:
+        return self._run(self._moderate_peer_post_call(text, language), deadline)
 
-    def exam_snack(self, mode: str, duration_min: int, language: str) -> QAAnswer:
-        prompt = SYSTEM_STYLE + PROMPT_EXAM_COPILOT_SNACKS.format(disclaimer=DISCLAIMER, mode=mode, duration_min=duration_min, language=language)
-        key = f"{self.text_model_name}:text:exam_snack"
-        data = self._call_model(key=key, contents=prompt, json_schema=QAAnswer.as_schema())
-        try:
-            return QAAnswer.model_validate(data)
-        except Exception as e:
-            raise AIStructuredOutputError(f"Invalid QAAnswer (exam): {e}")
+    def moderate_and_answer(self, question: TextLike, language: str, *, deadline: Optional[Deadline] = None) -> tuple[PeerModeration, Optional[QAAnswer]]:
+        return self._run(self._moderated_answer_call(question, language), deadline)
 
-    def generate_comic_script(self, situation: str, language: str, *, short_prompt: bool = False) -> ComicScript:
-        masked, _ = safety.redact_pii(situation)
-        tmpl = PROMPT_COMIC_SCRIPT_SHORT if short_prompt else PROMPT_COMIC_SCRIPT
-        prompt = SYSTEM_STYLE + tmpl.format(disclaimer=DISCLAIMER, situation=masked, language=language)
-        key = f"{self.text_model_name}:text:generate_comic_script"
-        data = self._call_model(key=key, contents=prompt, json_schema=ComicScript.as_schema(), short_prompt=short_prompt)
-        try:
-            return ComicScript.model_validate(data)
-        except Exception as e:
-            raise AIStructuredOutputError(f"Invalid ComicScript: {e}")
+    def exam_snack(self, mode: str, duration_min: int, language: str, *, deadline: Optional[Deadline] = None) -> QAAnswer:
+        return self._run(self._exam_snack_call(mode, duration_min, language), deadline)
+
+    def generate_comic_script(self, situation: TextLike, language: str, *, short_prompt: bool = False, deadline: Optional[Deadline] = None, cancel: Optional[threading.Event] = None) -> ComicScript:
+        return self._run(self._comic_script_call(situation, language, short_prompt), deadline, cancel)
 
     # --- Plain text outputs --------------------------------------------------
-    def music_rationale(self, mood: str, language: str) -> str:
-        if not mood:
-            raise ValueError("mood required")
-        prompt = SYSTEM_STYLE + PROMPT_MUSIC_RATIONALE.format(disclaimer=DISCLAIMER, language=language, mood=mood)
-        key = f"{self.text_model_name}:text:music_rationale"
-        data = self._call_model(key=key, contents=prompt)
-        txt = safety.apply_response_safety(str(data).strip())
-        return txt
+    def music_rationale(self, mood: str, language: str, *, deadline: Optional[Deadline] = None) -> str:
+        return self._run(self._music_rationale_call(mood, language), deadline)
 
-    def generate_art_prompt(self, mood: str, language: str) -> str:
-        if not mood:
-            raise ValueError("mood required")
-        prompt = SYSTEM_STYLE + PROMPT_ART_ABSTRACT.format(disclaimer=DISCLAIMER, mood=mood, language=language)
-        key = f"{self.text_model_name}:text:generate_art_prompt"
-        data = self._call_model(key=key, contents=prompt)
-        return str(data).strip().replace("\n", " ")[:200]
+    def generate_art_prompt(self, mood: str, language: str, *, deadline: Optional[Deadline] = None) -> str:
+        return self._run(self._art_prompt_call(mood, language), deadline)
 
     def vision_describe_image(self, image_bytes: bytes, language: str) -> str:
         try:
-            # Build the text instruction prompt
-            prompt = SYSTEM_STYLE + PROMPT_VISION_DESCRIBE.format(
-                disclaimer=DISCLAIMER,
-                language=language
-            )
-
             # Call Gemini vision model directly with image + prompt
             resp = self._with_timeout(
-                self._vision_model.generate_content,
-                [
-                    {"mime_type": "image/png", "data": image_bytes},
-                    prompt
-                ]
+                self._get_vision_model().generate_content,
+                self._vision_contents(image_bytes, language),
             )
 
             txt = str(resp.text or "").strip()
             return safety.apply_response_safety(txt)
 
+        except AIOverloadedError:
+            raise
         except Exception as exc:  # pragma: no cover
             logger.error("vision_describe_error", exc_info=False)
             raise AIUnavailableError(f"Vision describe failed: {exc}")
 
 
-    # --- Heuristic crisis detection -----------------------------------------
-    def detect_crisis_ai(self, text: str) -> CrisisSignal:
-        return safety.detect_crisis(text)
+class AsyncGeminiClient(_GeminiBase):
+    """asyncio twin of GeminiClient.
 
-    # --- Health -------------------------------------------------------------
-    def health_probe(self) -> dict:
-        """Non-invasive status probe (no user text)."""
+    Uses the SDK's ``generate_content_async`` with ``asyncio.wait_for`` deadlines, so an
+    in-flight call parks a coroutine instead of a worker thread. Task methods mirror
+    GeminiClient one-to-one and share its breaker registry, prompts, validation and the route
+    ``Deadline`` (attempt timeouts trimmed, retries skipped when the budget cannot cover them).
+
+    Not applied here: the AIMD concurrency limiter, the bounded call executor and single-flight
+    coalescing. They are thread-based and would block the event loop; async callers bound their
+    own concurrency (e.g. an ``asyncio.Semaphore``) and identical prompts are not coalesced.
+    """
+
+    async def _call_model(
+        self,
+        *,
+        key: str,
+        contents: Any,
+        json_schema: Optional[dict] = None,
+        timeout_override: Optional[int] = None,
+        short_prompt: bool = False,
+        deadline: Optional[Deadline] = None,
+    ) -> Any:
+        if not get_breaker_registry().allow(key, log_rate_limit_s=self.log_rate_limit, half_open_interval_s=self.brk_half_interval):
+            cd = get_breaker_registry().cooldown_left(key)
+            metrics.inc("ai_breaker_open_total", key=key)
+            raise AIUnavailableError(f"breaker_open:{cd}")
+
+        last_err = None
+        client_timeout = timeout_override or getattr(self, "timeout", 60)
+
+        for attempt in range(1, self.max_retries + 1):
+            attempt_timeout = client_timeout if deadline is None else deadline.trim(client_timeout)
+            start = time.time()
+            try:
+                kwargs = {}
+                if json_schema:
+                    kwargs["generation_config"] = self._generation_config(json_schema)
+                try:
+                    resp = await asyncio.wait_for(
+                        self._text_model.generate_content_async(contents, **kwargs),
+                        timeout=attempt_timeout,
+                    )
+                except asyncio.TimeoutError as exc:
+                    raise AITimeoutError("AI request timed out") from exc
+
+                if json_schema:
+                    data = self._parse_json_with_repair(resp.text or "{}", target_schema=json_schema)
+                else:
+                    data = resp.text or ""
+
+                dur = round(time.time() - start, 3)
+                get_latency_tracker().record(latency_key(key, short_prompt), dur)
+                metrics.observe("ai_call_duration_seconds", dur, key=key, attempt=attempt, outcome="ok")
+                log_extra_safe(
+                    logger, "info", "ai_call_ok",
+                    extra={
+                        "dur_s": dur,
+                        "attempt": attempt,
+                        "retries": attempt - 1,
+                        "structured": bool(json_schema),
+                        "key": key,
+                        "short_prompt": short_prompt,
+                        "mode": "async",
+                    }
+                )
+                get_breaker_registry().record_success(key)
+                return data
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # pragma: no cover
+                last_err = exc
+                reason = self._classify_exception(exc)
+                metrics.observe("ai_call_duration_seconds", time.time() - start, key=key, attempt=attempt, outcome=reason)
+
+                if reason == "config":
+                    raise AIConfigError(str(exc)) from exc
+                if reason == "safety":
+                    raise AISafetyError(str(exc)) from exc
+                if reason == "rate_limit" and attempt == self.max_retries:
+                    get_breaker_registry().record_failure(key, reason=reason, cfg=current_app.config)
+                    log_extra_safe(
+                        logger, "warning", "ai_call_fail",
+                        extra={"reason": reason, "attempt": attempt, "final": True, "key": key, "mode": "async"}
+                    )
+                    raise AIRateLimitError("AI rate limited") from exc
+
+                get_breaker_registry().record_failure(key, reason=reason, cfg=current_app.config)
+                log_extra_safe(
+                    logger, "warning", "ai_call_retry",
+                    extra={"reason": reason, "attempt": attempt, "will_retry": attempt < self.max_retries, "key": key, "mode": "async"}
+                )
+                if attempt == self.max_retries:
+                    break  # no backoff after the last attempt
+                metrics.inc("ai_retries_total", key=key, reason=reason)
+                sleep_s = self._backoff_s(attempt)
+                if deadline is not None and not deadline.can_afford(sleep_s):
+                    log_extra_safe(
+                        logger, "warning", "ai_call_budget_exhausted",
+                        extra={"key": key, "attempt": attempt, "remaining_s": round(deadline.remaining(), 3), "mode": "async"}
+                    )
+                    break
+                await asyncio.sleep(sleep_s)
+
+        raise AIUnavailableError(str(last_err) if last_err else "AI unavailable")
+
+    async def _run(self, call: _TaskCall, deadline: Optional[Deadline] = None) -> Any:
+        cache_key, cached, tier = self._cache_lookup(call)
+        if tier is not None:
+            return self._finish(call, cached)
+        schema = gemini_schema(call.schema_cls) if call.schema_cls is not None else None
+        data = await self._call_model(
+            key=call.key,
+            contents=call.contents,
+            json_schema=schema,
+            timeout_override=call.timeout_override,
+            short_prompt=call.short_prompt,
+            deadline=deadline,
+        )
+        result = self._finish(call, data)
+        self._cache_store(call, cache_key, data)
+        return result
+
+    # --- Structured JSON outputs --------------------------------------------
+    async def analyze_emotions(self, text: TextLike, language: str, *, short_prompt: bool = False, deadline: Optional[Deadline] = None) -> EmotionAnalysis:
+        return await self._run(self._analyze_emotions_call(text, language, short_prompt), deadline)
+
+    async def summarize_journal(self, text: TextLike, language: str, store_raw: bool, *, short_prompt: bool = False, deadline: Optional[Deadline] = None) -> JournalSummary:
+        return await self._run(self._summarize_journal_call(text, language, short_prompt), deadline)
+
+    async def journal_insights_unified(self, text: TextLike, language: str, *, timeout_override: int = 60, short_prompt: bool = False, deadline: Optional[Deadline] = None) -> JournalInsightsUnified:
+        return await self._run(self._journal_insights_call(text, language, timeout_override, short_prompt), deadline)
+
+    async def generate_meditation(self, emotions: list[str], duration_hint: int, language: str, *, deadline: Optional[Deadline] = None) -> MeditationPlan:
+        return await self._run(self._meditation_call(emotions, duration_hint, language), deadline)
+
+    async def tell_cultural_story(self, theme: str, language: str, *, deadline: Optional[Deadline] = None) -> StorySchema:
+        return await self._run(self._cultural_story_call(theme, language), deadline)
+
+    async def make_resilience_prompts(self, context: TextLike, language: str, *, deadline: Optional[Deadline] = None) -> PromptsSchema:
+        return await self._run(self._resilience_prompts_call(context, language), deadline)
+
+    async def answer_question_simple(self, question: TextLike, language: str, *, deadline: Optional[Deadline] = None) -> QAAnswer:
+        return await self._run(self._answer_question_call(question, language), deadline)
+
+    async def moderate_peer_post(self, text: TextLike, language: str, *, deadline: Optional[Deadline] = None) -> PeerModeration:
+        return await self._run(self._moderate_peer_post_call(text, language), deadline)
+
+    async def moderate_and_answer(self, question: TextLike, language: str, *, deadline: Optional[Deadline] = None) -> tuple[PeerModeration, Optional[QAAnswer]]:
+        return await self._run(self._moderated_answer_call(question, language), deadline)
+
+    async def exam_snack(self, mode: str, duration_min: int, language: str, *, deadline: Optional[Deadline] = None) -> QAAnswer:
+        return await self._run(self._exam_snack_call(mode, duration_min, language), deadline)
+
+    async def generate_comic_script(self, situation: TextLike, language: str, *, short_prompt: bool = False, deadline: Optional[Deadline] = None) -> ComicScript:
+        return await self._run(self._comic_script_call(situation, language, short_prompt), deadline)
+
+    # --- Plain text outputs --------------------------------------------------
+    async def music_rationale(self, mood: str, language: str, *, deadline: Optional[Deadline] = None) -> str:
+        return await self._run(self._music_rationale_call(mood, language), deadline)
+
+    async def generate_art_prompt(self, mood: str, language: str, *, deadline: Optional[Deadline] = None) -> str:
+        return await self._run(self._art_prompt_call(mood, language), deadline)
+
+    async def vision_describe_image(self, image_bytes: bytes, language: str) -> str:
         try:
-            # We do not call the model (cost & latency); rely on breaker state & config presence.
-            ok = bool(self.api_key) and self._text_model is not None
-            return {
-                "ok": ok,
-                "meta": {
-                    "text_model": self.text_model_name,
-                    "timeout_s": self.timeout,
-                    "retries": self.max_retries,
-                },
-            }
-        except Exception:  # pragma: no cover
-            return {"ok": False, "meta": {}}
+            resp = await asyncio.wait_for(
+                self._get_vision_model().generate_content_async(self._vision_contents(image_bytes, language)),
+                timeout=self.timeout,
+            )
+            txt = str(resp.text or "").strip()
+            return safety.apply_response_safety(txt)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # pragma: no cover
+            logger.error("vision_describe_error", exc_info=False)
+            raise AIUnavailableError(f"Vision describe failed: {exc}")
 
 
 _client_singleton: Optional[GeminiClient] = None
+_client_lock = threading.Lock()
+# SDK async transports are bound to the event loop that created them, so keep one client per loop.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncGeminiClient]" = weakref.WeakKeyDictionary()
 
 
 def get_ai_client() -> GeminiClient:
-    global _client_singleton
+    """Process-wide client, built on first use (or by app.ai.lifecycle.warmup_ai_client).
 
+    Dropped in forked children (see app.ai.lifecycle), so each worker configures its own transport.
+    """
+    global _client_singleton
     if _client_singleton is None:
-        _client_singleton = GeminiClient()
+        with _client_lock:
+            if _client_singleton is None:
+                _client_singleton = GeminiClient()
     return _client_singleton
+
+
+def get_async_ai_client() -> AsyncGeminiClient:
+    """Return the AsyncGeminiClient for the running event loop (call from a coroutine)."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncGeminiClient()
+        _async_clients[loop] = client
+    return client
@@ -0,0 +1,163 @@
+"""Hedged requests for tasks that have a cheaper fallback prompt.
+
+Instead of waiting for the full-prompt call to fail (up to retries x timeout) before trying the
+short prompt, start the short prompt once the full call is slower than the task's recent
+full-prompt ``AI_HEDGE_PERCENTILE`` latency, and take whichever valid result arrives first.
+
+Each leg gets its own cancel ``threading.Event``, which the client checks before every attempt
+and every backoff sleep. The loser is cancelled as soon as the winner returns: if it is still
+queued it never starts, otherwise it stops after the attempt already in flight (whose result is
+discarded) instead of running its whole retry loop. Besides the winner's calls, a hedge costs
+at most that one in-flight attempt.
+
+Latencies are tracked per task and prompt size (``latency_key``), so short-prompt calls do not
+pull the full prompt's hedge delay down.
+"""
+from __future__ import annotations
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Optional, Tuple, Type
+
+from flask import current_app
+
+from app.logging_config import get_logger, log_extra_safe
+
+if TYPE_CHECKING:
+    from .deadline import Deadline
+
+log = get_logger("sahai.ai.hedging")
+
+_MIN_SAMPLES = 20
+
+
+class LatencyTracker:
+    """Rolling window of successful call durations per task."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, task: str, dur_s: float) -> None:
+        with self._lock:
+            dq = self._samples.get(task)
+            if dq is None:
+                dq = self._samples[task] = deque(maxlen=self.window)
+            dq.append(float(dur_s))
+
+    def percentile(self, task: str, q: float) -> Optional[float]:
+        with self._lock:
+            dq = self._samples.get(task)
+            if not dq or len(dq) < _MIN_SAMPLES:
+                return None
+            ordered = sorted(dq)
+        idx = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+        return ordered[idx]
+
+
+def latency_key(key: str, short_prompt: bool = False) -> str:
+    """Tracker key for a breaker key (``model:kind:task``): the task, short prompts kept apart."""
+    task = key.rsplit(":", 1)[-1]
+    return f"{task}:short" if short_prompt else task
+
+
+_tracker = LatencyTracker()
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_latency_tracker() -> LatencyTracker:
+    return _tracker
+
+
+def _hedge_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                size = 2 * int(current_app.config.get("AI_EXECUTOR_MAX_WORKERS", 16))
+                _pool = ThreadPoolExecutor(max_workers=size, thread_name_prefix="ai-hedge")
+    return _pool
+
+
+def hedging_enabled() -> bool:
+    return bool(current_app.config.get("AI_HEDGE_ENABLED", False))
+
+
+def hedge_delay_s(task: str) -> float:
+    """Seconds to wait on the primary call before starting the backup."""
+    cfg = current_app.config
+    observed = _tracker.percentile(task, float(cfg.get("AI_HEDGE_PERCENTILE", 0.95)))
+    delay = observed if observed is not None else float(cfg.get("AI_HEDGE_DEFAULT_DELAY_S", 8.0))
+    return max(float(cfg.get("AI_HEDGE_MIN_DELAY_S", 2.0)), delay)
+
+
+def run_hedged(
+    primary: Callable[[threading.Event], Any],
+    backup: Callable[[threading.Event], Any],
+    *,
+    delay_s: float,
+    retry_on: Tuple[Type[BaseException], ...],
+    task: str = "",
+    deadline: Optional["Deadline"] = None,
+) -> Any:
+    """Run ``primary``; start ``backup`` after ``delay_s`` or as soon as primary fails with ``retry_on``.
+
+    Each callable receives its leg's cancel event and must pass it on to the client call.
+    Returns the first successful result. Errors outside ``retry_on`` from the primary propagate
+    immediately (same as the sequential path); if both calls fail the backup's error is raised.
+    With a ``deadline``, the backup is only started while the budget still fits an attempt.
+    """
+    app = current_app._get_current_object()
+    cancels = {"primary": threading.Event(), "backup": threading.Event()}
+
+    def _in_app(fn, leg: str):
+        def runner():
+            with app.app_context():
+                return fn(cancels[leg])
+        return runner
+
+    def _cancel(futures) -> None:
+        for other in futures:
+            other.cancel()
+            cancels["backup" if other is f_backup else "primary"].set()
+
+    pool = _hedge_pool()
+    f_backup: Optional[Future] = None
+    f_primary: Future = pool.submit(_in_app(primary, "primary"))
+    done, _ = wait([f_primary], timeout=delay_s)
+    if done:
+        exc = f_primary.exception()
+        if exc is None:
+            return f_primary.result()
+        if not isinstance(exc, retry_on):
+            raise exc
+        if deadline is not None and not deadline.can_afford():
+            raise exc
+        # Primary failed fast: plain sequential fallback.
+        return backup(cancels["backup"])
+
+    if deadline is not None and not deadline.can_afford():
+        return f_primary.result()
+
+    log_extra_safe(log, "info", "ai_hedge_fire", extra={"task": task, "delay_s": round(delay_s, 3)})
+    f_backup = pool.submit(_in_app(backup, "backup"))
+    pending = {f_primary, f_backup}
+    last_exc: Optional[BaseException] = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        # Prefer the backup when both land together: it is the fresher attempt.
+        for fut in sorted(done, key=lambda f: f is not f_backup):
+            exc = fut.exception()
+            if exc is None:
+                _cancel(pending)
+                winner = "backup" if fut is f_backup else "primary"
+                log_extra_safe(log, "info", "ai_hedge_win", extra={"task": task, "winner": winner})
+                return fut.result()
+            if fut is f_primary and not isinstance(exc, retry_on):
+                _cancel(pending)
+                raise exc
+            if last_exc is None or fut is f_backup:
+                last_exc = exc
+    raise last_exc  # type: ignore[misc]
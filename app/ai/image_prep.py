@@ -0,0 +1,171 @@
+"""Image preprocessing before vision calls.
+
+Doodles arrive as canvas exports, often far larger than the vision model uses (Gemini tiles
+images at ~768px), and were always labelled ``image/png`` even when they were JPEGs.
+``prepare_image``:
+
+1. sniffs the real MIME type from magic bytes (PNG, JPEG, GIF, WEBP);
+2. with Pillow installed: applies EXIF orientation, downsizes so the longest edge is at most
+   ``AI_VISION_MAX_EDGE``, and re-encodes to ``AI_VISION_FORMAT`` (webp or jpeg; transparent
+   canvases are flattened onto white). Re-encoding never copies EXIF/ICC/text chunks, so
+   metadata is stripped. The original is kept when it is already smaller and carries no metadata;
+   a downsized image is always used, even if a few bytes larger (pixels, not bytes, drive tokens);
+3. caches the result by content hash (in-process LRU of ``AI_VISION_CACHE_SIZE`` entries), so a
+   retried or repeated doodle is not decoded twice.
+
+Pillow is in requirements.txt. If it is missing anyway, the bytes are sent unchanged (metadata
+included) with the sniffed MIME type, and a warning is logged once per process.
+"""
+from __future__ import annotations
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from flask import current_app
+
+from app.logging_config import get_logger, log_extra_safe
+from app.utils import metrics
+
+try:  # listed in requirements.txt; guarded so a broken install degrades instead of crashing
+    from PIL import Image, ImageOps  # type: ignore
+except Exception:  # pragma: no cover
+    Image = None
+    ImageOps = None
+
+log = get_logger("sahai.ai.image_prep")
+_warned_no_pillow = False
+
+_MAGIC = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+_FORMATS = {"webp": ("WEBP", "image/webp"), "jpeg": ("JPEG", "image/jpeg")}
+
+
+def sniff_mime(data: bytes) -> Optional[str]:
+    head = data[:16]
+    for magic, mime in _MAGIC:
+        if head.startswith(magic):
+            return mime
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+@dataclass(frozen=True)
+class PreparedImage:
+    data: bytes
+    mime: str
+    original_bytes: int
+    processed: bool   # True when re-encoded by Pillow
+
+
+class _LRU:
+    def __init__(self, capacity: int):
+        self.capacity = max(0, capacity)
+        self._items: "OrderedDict[str, PreparedImage]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[PreparedImage]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+            return item
+
+    def put(self, key: str, item: PreparedImage) -> None:
+        if not self.capacity:
+            return
+        with self._lock:
+            self._items[key] = item
+            self._items.move_to_end(key)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+
+
+_cache: Optional[_LRU] = None
+_cache_lock = threading.Lock()
+
+
+def _get_cache() -> _LRU:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = _LRU(int(current_app.config.get("AI_VISION_CACHE_SIZE", 64)))
+    return _cache
+
+
+def _has_metadata(img) -> bool:
+    return any(k in img.info for k in ("exif", "icc_profile", "xmp", "comment")) or any(
+        isinstance(v, str) for v in img.info.values()  # PNG tEXt / iTXt chunks
+    )
+
+
+def _reencode(data: bytes, max_edge: int, fmt: str, quality: int) -> Optional[PreparedImage]:
+    with Image.open(io.BytesIO(data)) as img:
+        img.load()
+        had_metadata = _has_metadata(img)
+        resized = max(img.size) > max_edge
+        out = ImageOps.exif_transpose(img)
+        if out.mode in ("RGBA", "LA", "P"):
+            rgba = out.convert("RGBA")
+            flat = Image.new("RGB", rgba.size, (255, 255, 255))
+            flat.paste(rgba, mask=rgba.getchannel("A"))
+            out = flat
+        elif out.mode != "RGB":
+            out = out.convert("RGB")
+        if resized:
+            out.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        pil_format, mime = _FORMATS.get(fmt, _FORMATS["webp"])
+        buf = io.BytesIO()
+        try:
+            out.save(buf, format=pil_format, quality=quality, optimize=True)
+        except (OSError, KeyError):  # Pillow built without WEBP support
+            pil_format, mime = _FORMATS["jpeg"]
+            buf = io.BytesIO()
+            out.save(buf, format=pil_format, quality=quality, optimize=True)
+        encoded = buf.getvalue()
+    if len(encoded) >= len(data) and not resized and not had_metadata:
+        return None  # original is already as small and carries nothing to strip
+    return PreparedImage(encoded, mime, len(data), True)
+
+
+def prepare_image(data: bytes) -> PreparedImage:
+    """Vision-ready bytes + MIME type for ``data`` (cached by content hash)."""
+    cfg = current_app.config
+    max_edge = int(cfg.get("AI_VISION_MAX_EDGE", 768))
+    fmt = str(cfg.get("AI_VISION_FORMAT", "webp")).lower()
+    quality = int(cfg.get("AI_VISION_QUALITY", 80))
+    digest = hashlib.sha256(data).hexdigest()
+    key = f"{digest}:{max_edge}:{fmt}:{quality}"
+    cache = _get_cache()
+    result = cache.get(key)
+    if result is None:
+        result = _prepare(data, max_edge, fmt, quality)
+        cache.put(key, result)
+    metrics.inc("ai_vision_bytes_total", result.original_bytes, stage="received")
+    metrics.inc("ai_vision_bytes_total", len(result.data), stage="sent")
+    return result
+
+
+def _prepare(data: bytes, max_edge: int, fmt: str, quality: int) -> PreparedImage:
+    global _warned_no_pillow
+    sniffed = sniff_mime(data)
+    result = None
+    if Image is None and not _warned_no_pillow:
+        _warned_no_pillow = True
+        log_extra_safe(log, "warning", "vision_preprocess_unavailable", extra={"reason": "pillow_missing"})
+    if Image is not None and sniffed is not None:
+        try:
+            result = _reencode(data, max_edge, fmt, quality)
+        except Exception as e:  # undecodable / truncated image: send as-is
+            log_extra_safe(log, "warning", "vision_preprocess_fail", extra={"etype": type(e).__name__, "len": len(data)})
+    if result is None:
+        result = PreparedImage(data, sniffed or "image/png", len(data), False)
+    return result
@@ -0,0 +1,413 @@
+"""Schema-guided tolerant JSON decoder for model output.
+
+Gemini output that hits the token limit stops mid-value; ``json.loads`` rejects it and the task
+pays for a second call. ``tolerant_loads`` parses what is there instead:
+
+- strips Markdown fences, leading prose and trailing text after the top-level value;
+- accepts trailing / missing commas, single-quoted strings and bare (unquoted) keys;
+- at end of input closes the open strings, arrays and objects. A cut-off string property is
+  kept (a truncated summary still validates); a cut-off number / literal, a key without a
+  value, an array element that is a partial scalar, or an array object missing required keys
+  is dropped;
+- coerces values to the schema type where that is lossless ("0.8" -> 0.8, 3.0 -> 3,
+  "true" -> True, 5 -> "5", a lone value -> [value]).
+
+The schema is the cleaned Gemini schema (``gemini_schema(cls)``; ``$ref`` already inlined).
+Pydantic validation still runs afterwards; this only decides what JSON to hand it. Each repair
+is reported by name so callers can log and count them (never the content).
+"""
+from __future__ import annotations
+import json
+import re
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+_MISSING = object()
+_WS = " \t\r\n"
+_SCALAR_RE = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null|True|False|None")
+_NUM_TAIL_RE = re.compile(r"[\d.eE+\-]*\s*")
+_BARE_KEY_RE = re.compile(r"[A-Za-z_][\w\-]*")
+_LITERALS = {"true": True, "false": False, "null": None, "True": True, "False": False, "None": None}
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t", "'": "'"}
+_scanstring = json.decoder.scanstring
+
+
+class JSONRepairError(ValueError):
+    """Nothing usable could be recovered from the text."""
+
+
+class RepairResult(NamedTuple):
+    data: Any
+    repairs: List[str]   # repair names in the order first applied; empty for clean JSON
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.s = text
+        self.n = len(text)
+        self.i = 0
+        self.repairs: List[str] = []
+
+    def note(self, repair: str) -> None:
+        if repair not in self.repairs:
+            self.repairs.append(repair)
+
+    def ws(self) -> None:
+        s, n, i = self.s, self.n, self.i
+        while i < n and s[i] in _WS:
+            i += 1
+        self.i = i
+
+    def value(self, schema: Optional[dict]) -> Tuple[Any, bool]:
+        """(value, complete). value is _MISSING when input ended before a value started."""
+        self.ws()
+        if self.i >= self.n:
+            return _MISSING, False
+        c = self.s[self.i]
+        if c == "{":
+            return self.obj(schema)
+        if c == "[":
+            return self.arr(schema)
+        if c in "\"'":
+            return self.string()
+        return self.scalar()
+
+    def string(self) -> Tuple[str, bool]:
+        q = self.s[self.i]
+        if q == '"':
+            try:
+                val, self.i = _scanstring(self.s, self.i + 1)
+                return val, True
+            except ValueError:
+                pass  # unterminated or bad escape: slow path below
+        else:
+            self.note("single_quotes")
+        s, n = self.s, self.n
+        i = self.i + 1
+        out: List[str] = []
+        while i < n:
+            c = s[i]
+            if c == q:
+                self.i = i + 1
+                return "".join(out), True
+            if c == "\\":
+                if i + 1 >= n:
+                    break
+                e = s[i + 1]
+                if e == "u":
+                    hexpart = s[i + 2:i + 6]
+                    if len(hexpart) < 4:
+                        break
+                    try:
+                        out.append(chr(int(hexpart, 16)))
+                    except ValueError:
+                        out.append(hexpart)
+                    i += 6
+                    continue
+                out.append(_ESCAPES.get(e, e))
+                i += 2
+                continue
+            out.append(c)
+            i += 1
+        self.i = n
+        return "".join(out), False
+
+    def scalar(self) -> Tuple[Any, bool]:
+        m = _SCALAR_RE.match(self.s, self.i)
+        if m is None:
+            if any(lit.startswith(self.s[self.i:].rstrip()) for lit in _LITERALS):
+                self.i = self.n  # partial literal at end of input ("tr")
+                return None, False
+            raise JSONRepairError(f"unexpected character at {self.i}")
+        self.i = m.end()
+        tok = m.group(0)
+        if tok in _LITERALS:
+            if tok[0] in "TFN":
+                self.note("python_literal")
+            return _LITERALS[tok], True
+        num = float(tok) if any(ch in tok for ch in ".eE") else int(tok)
+        # A number running into end of input may have been cut short ("18" of "180", "0." of "0.85").
+        if _NUM_TAIL_RE.fullmatch(self.s, self.i):
+            self.i = self.n
+            return num, False
+        return num, True
+
+    def obj(self, schema: Optional[dict]) -> Tuple[dict, bool]:
+        props = (schema or {}).get("properties") or {}
+        self.i += 1
+        out: dict = {}
+        while True:
+            self.ws()
+            if self.i >= self.n:
+                self.note("closed_object")
+                return out, False
+            c = self.s[self.i]
+            if c == "}":
+                self.i += 1
+                return out, True
+            if c == ",":
+                self.i += 1
+                self.ws()
+                if self.i < self.n and self.s[self.i] == "}":
+                    self.note("trailing_comma")
+                continue
+            if c in "\"'":
+                key, ok = self.string()
+            else:
+                m = _BARE_KEY_RE.match(self.s, self.i)
+                if m is None:
+                    raise JSONRepairError(f"bad object key at {self.i}")
+                self.note("unquoted_key")
+                key, self.i = m.group(0), m.end()
+                ok = self.i < self.n
+            self.ws()
+            if not ok or self.i >= self.n:
+                self.note("dropped_incomplete")
+                self.note("closed_object")
+                return out, False
+            if self.s[self.i] != ":":
+                raise JSONRepairError(f"expected ':' at {self.i}")
+            self.i += 1
+            sub = props.get(key)
+            val, ok = self.value(sub)
+            if ok:
+                out[key] = val
+                continue
+            # Input ended inside this value: keep what still means something, then close.
+            if isinstance(val, str):
+                out[key] = val
+                self.note("closed_string")
+            elif isinstance(val, (dict, list)):
+                out[key] = val
+            else:
+                self.note("dropped_incomplete")
+            self.note("closed_object")
+            return out, False
+
+    def arr(self, schema: Optional[dict]) -> Tuple[list, bool]:
+        items = (schema or {}).get("items")
+        self.i += 1
+        out: list = []
+        while True:
+            self.ws()
+            if self.i >= self.n:
+                self.note("closed_array")
+                return out, False
+            c = self.s[self.i]
+            if c == "]":
+                self.i += 1
+                return out, True
+            if c == ",":
+                self.i += 1
+                self.ws()
+                if self.i < self.n and self.s[self.i] == "]":
+                    self.note("trailing_comma")
+                continue
+            val, ok = self.value(items)
+            if ok:
+                out.append(val)
+                continue
+            # A cut-off element is only kept if it is a container that has its required keys.
+            if isinstance(val, (dict, list)) and _has_required(val, items):
+                out.append(val)
+            elif val is not _MISSING:
+                self.note("dropped_incomplete")
+            self.note("closed_array")
+            return out, False
+
+
+def _has_required(val: Any, schema: Optional[dict]) -> bool:
+    if not isinstance(val, dict):
+        return True
+    return all(k in val for k in (schema or {}).get("required", ()))
+
+
+def _strip_wrapping(txt: str, repairs: List[str]) -> str:
+    txt = txt.strip()
+    if txt.startswith("```"):
+        repairs.append("fence")
+        nl = txt.find("\n")
+        txt = txt[nl + 1:] if nl >= 0 else ""
+        end = txt.rfind("```")
+        if end >= 0:
+            txt = txt[:end]
+        txt = txt.strip()
+    starts = [p for p in (txt.find("{"), txt.find("[")) if p >= 0]
+    start = min(starts) if starts else -1
+    if start > 0:
+        repairs.append("leading_text")
+        txt = txt[start:]
+    return txt
+
+
+def _coerce(val: Any, schema: Optional[dict], repairs: List[str]) -> Any:
+    if not schema:
+        return val
+    if "anyOf" in schema:
+        options = schema["anyOf"]
+        if val is None and any(o.get("type") == "null" for o in options):
+            return None
+        non_null = [o for o in options if o.get("type") != "null"]
+        return _coerce(val, non_null[0], repairs) if non_null else val
+    typ = schema.get("type")
+    if typ == "object":
+        if not isinstance(val, dict):
+            return val
+        props = schema.get("properties") or {}
+        return {k: _coerce(v, props.get(k), repairs) for k, v in val.items()}
+    if typ == "array":
+        if val is None:
+            return val
+        if not isinstance(val, list):
+            _note(repairs, "wrapped_array")
+            val = [val]
+        items = schema.get("items")
+        return [_coerce(v, items, repairs) for v in val] if items else val
+    if typ == "string":
+        if isinstance(val, (int, float)) and not isinstance(val, bool):
+            _note(repairs, "coerced")
+            return str(val)
+        return val
+    if typ in ("number", "integer"):
+        num = val
+        if isinstance(val, str):
+            try:
+                num = float(val.strip().rstrip("%"))
+            except ValueError:
+                return val
+            _note(repairs, "coerced")
+        if typ == "integer" and isinstance(num, float) and num.is_integer():
+            if not isinstance(val, str):
+                _note(repairs, "coerced")
+            return int(num)
+        return num
+    if typ == "boolean":
+        if isinstance(val, str) and val.strip().lower() in ("true", "yes", "false", "no"):
+            _note(repairs, "coerced")
+            return val.strip().lower() in ("true", "yes")
+        if isinstance(val, int) and not isinstance(val, bool) and val in (0, 1):
+            _note(repairs, "coerced")
+            return bool(val)
+    return val
+
+
+def _note(repairs: List[str], repair: str) -> None:
+    if repair not in repairs:
+        repairs.append(repair)
+
+
+def tolerant_loads(raw: str, schema: Optional[dict] = None) -> RepairResult:
+    """Decode model JSON, repairing and completing it as far as ``schema`` allows.
+
+    Raises JSONRepairError when no top-level value can be recovered.
+    """
+    repairs: List[str] = []
+    txt = _strip_wrapping(raw or "", repairs)
+    try:
+        data = json.loads(txt)
+    except ValueError:
+        p = _Parser(txt)
+        try:
+            data, complete = p.value(schema)
+        except (JSONRepairError, ValueError, IndexError) as exc:
+            raise JSONRepairError(str(exc)) from exc
+        if data is _MISSING or (not complete and not isinstance(data, (dict, list))):
+            raise JSONRepairError("no complete top-level value")
+        p.ws()
+        if complete and p.i < p.n:
+            p.note("trailing_text")
+        for r in p.repairs:
+            _note(repairs, r)
+    data = _coerce(data, schema, repairs)
+    return RepairResult(data, repairs)
+
+
+class FieldTextStream:
+    """Pull the prose of one property out of JSON as it streams in, for live previews.
+
+    ``feed(chunk)`` returns the newly decoded text of ``field`` (a string, or a list of strings
+    joined by newlines); keys, quotes, escapes and every other property are never returned.
+    An escape split across chunks is held back until it is complete.
+    """
+
+    def __init__(self, field: str):
+        self._key_re = re.compile(r'"%s"\s*:\s*' % re.escape(field))
+        self._buf = ""
+        self._i = 0
+        self._state = "seek"     # seek -> value -> string [<-> list] -> done
+        self._in_list = False
+        self._items = 0
+
+    def feed(self, chunk: str) -> str:
+        self._buf += chunk or ""
+        out: List[str] = []
+        buf, n = self._buf, len(self._buf)
+        while self._state != "done":
+            if self._state == "seek":
+                m = self._key_re.search(buf)
+                if m is None:
+                    break
+                self._i, self._state = m.end(), "value"
+                continue
+            if self._state in ("value", "list"):
+                while self._i < n and buf[self._i] in _WS + ("," if self._state == "list" else ""):
+                    self._i += 1
+                if self._i >= n:
+                    break
+                ch = buf[self._i]
+                if ch == '"':
+                    self._i += 1
+                    if self._state == "list" and self._items:
+                        out.append("\n")
+                    self._in_list = self._state == "list"
+                    self._state = "string"
+                elif ch == "[" and self._state == "value":
+                    self._i += 1
+                    self._state = "list"
+                else:
+                    self._state = "done"
+                continue
+            # Inside the string value.
+            start = self._i
+            while self._i < n and buf[self._i] not in '"\\':
+                self._i += 1
+            out.append(buf[start:self._i])
+            if self._i >= n:
+                break
+            if buf[self._i] == '"':
+                self._i += 1
+                self._items += 1
+                self._state = "list" if self._in_list else "done"
+                continue
+            decoded, used = self._escape(buf, self._i)
+            if used == 0:
+                break
+            out.append(decoded)
+            self._i += used
+        return "".join(out)
+
+    @staticmethod
+    def _escape(buf: str, i: int) -> Tuple[str, int]:
+        """(text, chars consumed) for the escape at ``buf[i]``; (\"\", 0) if it is still incomplete."""
+        if i + 1 >= len(buf):
+            return "", 0
+        ch = buf[i + 1]
+        if ch != "u":
+            return _ESCAPES.get(ch, ch), 2
+        if i + 6 > len(buf):
+            return "", 0
+        try:
+            code = int(buf[i + 2:i + 6], 16)
+        except ValueError:
+            return "", 6
+        if 0xD800 <= code < 0xDC00:
+            if i + 12 > len(buf):
+                return "", 0
+            if buf[i + 6:i + 8] == "\\u":
+                try:
+                    low = int(buf[i + 8:i + 12], 16)
+                except ValueError:
+                    low = 0
+                if 0xDC00 <= low < 0xE000:
+                    return chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)), 12
+            return "", 6
+        return chr(code), 6
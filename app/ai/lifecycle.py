@@ -0,0 +1,93 @@
+"""Per-process lifecycle of the AI layer: post-fork reset and boot-time warmup.
+
+Everything process-wide in ``app.ai`` is created lazily behind a lock: the clients, the call
+executor and hedge pool, the adaptive limiter, single-flight (its owner id embeds the pid), the
+breaker registry, the response cache, the preprocessed-image cache and the PII redactor. If any of
+these was built before a fork (gunicorn ``--preload``, multiprocessing), the child would inherit
+thread pools without threads, locks possibly held by a thread that no longer exists, and the
+parent's SDK transport. ``reset_process_state`` drops them all (the compiled crisis lexicon is
+kept; only its lock is replaced); it is registered with ``os.register_at_fork`` so every child
+starts clean and rebuilds its own on first use.
+
+``warmup_ai_client`` builds that per-worker state up front so the first request does not pay
+for it. With ``AI_WARMUP_PROBE`` it also makes one tiny provider call to open the transport.
+It is meant for gunicorn's ``post_worker_init`` hook (see gunicorn.conf.py), never the master.
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+import weakref
+
+from flask import Flask
+
+from app.logging_config import get_logger, log_extra_safe
+
+log = get_logger("sahai.ai.lifecycle")
+
+
+def reset_process_state() -> None:
+    """Forget all process-wide AI state (runs in the child right after fork)."""
+    from . import (
+        breaker, cache, concurrency, crisis_lexicon, executor, gemini_client, hedging, image_prep, redaction, singleflight,
+    )
+
+    gemini_client._client_singleton = None
+    gemini_client._client_lock = threading.Lock()
+    gemini_client._async_clients = weakref.WeakKeyDictionary()
+    executor._executor = None
+    executor._executor_lock = threading.Lock()
+    hedging._pool = None
+    hedging._pool_lock = threading.Lock()
+    concurrency._limiter = None
+    concurrency._limiter_lock = threading.Lock()
+    singleflight._singleflight = None
+    singleflight._sf_lock = threading.Lock()
+    breaker._registry = None
+    breaker._registry_lock = threading.Lock()
+    cache._cache = None
+    cache._cache_lock = threading.Lock()
+    image_prep._cache = None
+    image_prep._cache_lock = threading.Lock()
+    crisis_lexicon._holder.lock = threading.Lock()
+    redaction._redactor = None
+    redaction._redactor_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):  # POSIX only
+    os.register_at_fork(after_in_child=reset_process_state)
+
+
+def warmup_ai_client(app: Flask) -> bool:
+    """Build this worker's AI client, executor and schemas; optionally probe the provider.
+
+    Never raises: a failed warmup is logged and the first request retries lazily as before.
+    """
+    if not app.config.get("AI_WARMUP_ENABLED", True):
+        return False
+    from .executor import get_call_executor
+    from .gemini_client import get_ai_client
+    from .schemas import warm_schema_registry
+
+    t0 = time.monotonic()
+    with app.app_context():
+        try:
+            client = get_ai_client()
+            get_call_executor()
+            warm_schema_registry()
+            probed = False
+            if app.config.get("AI_WARMUP_PROBE", False):
+                client._with_timeout(
+                    client._text_model.generate_content, "ping",
+                    generation_config={"max_output_tokens": 1},
+                    timeout=float(app.config.get("AI_WARMUP_TIMEOUT_S", 5)),
+                )
+                probed = True
+        except Exception as e:
+            log_extra_safe(log, "warning", "ai_warmup_fail", extra={"pid": os.getpid(), "etype": type(e).__name__})
+            return False
+    log_extra_safe(log, "info", "ai_warmup_ok", extra={
+        "pid": os.getpid(), "provider": client.provider.name, "probe": probed,
+        "dur_s": round(time.monotonic() - t0, 3),
+    })
+    return True
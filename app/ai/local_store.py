@@ -0,0 +1,44 @@
+"""Host-local SQLite files shared by all workers (cache, single-flight leases, breaker state).
+
+Each thread keeps its own autocommit connection in WAL mode so readers never block the
+single writer and a short busy timeout absorbs write contention between processes.
+"""
+from __future__ import annotations
+import os
+import sqlite3
+import threading
+from typing import Optional
+
+from flask import current_app
+
+
+class LocalSQLite:
+    def __init__(self, path: str, *, schema: str = "", busy_timeout_s: float = 2.0):
+        self.path = path
+        self.busy_timeout_s = busy_timeout_s
+        self._local = threading.local()
+        self._pid = os.getpid()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if schema:
+            self.conn().executescript(schema)
+
+    def conn(self) -> sqlite3.Connection:
+        # Connections must not cross a fork: drop inherited ones in a new worker process.
+        if self._pid != os.getpid():
+            self._local = threading.local()
+            self._pid = os.getpid()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_s, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+def resolve_store_path(config_key: str, default_name: str) -> Optional[str]:
+    """Path from config; None/unset -> <instance>/<default_name>; "" -> disabled (returns None)."""
+    path = current_app.config.get(config_key)
+    if path is None:
+        return os.path.join(current_app.instance_path, default_name)
+    return path or None
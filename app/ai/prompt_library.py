@@ -1,5 +1,6 @@
 """Centralized prompt templates for SahAI."""
 from __future__ import annotations
+import hashlib
 
 SYSTEM_STYLE = (
     "You are SahAI, an empathetic mental wellness assistant for Indian youth. "
@@ -77,6 +78,19 @@ Text:
 ---
 """
 
+PROMPT_MODERATED_QA = """
+{disclaimer}
+First moderate the student's question for a positive, safe Question Box. If unsafe, set safe=false,
+explain briefly in "reason" and leave "answer" empty.
+If safe but could be kinder/clearer, put a gentle rewrite in "suggested_rewrite".
+If safe, answer the (rewritten) question in simple, empathetic {language}. Keep it concise and practical for students.
+Return JSON strictly matching the schema.
+Question:
+---
+{question}
+---
+"""
+
 PROMPT_EXAM_COPILOT_SNACKS = """
 {disclaimer}
 Create 2-3 concise, practical tips for mode={mode}, duration={duration_min} minutes, language={language}.
@@ -168,3 +182,15 @@ Entry:
 {entry}
 ---
 """
+
+
+def template_version(*templates: str) -> str:
+    """Short content hash of the given templates (plus shared style/disclaimer).
+
+    Used in response-cache keys so editing a prompt invalidates cached outputs automatically.
+    """
+    h = hashlib.sha256()
+    for part in (SYSTEM_STYLE, DISCLAIMER) + templates:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:12]
@@ -0,0 +1,79 @@
+"""Provider backends for the AI clients (selected by ``AI_PROVIDER``).
+
+A provider is configured once per client (``configure``) and then builds the model objects the
+clients talk to (``build_model``; the vision model may be built lazily on first use). Each model
+must offer the slice of the ``google.generativeai.GenerativeModel`` API we use:
+
+- ``generate_content(contents, generation_config=None, stream=False)`` -> response with ``.text``,
+  or an iterable of chunks with ``.text`` when ``stream=True``;
+- ``async generate_content_async(contents, generation_config=None)`` -> response with ``.text``.
+
+Provider errors should carry ``status_code`` where they have one, so
+``_GeminiBase._classify_exception`` maps them the same way for every backend.
+"""
+from __future__ import annotations
+from typing import Any, Dict, Type
+
+from flask import current_app
+
+from .exceptions import AIConfigError
+
+
+class AIProvider:
+    name = ""
+    requires_api_key = True
+
+    def configure(self, api_key: str) -> None:
+        """Process-level setup (credentials, transport). Called once per client, i.e. per worker."""
+
+    def build_model(self, model_name: str) -> Any:
+        raise NotImplementedError
+
+
+class GeminiProvider(AIProvider):
+    name = "gemini"
+
+    def configure(self, api_key: str) -> None:
+        try:
+            import google.generativeai as genai  # type: ignore
+        except Exception as exc:  # pragma: no cover
+            raise AIConfigError("google-generativeai not installed") from exc
+        try:
+            genai.configure(api_key=api_key)
+        except Exception as exc:  # pragma: no cover
+            raise AIConfigError(f"Failed to configure Gemini: {exc}") from exc
+        self._genai = genai
+
+    def build_model(self, model_name: str) -> Any:
+        try:
+            return self._genai.GenerativeModel(model_name)
+        except Exception as exc:  # pragma: no cover
+            raise AIConfigError(f"Failed to initialize Gemini model {model_name}: {exc}") from exc
+
+
+class FakeProvider(AIProvider):
+    """Offline backend for tests and load runs (see app.ai.fake_provider)."""
+    name = "fake"
+    requires_api_key = False
+
+    def configure(self, api_key: str) -> None:
+        from .fake_provider import FakeSettings
+        self._settings = FakeSettings.from_config(current_app.config)
+
+    def build_model(self, model_name: str) -> Any:
+        from .fake_provider import FakeModel
+        return FakeModel(model_name, self._settings)
+
+
+PROVIDERS: Dict[str, Type[AIProvider]] = {
+    GeminiProvider.name: GeminiProvider,
+    FakeProvider.name: FakeProvider,
+}
+
+
+def get_provider() -> AIProvider:
+    name = (current_app.config.get("AI_PROVIDER") or "gemini").strip().lower()
+    cls = PROVIDERS.get(name)
+    if cls is None:
+        raise AIConfigError(f"Unknown AI_PROVIDER: {name}")
+    return cls()
@@ -0,0 +1,211 @@
+"""Single-pass PII redaction behind ``safety.redact_pii``.
+
+Every enabled detector becomes one named group of a single alternation, so the text is scanned
+once and each hit is replaced by ``<<TAG:n>>`` (``n`` counts per tag, in order of appearance).
+At a given position the first detector in order wins, so the specific ones (email before UPI
+handle, Aadhaar before phone) come before the generic phone-number catch-all.
+
+A detector may carry a ``validate`` callback (Aadhaar: Verhoeff checksum). When it rejects a
+candidate, the detectors after it are tried at the same position, so a 12-digit number that is
+not a valid Aadhaar is still masked as a phone number.
+
+Most text has no PII, so the scan is kept cheap where it can be:
+- each detector names an ``anchor`` that any match must contain ("@", "://", a digit); one
+  C-speed search per anchor drops detectors that cannot match (a journal without "@" never runs
+  the email / UPI branches);
+- when every remaining detector declares the characters a match can ``start`` with, the scan
+  hops between those characters with a single-charset search and only tries the alternation
+  there, instead of at every position of the text.
+Compiled alternations are cached per active subset.
+
+Detectors are pluggable: ``register_detector`` adds one to the registry and ``PII_DETECTORS``
+(comma-separated names) picks which are active and in what order. Patterns must not contain
+capturing groups of their own (use ``(?:...)``).
+"""
+from __future__ import annotations
+import re
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from flask import current_app, has_app_context
+
+
+@dataclass(frozen=True)
+class PIIDetector:
+    name: str                   # registry key; also the regex group name (identifier)
+    tag: str                    # mask tag: <<TAG:n>>
+    pattern: str
+    anchor: Optional[str] = None    # regex every match contains; absent from the text -> skipped
+    start: Optional[str] = None     # char-class body for a match's first char; None -> anywhere
+    validate: Optional[Callable[[str], bool]] = None
+
+
+# Verhoeff tables (UIDAI uses this checksum for the last Aadhaar digit)
+_VERHOEFF_D = (
+    (0, 1, 2, 3, 4, 5, 6, 7, 8, 9), (1, 2, 3, 4, 0, 6, 7, 8, 9, 5), (2, 3, 4, 0, 1, 7, 8, 9, 5, 6),
+    (3, 4, 0, 1, 2, 8, 9, 5, 6, 7), (4, 0, 1, 2, 3, 9, 5, 6, 7, 8), (5, 9, 8, 7, 6, 0, 4, 3, 2, 1),
+    (6, 5, 9, 8, 7, 1, 0, 4, 3, 2), (7, 6, 5, 9, 8, 2, 1, 0, 4, 3), (8, 7, 6, 5, 9, 3, 2, 1, 0, 4),
+    (9, 8, 7, 6, 5, 4, 3, 2, 1, 0),
+)
+_VERHOEFF_P = (
+    (0, 1, 2, 3, 4, 5, 6, 7, 8, 9), (1, 5, 7, 6, 2, 8, 3, 0, 9, 4), (5, 8, 0, 3, 7, 9, 6, 1, 4, 2),
+    (8, 9, 1, 6, 0, 4, 3, 5, 2, 7), (9, 4, 5, 3, 1, 2, 6, 8, 7, 0), (4, 2, 8, 6, 5, 7, 3, 9, 0, 1),
+    (2, 7, 9, 3, 8, 0, 6, 4, 1, 5), (7, 0, 4, 6, 9, 1, 3, 2, 5, 8),
+)
+
+
+def verhoeff_valid(number: str) -> bool:
+    c = 0
+    for i, ch in enumerate(reversed([d for d in number if d.isdigit()])):
+        c = _VERHOEFF_D[c][_VERHOEFF_P[i % 8][int(ch)]]
+    return c == 0
+
+
+EMAIL = PIIDetector("email", "EM", r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b", anchor="@")
+URL = PIIDetector("url", "URL", r"\b(?i:https?)://[^\s]+", anchor="://", start="hH")
+UPI = PIIDetector(
+    "upi", "UPI", r"\b[A-Za-z0-9][A-Za-z0-9._-]{1,255}@[A-Za-z][A-Za-z0-9]{1,63}\b(?!\.\w)", anchor="@",
+)
+AADHAAR = PIIDetector(
+    "aadhaar", "AADHAAR", r"(?<![\d-])[2-9]\d{3}(?:\s?\d{4}\s?\d{4}|-\d{4}-\d{4})(?![\d-])",
+    anchor=r"\d", start="2-9", validate=verhoeff_valid,
+)
+PHONE_IN = PIIDetector(
+    "phone_in", "PH", r"(?<![\w+])(?:\+91[\s-]?|91[\s-]|0)?[6-9]\d{4}[\s-]?\d{5}(?!\d)", anchor=r"\d", start=r"+\d",
+)
+PHONE = PIIDetector("phone", "PH", r"\b\+?\d[\d\s\-]{7,}\d\b", anchor=r"\d", start=r"+\d")
+
+_REGISTRY: Dict[str, PIIDetector] = {d.name: d for d in (EMAIL, URL, UPI, AADHAAR, PHONE_IN, PHONE)}
+DEFAULT_ORDER = tuple(_REGISTRY)
+_registry_version = 0
+
+
+def register_detector(detector: PIIDetector) -> None:
+    """Add (or replace) a detector; enable it by listing its name in ``PII_DETECTORS``."""
+    global _registry_version
+    _REGISTRY[detector.name] = detector
+    _registry_version += 1
+
+
+def _mask(tag: str, idx: int) -> str:
+    return f"<<{tag}:{idx}>>"
+
+
+class _Scanner:
+    """The alternation for one subset of detectors (in registry order)."""
+
+    def __init__(self, detectors: Sequence[PIIDetector]):
+        self.detectors = tuple(detectors)
+        self._index = {d.name: i for i, d in enumerate(self.detectors)}
+        self.pattern = re.compile("|".join(f"(?P<{d.name}>{d.pattern})" for d in self.detectors))
+        self._single = [re.compile(d.pattern) for d in self.detectors]
+        starts = [d.start for d in self.detectors]
+        self.starts = re.compile("[" + "".join(starts) + "]") if all(starts) else None
+
+    def _next(self, text: str, pos: int) -> Optional["re.Match[str]"]:
+        if self.starts is None:
+            return self.pattern.search(text, pos)
+        hop, match = self.starts.search, self.pattern.match
+        while True:
+            c = hop(text, pos)
+            if c is None:
+                return None
+            m = match(text, c.start())
+            if m is not None:
+                return m
+            pos = c.start() + 1
+
+    def _resolve(self, text: str, m: "re.Match[str]") -> Optional[Tuple[int, int, str]]:
+        """(start, end, tag) for the hit at ``m``, falling through rejected candidates."""
+        i = self._index[m.lastgroup]
+        det = self.detectors[i]
+        if det.validate is None or det.validate(m.group()):
+            return m.start(), m.end(), det.tag
+        start = m.start()
+        for j in range(i + 1, len(self.detectors)):
+            alt = self._single[j].match(text, start)
+            if alt is not None and (self.detectors[j].validate is None or self.detectors[j].validate(alt.group())):
+                return start, alt.end(), self.detectors[j].tag
+        return None
+
+    def redact(self, text: str) -> Tuple[str, Dict[str, str]]:
+        mapping: Dict[str, str] = {}
+        m = self._next(text, 0)
+        if m is None:
+            return text, mapping
+        counts: Dict[str, int] = {}
+        parts: List[str] = []
+        pos = 0
+        while m is not None:
+            hit = self._resolve(text, m)
+            if hit is None:
+                m = self._next(text, m.start() + 1)
+                continue
+            start, end, tag = hit
+            n = counts.get(tag, 0)
+            counts[tag] = n + 1
+            key = _mask(tag, n)
+            mapping[key] = text[start:end]
+            parts.append(text[pos:start])
+            parts.append(key)
+            pos = end
+            m = self._next(text, end)
+        parts.append(text[pos:])
+        return "".join(parts), mapping
+
+
+class Redactor:
+    """Compiled set of detectors. Safe to share between threads."""
+
+    def __init__(self, detectors: Sequence[PIIDetector]):
+        self.detectors = tuple(detectors)
+        self._anchors = {a: re.compile(a) for a in {d.anchor for d in self.detectors if d.anchor}}
+        self._scanners: Dict[Tuple[str, ...], _Scanner] = {}
+        self._lock = threading.Lock()
+
+    def _scanner(self, text: str) -> Optional[_Scanner]:
+        present = {a for a, rx in self._anchors.items() if rx.search(text) is not None}
+        active = tuple(d.name for d in self.detectors if d.anchor is None or d.anchor in present)
+        if not active:
+            return None
+        scanner = self._scanners.get(active)
+        if scanner is None:
+            with self._lock:
+                scanner = self._scanners.get(active)
+                if scanner is None:
+                    scanner = _Scanner([d for d in self.detectors if d.name in active])
+                    self._scanners[active] = scanner
+        return scanner
+
+    def redact(self, text: str) -> Tuple[str, Dict[str, str]]:
+        if not text:
+            return text, {}
+        scanner = self._scanner(text)
+        if scanner is None:
+            return text, {}
+        return scanner.redact(text)
+
+
+_redactor: Optional[Redactor] = None
+_redactor_key: Optional[tuple] = None
+_redactor_lock = threading.Lock()
+
+
+def _enabled_names() -> Tuple[str, ...]:
+    raw = current_app.config.get("PII_DETECTORS") if has_app_context() else None
+    if not raw:
+        return DEFAULT_ORDER
+    names = raw.split(",") if isinstance(raw, str) else raw
+    return tuple(n.strip() for n in names if n.strip() in _REGISTRY)
+
+
+def get_redactor() -> Redactor:
+    global _redactor, _redactor_key
+    key = (_enabled_names(), _registry_version)
+    if _redactor is None or _redactor_key != key:
+        with _redactor_lock:
+            if _redactor is None or _redactor_key != key:
+                _redactor = Redactor([_REGISTRY[n] for n in key[0]])
+                _redactor_key = key
+    return _redactor
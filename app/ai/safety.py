@@ -1,37 +1,14 @@
 from __future__ import annotations
-import re
 import hashlib
 from typing import Dict, Tuple
 from flask import current_app
 from .schemas import CrisisSignal
-
-# Regexes for PII redaction
-EMAIL_RE = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b")
-PHONE_RE = re.compile(r"\b\+?\d[\d\s\-]{7,}\d\b")
-URL_RE = re.compile(r"\bhttps?://[^\s]+", re.IGNORECASE)
-
-
-def _mask(tag: str, idx: int) -> str:
-    return f"<<{tag}:{idx}>>"
-
+from .crisis_lexicon import get_crisis_detector
+from .redaction import get_redactor
 
 def redact_pii(text: str) -> Tuple[str, Dict[str, str]]:
-    """Mask emails, phones, URLs. Return (masked_text, mapping)."""
-    mapping: Dict[str, str] = {}
-    def _apply(pattern, label, s):
-        i = 0
-        def repl(m):
-            nonlocal i
-            key = _mask(label, i)
-            i += 1
-            mapping[key] = m.group(0)
-            return key
-        return pattern.sub(repl, s)
-
-    masked = _apply(EMAIL_RE, "EM", text)
-    masked = _apply(PHONE_RE, "PH", masked)
-    masked = _apply(URL_RE, "URL", masked)
-    return masked, mapping
+    """Mask emails, URLs, UPI handles, Aadhaar numbers, phones in one scan. Return (masked_text, mapping)."""
+    return get_redactor().redact(text)
 
 
 def restore_pii(text: str, mapping: Dict[str, str]) -> str:
@@ -46,14 +23,10 @@ def _hash(s: str) -> str:
 
 
 def detect_crisis(text: str) -> CrisisSignal:
-    """Heuristic keyword scan; later steps may add model assist."""
+    """Heuristic phrase scan (compiled lexicon, see crisis_lexicon); later steps may add model assist."""
     if not text:
         return CrisisSignal(triggered=False, category=None, confidence=0.0)
-    low = text.lower()
-    for w in current_app.config.get("CRISIS_WORDS", []):
-        if w in low:
-            return CrisisSignal(triggered=True, category="self_harm", confidence=0.85)
-    return CrisisSignal(triggered=False, category=None, confidence=0.0)
+    return get_crisis_detector().detect(text, float(current_app.config.get("CRISIS_MIN_CONFIDENCE", 0.5)))
 
 
 def apply_response_safety(text: str) -> str:
@@ -1,6 +1,19 @@
 from __future__ import annotations
-from typing import Dict, List, Optional, Tuple
-from pydantic import BaseModel, Field, field_validator, ConfigDict
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Type
+from pydantic import BaseModel, Field, field_validator, ConfigDict, TypeAdapter
+
+def _inline_refs(node, defs: dict):
+    """Replace local ``{"$ref": "#/$defs/X"}`` nodes with the referenced definition."""
+    if isinstance(node, dict):
+        ref = node.get("$ref")
+        if isinstance(ref, str) and ref.startswith("#/$defs/"):
+            return _inline_refs(defs.get(ref.rsplit("/", 1)[-1], {}), defs)
+        return {k: _inline_refs(v, defs) for k, v in node.items()}
+    if isinstance(node, list):
+        return [_inline_refs(v, defs) for v in node]
+    return node
+
 
 def _clean_schema(schema: dict, *, in_properties: bool = False) -> dict:
     """
@@ -8,6 +21,9 @@ def _clean_schema(schema: dict, *, in_properties: bool = False) -> dict:
     Keeps only fields supported by Gemini (type, properties, items, required).
     Special handling for 'scores' object and nested refs.
     """
+    if isinstance(schema, dict) and "$defs" in schema:
+        # Nested models (e.g. ComicScript.panels) are emitted as $refs; Gemini needs them inline.
+        schema = _inline_refs(schema, schema["$defs"])
     if isinstance(schema, dict):
         cleaned = {}
         for k, v in schema.items():
@@ -146,6 +162,32 @@ class PeerModeration(BaseModel):
         return _clean_schema(raw)
 
 
+class ModeratedAnswer(BaseModel):
+    """Question Box verdict + rewrite + answer from one round trip (answer is dropped when unsafe)."""
+    model_config = ConfigDict(extra="ignore")
+    safe: bool
+    reason: str = ""
+    suggested_rewrite: Optional[str] = None
+    answer: Optional[str] = None
+    reading_grade: str = ""
+    language: str = ""
+    references: List[str] = Field(default_factory=list)
+
+    @staticmethod
+    def as_schema() -> dict:
+        raw = ModeratedAnswer.model_json_schema()
+        return _clean_schema(raw)
+
+    def split(self) -> Tuple["PeerModeration", Optional["QAAnswer"]]:
+        mod = PeerModeration(safe=self.safe, reason=self.reason, suggested_rewrite=self.suggested_rewrite)
+        if not self.safe or not (self.answer or "").strip():
+            return mod, None
+        return mod, QAAnswer(
+            answer=self.answer, reading_grade=self.reading_grade or "", language=self.language or "",
+            references=self.references,
+        )
+
+
 class CrisisSignal(BaseModel):
     model_config = ConfigDict(extra="ignore")
     triggered: bool
@@ -178,6 +220,13 @@ class ComicScript(BaseModel):
 
 ALLOWED_JOURNAL_EMOTIONS = {"calm","anxious","sad","angry","hopeful","tired","stressed","motivated"}
 
+# Full mood vocabulary in Emotion Lens heatmap order (journal 8 first, then extended moods).
+EMOTION_KEY_ORDER = (
+    "calm", "anxious", "sad", "angry", "hopeful", "tired", "stressed", "motivated",
+    "happy", "lonely", "confused", "grateful", "excited", "frustrated", "guilty",
+    "embarrassed", "insecure", "relieved", "proud",
+)
+
 
 class JournalInsightsUnified(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -273,3 +322,48 @@ def to_summary_and_emotions(i: JournalInsightsUnified) -> Tuple[JournalSummary,
 # Backwards compatibility (if older code imports normalize_emotions)
 def normalize_emotions(i: JournalInsightsUnified, _source_text: str | None = None) -> JournalInsightsUnified:  # pragma: no cover
     return normalize_insights(i)
+
+
+# ---------------------------------------------------------------------------
+# Compiled schema registry
+# ---------------------------------------------------------------------------
+# ``as_schema()`` rebuilds model_json_schema() and walks it through _clean_schema on every call.
+# The registry does that once per class and keeps a TypeAdapter next to it, so GeminiClient pays
+# only a dict lookup per request. Returned schemas are shared: treat them as read-only.
+
+class CompiledSchema(NamedTuple):
+    gemini_schema: dict
+    adapter: TypeAdapter
+
+
+SCHEMA_CLASSES: Tuple[Type[BaseModel], ...] = (
+    EmotionAnalysis, JournalSummary, MeditationPlan, CulturalStory, ResiliencePrompts,
+    QAAnswer, PeerModeration, CrisisSignal, ComicScript, JournalInsightsUnified, ModeratedAnswer,
+)
+
+_REGISTRY: Dict[Type[BaseModel], CompiledSchema] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def compiled(schema_cls: Type[BaseModel]) -> CompiledSchema:
+    entry = _REGISTRY.get(schema_cls)
+    if entry is None:
+        with _REGISTRY_LOCK:
+            entry = _REGISTRY.get(schema_cls)
+            if entry is None:
+                entry = CompiledSchema(schema_cls.as_schema(), TypeAdapter(schema_cls))
+                _REGISTRY[schema_cls] = entry
+    return entry
+
+
+def gemini_schema(schema_cls: Type[BaseModel]) -> dict:
+    return compiled(schema_cls).gemini_schema
+
+
+def validate_output(schema_cls: Type[BaseModel], data: Any) -> BaseModel:
+    return compiled(schema_cls).adapter.validate_python(data)
+
+
+def warm_schema_registry() -> None:
+    for cls in SCHEMA_CLASSES:
+        compiled(cls)
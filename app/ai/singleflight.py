@@ -0,0 +1,273 @@
+"""Single-flight coalescing for identical in-flight provider calls.
+
+When many students pick the same mood at once, identical prompts reach `_call_model`
+concurrently. The first caller ("leader") makes the provider call; every concurrent caller
+with the same (breaker key, prompt hash, schema hash) waits for the leader's result or
+exception instead of spending its own tokens.
+
+- Within a worker: a dict of in-flight calls guarded by a lock, followers wait on an Event.
+- Across workers (``AI_SINGLEFLIGHT_SHARED``): a SQLite lease row per flight. The lease holder
+  calls the provider and writes the outcome back; other processes poll the row and adopt the
+  outcome, or take over the lease if the holder dies and it expires. Outcomes can be personal
+  (journal insights, answers), so finished rows are deleted once their ``linger_s`` window has
+  passed: on every acquire and finish, and when the store is opened.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from flask import current_app
+
+from app.logging_config import get_logger, log_extra_safe
+from . import exceptions as ai_exc
+from .local_store import LocalSQLite, resolve_store_path
+
+log = get_logger("sahai.ai.singleflight")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ai_singleflight (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    lease_until REAL NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    value TEXT,
+    error_type TEXT,
+    error_msg TEXT,
+    finished_at REAL
+);
+"""
+
+_POLL_S = 0.05
+
+
+def flight_key(breaker_key: str, contents: Any, json_schema: Optional[dict]) -> str:
+    h = hashlib.sha256()
+    h.update(breaker_key.encode("utf-8"))
+    h.update(b"\0")
+    h.update(json.dumps(contents, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+    h.update(b"\0")
+    h.update(json.dumps(json_schema or {}, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _rebuild_error(type_name: Optional[str], msg: Optional[str]) -> Exception:
+    cls = getattr(ai_exc, type_name or "", None)
+    if not (isinstance(cls, type) and issubclass(cls, Exception)):
+        cls = ai_exc.AIUnavailableError
+    return cls(msg or "AI unavailable")
+
+
+class _Flight:
+    __slots__ = ("event", "value", "error", "followers")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+
+class _SharedLeases:
+    """Cross-process lease table (one row per in-flight prompt)."""
+
+    def __init__(self, path: str, *, lease_s: float, linger_s: float):
+        self._db = LocalSQLite(path, schema=_SCHEMA)
+        self.lease_s = lease_s
+        self.linger_s = linger_s
+        self.owner = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._purge(self._db.conn(), time.time())
+
+    def _purge(self, conn, now: float) -> None:
+        """Delete finished outcomes older than the linger window (they hold model output)."""
+        conn.execute("DELETE FROM ai_singleflight WHERE done = 1 AND finished_at < ?", (now - self.linger_s,))
+
+    def acquire(self, key: str) -> tuple[bool, Optional[tuple]]:
+        """Return (is_leader, finished_row). finished_row is set when a fresh outcome exists."""
+        now = time.time()
+        conn = self._db.conn()
+        self._purge(conn, now)
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO ai_singleflight (key, owner, lease_until, done) VALUES (?, ?, ?, 0)",
+            (key, self.owner, now + self.lease_s),
+        )
+        if cur.rowcount == 1:
+            return True, None
+        row = conn.execute(
+            "SELECT done, value, error_type, error_msg, finished_at, lease_until FROM ai_singleflight WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return self.acquire(key)
+        done, _value, _etype, _emsg, finished_at, lease_until = row
+        if done and finished_at and finished_at >= now - self.linger_s:
+            return False, row
+        if (done and (not finished_at or finished_at < now - self.linger_s)) or (not done and lease_until < now):
+            # Stale outcome or dead leader: take the lease over.
+            cur = conn.execute(
+                "UPDATE ai_singleflight SET owner = ?, lease_until = ?, done = 0, value = NULL, "
+                "error_type = NULL, error_msg = NULL, finished_at = NULL "
+                "WHERE key = ? AND ((done = 1 AND finished_at < ?) OR (done = 0 AND lease_until < ?))",
+                (self.owner, now + self.lease_s, key, now - self.linger_s, now),
+            )
+            if cur.rowcount == 1:
+                return True, None
+        return False, None
+
+    def wait(self, key: str, deadline: float) -> Optional[tuple]:
+        """Poll until the remote leader finishes; None if the lease expired (caller should retry)."""
+        conn = self._db.conn()
+        while time.time() < deadline:
+            row = conn.execute(
+                "SELECT done, value, error_type, error_msg, finished_at, lease_until FROM ai_singleflight WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            if row[0]:
+                return row
+            if row[5] < time.time():
+                return None
+            time.sleep(_POLL_S)
+        raise ai_exc.AITimeoutError("AI request timed out (waiting on shared flight)")
+
+    def finish(self, key: str, *, value: Any = None, error: Optional[BaseException] = None) -> None:
+        now = time.time()
+        conn = self._db.conn()
+        if error is None:
+            conn.execute(
+                "UPDATE ai_singleflight SET done = 1, value = ?, finished_at = ? WHERE key = ? AND owner = ?",
+                (json.dumps(value, ensure_ascii=False), now, key, self.owner),
+            )
+        else:
+            conn.execute(
+                "UPDATE ai_singleflight SET done = 1, error_type = ?, error_msg = ?, finished_at = ? "
+                "WHERE key = ? AND owner = ?",
+                (type(error).__name__, str(error)[:500], now, key, self.owner),
+            )
+        self._purge(conn, now)
+
+
+class SingleFlight:
+    def __init__(self, *, shared: Optional[_SharedLeases] = None):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._shared = shared
+        self._coalesced_total = 0
+
+    def do(self, key: str, fn: Callable[[], Any], *, wait_timeout: float) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+            else:
+                flight.followers += 1
+                self._coalesced_total += 1
+
+        if not leader:
+            if not flight.event.wait(wait_timeout):
+                raise ai_exc.AITimeoutError("AI request timed out (waiting on coalesced call)")
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = self._lead(key, fn, wait_timeout)
+            return flight.value
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+                followers = flight.followers
+            flight.event.set()
+            if followers:
+                log_extra_safe(log, "info", "ai_singleflight_coalesced", extra={"followers": followers})
+
+    def _lead(self, key: str, fn: Callable[[], Any], wait_timeout: float) -> Any:
+        if self._shared is None:
+            return fn()
+        deadline = time.time() + wait_timeout
+        while True:
+            try:
+                is_leader, row = self._shared.acquire(key)
+            except Exception:
+                # Lease store trouble must never block the call itself.
+                return fn()
+            if is_leader:
+                break
+            if row is None:
+                try:
+                    row = self._shared.wait(key, deadline)
+                except ai_exc.AITimeoutError:
+                    raise
+                except Exception:
+                    return fn()
+            if row is not None:
+                with self._lock:
+                    self._coalesced_total += 1
+                value, etype, emsg = row[1], row[2], row[3]
+                if etype:
+                    raise _rebuild_error(etype, emsg)
+                return json.loads(value) if value is not None else None
+            # Lease expired without an outcome: loop and try to become the leader.
+
+        try:
+            value = fn()
+        except BaseException as exc:
+            self._safe_finish(key, error=exc)
+            raise
+        self._safe_finish(key, value=value)
+        return value
+
+    def _safe_finish(self, key: str, **kwargs) -> None:
+        try:
+            self._shared.finish(key, **kwargs)
+        except Exception:
+            log_extra_safe(log, "warning", "ai_singleflight_finish_failed", extra={})
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"in_flight": len(self._flights), "coalesced_total": self._coalesced_total}
+
+
+_singleflight: Optional[SingleFlight] = None
+_sf_lock = threading.Lock()
+
+
+def get_singleflight() -> Optional[SingleFlight]:
+    """Process-wide coalescer; None when AI_SINGLEFLIGHT_ENABLED is off."""
+    global _singleflight
+    cfg = current_app.config
+    if not cfg.get("AI_SINGLEFLIGHT_ENABLED", True):
+        return None
+    if _singleflight is None:
+        with _sf_lock:
+            if _singleflight is None:
+                shared = None
+                if cfg.get("AI_SINGLEFLIGHT_SHARED", False):
+                    path = resolve_store_path("AI_SINGLEFLIGHT_DB_PATH", "ai_singleflight.sqlite3")
+                    if path:
+                        lease_s = cfg.get("AI_SINGLEFLIGHT_LEASE_S")
+                        if lease_s is None:
+                            # Long enough for the leader's full retry loop.
+                            retries = int(cfg.get("AI_MAX_RETRIES", 3))
+                            lease_s = retries * (int(cfg.get("AI_REQUEST_TIMEOUT", 60)) + float(cfg.get("AI_BACKOFF_MAX", 4.0)))
+                        shared = _SharedLeases(
+                            path,
+                            lease_s=float(lease_s),
+                            linger_s=float(cfg.get("AI_SINGLEFLIGHT_LINGER_S", 2)),
+                        )
+                _singleflight = SingleFlight(shared=shared)
+    return _singleflight
+
+
+def singleflight_stats() -> Dict[str, int]:
+    return _singleflight.stats() if _singleflight is not None else {}
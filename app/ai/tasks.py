@@ -2,43 +2,80 @@ from __future__ import annotations
 from flask import current_app
 from app.logging_config import get_logger, log_extra_safe
 _ailog = get_logger("ai.tasks")
-from .gemini_client import get_ai_client
-from . import safety
+from .gemini_client import get_ai_client, get_async_ai_client
 from .schemas import (
     EmotionAnalysis, JournalSummary, MeditationPlan, CulturalStory, ResiliencePrompts,
     QAAnswer, PeerModeration, CrisisSignal, ComicScript, JournalInsightsUnified,
-    normalize_insights, to_summary_and_emotions
+    normalize_insights, to_summary_and_emotions, EMOTION_KEY_ORDER
 )
+from .emotion_lexicon import confident_label, score_emotions
 from .exceptions import AITimeoutError, AIUnavailableError, AIStructuredOutputError
-from typing import Dict, Any, List
+from .hedging import hedging_enabled, hedge_delay_s, run_hedged
+from .deadline import Deadline
+from .text_analysis import TextLike, analyze_text
+from contextlib import nullcontext
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 
 MAX_JOURNAL_LEN = 2000
 MAX_CONTEXT_LEN = 400
 MAX_QUESTION_LEN = 800
 
+# Errors that make the short-prompt fallback worth trying.
+_FALLBACK_ERRORS = (AITimeoutError, AIUnavailableError, AIStructuredOutputError)
+
 
 def _lang(lang_pref: str) -> str:
     return lang_pref if lang_pref in {"en", "hi", "hinglish"} else "en"
 
 
-def prepare_journal_insights(text: str, language: str, store_raw: bool) -> tuple[JournalSummary, EmotionAnalysis, List[str]]:
+def _phase(deadline: Optional[Deadline], name: str):
+    return deadline.phase(name) if deadline is not None else nullcontext()
+
+
+def _canonical_mood(text: str) -> str:
+    """Map free-text mood to an Emotion Lens label when the local lexicon is confident.
+
+    Label-only prompts are cacheable (see GeminiClient), so a confident mapping usually means
+    the provider is not called at all; otherwise the text is passed through unchanged.
+    """
+    mood = (text or "").strip()
+    if mood.lower() in EMOTION_KEY_ORDER:
+        return mood.lower()
+    return confident_label(mood) or mood
+
+
+def provisional_emotions(text: str) -> Optional[EmotionAnalysis]:
+    """Lexicon-only EmotionAnalysis for when Gemini insights are unavailable (None without evidence)."""
+    res = score_emotions(text)
+    if res.label is None:
+        return None
+    return res.as_emotion_analysis()
+
+
+def prepare_journal_insights(text: TextLike, language: str, store_raw: bool, deadline: Optional[Deadline] = None) -> tuple[JournalSummary, EmotionAnalysis, List[str]]:
     """Gemini unified journal insights (single call + one retry on limited errors).
 
     Flow:
     1. Validate length & crisis (crisis handling occurs at route level; we still detect for logging).
     2. First call with full prompt.
     3. On (AITimeoutError | AIUnavailableError | AIStructuredOutputError) only, retry once with short prompt.
+       With AI_HEDGE_ENABLED the short prompt instead starts in parallel once the full call is slower
+       than the recent latency percentile; the first valid result wins (see app.ai.hedging).
     4. On success: normalize + convert to (JournalSummary, EmotionAnalysis, keywords list).
     5. On failure after retry: re-raise last typed exception (no fallback, no invention).
+
+    ``deadline`` (created by the route) caps the whole flow: attempts are trimmed to the remaining
+    budget and the short-prompt retry is skipped when it cannot fit. Time per phase is recorded on it.
+    ``text`` may be the route's TextAnalysis; the crisis scan and redaction are then reused.
     """
 
     from .exceptions import AITimeoutError, AIUnavailableError, AIStructuredOutputError
 
-    txt = (text or "").strip()
-    if not txt or len(txt) > MAX_JOURNAL_LEN:
+    txt = analyze_text(text)
+    if not txt.text or len(txt) > MAX_JOURNAL_LEN:
         raise ValueError("Journal text invalid length")
-    # Crisis detection for logging only (route already handles abort logic)
-    crisis_sig = safety.detect_crisis(txt)
+    # Crisis detection for logging only (route already handles abort logic; memoised per request)
+    crisis_sig = txt.crisis
     if crisis_sig.triggered:
         log_extra_safe(_ailog, "warning", "journal_crisis_flag", extra={"len": len(txt)})
 
@@ -47,14 +84,34 @@ def prepare_journal_insights(text: str, language: str, store_raw: bool) -> tuple
     first_exc: Exception | None = None
     unified: JournalInsightsUnified | None = None
 
+    if hedging_enabled():
+        with _phase(deadline, "insights_hedged"):
+            unified = run_hedged(
+                lambda cancel: client.journal_insights_unified(
+                    txt, lang, timeout_override=60, short_prompt=False, deadline=deadline, cancel=cancel),
+                lambda cancel: client.journal_insights_unified(
+                    txt, lang, timeout_override=60, short_prompt=True, deadline=deadline, cancel=cancel),
+                delay_s=hedge_delay_s("journal_insights_unified"),
+                retry_on=_FALLBACK_ERRORS,
+                task="journal_insights_unified",
+                deadline=deadline,
+            )
+        normalized = normalize_insights(unified)
+        summary, emotions = to_summary_and_emotions(normalized)
+        return summary, emotions, (normalized.keywords or [])[:8]
+
     try:
-        unified = client.journal_insights_unified(txt, lang, timeout_override=60, short_prompt=False)
+        with _phase(deadline, "insights_full"):
+            unified = client.journal_insights_unified(txt, lang, timeout_override=60, short_prompt=False, deadline=deadline)
     except (AITimeoutError, AIUnavailableError, AIStructuredOutputError) as e:
         first_exc = e
-    # Retry with short prompt if eligible
+    # Retry with short prompt if eligible (and if the request budget still allows an attempt)
     if unified is None and isinstance(first_exc, (AITimeoutError, AIUnavailableError, AIStructuredOutputError)):
+        if deadline is not None and not deadline.can_afford():
+            raise first_exc
         try:
-            unified = client.journal_insights_unified(txt, lang, timeout_override=60, short_prompt=True)
+            with _phase(deadline, "insights_short"):
+                unified = client.journal_insights_unified(txt, lang, timeout_override=60, short_prompt=True, deadline=deadline)
         except (AITimeoutError, AIUnavailableError, AIStructuredOutputError) as e2:
             # bubble up original or second error (choose second for freshest context)
             raise e2
@@ -79,7 +136,7 @@ def build_meditation_for_user(emotions: List[str], duration_hint: int, language:
     if not emotions:
         raise NoMoodSelectedError("No emotions provided for meditation generation")
     client = get_ai_client()
-    return client.generate_meditation(emotions, duration_hint, _lang(language))
+    return client.generate_meditation([_canonical_mood(e) for e in emotions], duration_hint, _lang(language))
 
 
 def generate_cultural_story(theme: str, language: str) -> CulturalStory:
@@ -88,28 +145,45 @@ def generate_cultural_story(theme: str, language: str) -> CulturalStory:
     return client.tell_cultural_story(theme, _lang(language))
 
 
-def create_resilience_prompts(context: str, language: str) -> ResiliencePrompts:
-    context = (context or "").strip()[:MAX_CONTEXT_LEN]
+def create_resilience_prompts(context: TextLike, language: str) -> ResiliencePrompts:
+    context = analyze_text(context).clip(MAX_CONTEXT_LEN)
     client = get_ai_client()
     return client.make_resilience_prompts(context, _lang(language))
 
 
-def answer_user_question(question: str, language: str) -> QAAnswer:
-    q = (question or "").strip()
-    if not q or len(q) > MAX_QUESTION_LEN:
+def answer_user_question(question: TextLike, language: str, deadline: Optional[Deadline] = None) -> QAAnswer:
+    q = analyze_text(question)
+    if not q.text or len(q) > MAX_QUESTION_LEN:
         raise ValueError("Question too long or empty.")
     client = get_ai_client()
-    return client.answer_question_simple(q, _lang(language))
+    with _phase(deadline, "answer"):
+        return client.answer_question_simple(q, _lang(language), deadline=deadline)
+
+
+def moderate_and_rewrite_peer_post(text: TextLike, language: str, deadline: Optional[Deadline] = None) -> PeerModeration:
+    content = analyze_text(text).clip(240)
+    client = get_ai_client()
+    with _phase(deadline, "moderation"):
+        return client.moderate_peer_post(content, _lang(language), deadline=deadline)
+
 
+def moderate_and_answer_question(question: TextLike, language: str, deadline: Optional[Deadline] = None) -> Tuple[PeerModeration, Optional[QAAnswer]]:
+    """Moderation verdict, rewrite and answer in one structured call.
 
-def moderate_and_rewrite_peer_post(text: str, language: str) -> PeerModeration:
-    content = (text or "").strip()[:240]
+    The answer is None when the question is unsafe (or the model left it empty); callers fall back
+    to answer_user_question for the latter.
+    """
+    q = analyze_text(question)
+    if not q.text or len(q) > MAX_QUESTION_LEN:
+        raise ValueError("Question too long or empty.")
     client = get_ai_client()
-    return client.moderate_peer_post(content, _lang(language))
+    with _phase(deadline, "moderate_and_answer"):
+        return client.moderate_and_answer(q, _lang(language), deadline=deadline)
 
 
-def check_crisis_paths(text: str) -> CrisisSignal:
-    return safety.detect_crisis(text or "")
+def check_crisis_paths(text: TextLike) -> CrisisSignal:
+    """Crisis signal for a submitted text, memoised per request (see text_analysis)."""
+    return analyze_text(text).crisis
 
 
 def music_rationale(mood: str | None, language: str) -> str:
@@ -134,28 +208,44 @@ def generate_art_prompt(mood_text: str | None, language: str) -> str:
     if not mood_text:
         raise NoMoodSelectedError("Mood required for art prompt generation")
     client = get_ai_client()
-    mood = mood_text.strip()[:200]
+    mood = _canonical_mood(mood_text[:200])
     return client.generate_art_prompt(mood, _lang(language))
 
-def generate_comic_script(situation: str, language: str) -> Dict[str, Any]:
+def generate_comic_script(situation: TextLike, language: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
     """Generate a comic script with one fallback retry using a shorter prompt.
 
     Strategy mirrors journal insights resilience:
     1. Full prompt attempt.
-    2. On timeout / unavailable / structured parse failure -> retry once with short prompt.
+    2. On timeout / unavailable / structured parse failure -> retry once with short prompt
+       (or hedge it in parallel when AI_HEDGE_ENABLED).
     3. Propagate second error if retry fails (no fabrication).
     """
     client = get_ai_client()
-    sit = (situation or "Exam stress").strip()[:240]
+    sit = analyze_text(situation or "Exam stress").clip(240)
     first_exc: Exception | None = None
     script: ComicScript | None = None
+    if hedging_enabled():
+        with _phase(deadline, "comic_hedged"):
+            script = run_hedged(
+                lambda cancel: client.generate_comic_script(sit, _lang(language), short_prompt=False, deadline=deadline, cancel=cancel),
+                lambda cancel: client.generate_comic_script(sit, _lang(language), short_prompt=True, deadline=deadline, cancel=cancel),
+                delay_s=hedge_delay_s("generate_comic_script"),
+                retry_on=_FALLBACK_ERRORS,
+                task="generate_comic_script",
+                deadline=deadline,
+            )
+        return script.model_dump()
     try:
-        script = client.generate_comic_script(sit, _lang(language), short_prompt=False)
+        with _phase(deadline, "comic_full"):
+            script = client.generate_comic_script(sit, _lang(language), short_prompt=False, deadline=deadline)
     except (AITimeoutError, AIUnavailableError, AIStructuredOutputError) as e:
         first_exc = e
     if script is None and isinstance(first_exc, (AITimeoutError, AIUnavailableError, AIStructuredOutputError)):
+        if deadline is not None and not deadline.can_afford():
+            raise first_exc
         try:
-            script = client.generate_comic_script(sit, _lang(language), short_prompt=True)
+            with _phase(deadline, "comic_short"):
+                script = client.generate_comic_script(sit, _lang(language), short_prompt=True, deadline=deadline)
         except (AITimeoutError, AIUnavailableError, AIStructuredOutputError) as e2:
             raise e2
     if script is None:
@@ -163,10 +253,158 @@ def generate_comic_script(situation: str, language: str) -> Dict[str, Any]:
         raise _AU("comic script unavailable")
     return script.model_dump()
 
-def summarize_journal(text: str, language: str, store_raw: bool = False) -> JournalSummary:
+def summarize_journal(text: TextLike, language: str, store_raw: bool = False) -> JournalSummary:
     """Thin wrapper used by Letters to generate a reflection summary."""
-    txt = (text or "").strip()
-    if not txt:
+    txt = analyze_text(text)
+    if not txt.text:
         raise ValueError("Empty journal text.")
     client = get_ai_client()
     return client.summarize_journal(txt, _lang(language), store_raw=store_raw)
+
+
+
+# ---------------------------------------------------------------------------
+# Streaming entry points (SSE routes). Each yields ("token", text) events and a
+# final ("final", validated_object); validation rules match the sync functions.
+# ---------------------------------------------------------------------------
+def stream_cultural_story(theme: str, language: str) -> Iterator[Tuple[str, Any]]:
+    theme = (theme or "hope").strip()[:50]
+    return get_ai_client().stream_cultural_story(theme, _lang(language))
+
+
+def stream_meditation_for_user(emotions: List[str], duration_hint: int, language: str) -> Iterator[Tuple[str, Any]]:
+    duration_hint = int(duration_hint or 180)
+    if duration_hint < 60 or duration_hint > 1800:
+        duration_hint = 180
+    if not emotions:
+        raise NoMoodSelectedError("No emotions provided for meditation generation")
+    return get_ai_client().stream_meditation([_canonical_mood(e) for e in emotions], duration_hint, _lang(language))
+
+
+def stream_user_answer(question: TextLike, language: str, deadline: Optional[Deadline] = None) -> Iterator[Tuple[str, Any]]:
+    q = analyze_text(question)
+    if not q.text or len(q) > MAX_QUESTION_LEN:
+        raise ValueError("Question too long or empty.")
+    return get_ai_client().stream_answer_question(q, _lang(language), deadline=deadline)
+
+# ---------------------------------------------------------------------------
+# Async entry points (for async views / workers). Same validation and fallback
+# rules as the sync functions above; provider calls run on AsyncGeminiClient.
+# ---------------------------------------------------------------------------
+async def prepare_journal_insights_async(text: TextLike, language: str, store_raw: bool, deadline: Optional[Deadline] = None) -> tuple[JournalSummary, EmotionAnalysis, List[str]]:
+    """Async twin of prepare_journal_insights (full prompt, then one short-prompt retry)."""
+    txt = analyze_text(text)
+    if not txt.text or len(txt) > MAX_JOURNAL_LEN:
+        raise ValueError("Journal text invalid length")
+    crisis_sig = txt.crisis
+    if crisis_sig.triggered:
+        log_extra_safe(_ailog, "warning", "journal_crisis_flag", extra={"len": len(txt)})
+
+    client = get_async_ai_client()
+    lang = _lang(language)
+    try:
+        with _phase(deadline, "insights_full"):
+            unified = await client.journal_insights_unified(txt, lang, timeout_override=60, short_prompt=False, deadline=deadline)
+    except (AITimeoutError, AIUnavailableError, AIStructuredOutputError):
+        if deadline is not None and not deadline.can_afford():
+            raise
+        with _phase(deadline, "insights_short"):
+            unified = await client.journal_insights_unified(txt, lang, timeout_override=60, short_prompt=True, deadline=deadline)
+
+    normalized = normalize_insights(unified)
+    summary, emotions = to_summary_and_emotions(normalized)
+    return summary, emotions, (normalized.keywords or [])[:8]
+
+
+async def build_meditation_for_user_async(emotions: List[str], duration_hint: int, language: str) -> MeditationPlan:
+    duration_hint = int(duration_hint or 180)
+    if duration_hint < 60 or duration_hint > 1800:
+        duration_hint = 180
+    if not emotions:
+        raise NoMoodSelectedError("No emotions provided for meditation generation")
+    client = get_async_ai_client()
+    return await client.generate_meditation([_canonical_mood(e) for e in emotions], duration_hint, _lang(language))
+
+
+async def generate_cultural_story_async(theme: str, language: str) -> CulturalStory:
+    theme = (theme or "hope").strip()[:50]
+    client = get_async_ai_client()
+    return await client.tell_cultural_story(theme, _lang(language))
+
+
+async def create_resilience_prompts_async(context: TextLike, language: str) -> ResiliencePrompts:
+    context = analyze_text(context).clip(MAX_CONTEXT_LEN)
+    client = get_async_ai_client()
+    return await client.make_resilience_prompts(context, _lang(language))
+
+
+async def answer_user_question_async(question: TextLike, language: str, deadline: Optional[Deadline] = None) -> QAAnswer:
+    q = analyze_text(question)
+    if not q.text or len(q) > MAX_QUESTION_LEN:
+        raise ValueError("Question too long or empty.")
+    client = get_async_ai_client()
+    with _phase(deadline, "answer"):
+        return await client.answer_question_simple(q, _lang(language), deadline=deadline)
+
+
+async def moderate_and_rewrite_peer_post_async(text: TextLike, language: str, deadline: Optional[Deadline] = None) -> PeerModeration:
+    content = analyze_text(text).clip(240)
+    client = get_async_ai_client()
+    with _phase(deadline, "moderation"):
+        return await client.moderate_peer_post(content, _lang(language), deadline=deadline)
+
+
+async def moderate_and_answer_question_async(question: TextLike, language: str, deadline: Optional[Deadline] = None) -> Tuple[PeerModeration, Optional[QAAnswer]]:
+    q = analyze_text(question)
+    if not q.text or len(q) > MAX_QUESTION_LEN:
+        raise ValueError("Question too long or empty.")
+    client = get_async_ai_client()
+    with _phase(deadline, "moderate_and_answer"):
+        return await client.moderate_and_answer(q, _lang(language), deadline=deadline)
+
+
+async def music_rationale_async(mood: str | None, language: str) -> str:
+    if not mood:
+        raise NoMoodSelectedError("Mood required for music rationale")
+    client = get_async_ai_client()
+    return await client.music_rationale(mood.strip().lower()[:40], _lang(language))
+
+
+async def exam_snack_async(mode: str, duration_sec: int, language: str) -> QAAnswer:
+    client = get_async_ai_client()
+    return await client.exam_snack((mode or "focus"), int(duration_sec / 60), _lang(language))
+
+
+async def vision_describe_image_async(image_bytes: bytes, language: str) -> str:
+    client = get_async_ai_client()
+    return await client.vision_describe_image(image_bytes, _lang(language))
+
+
+async def generate_art_prompt_async(mood_text: str | None, language: str) -> str:
+    if not mood_text:
+        raise NoMoodSelectedError("Mood required for art prompt generation")
+    client = get_async_ai_client()
+    return await client.generate_art_prompt(_canonical_mood(mood_text[:200]), _lang(language))
+
+
+async def generate_comic_script_async(situation: TextLike, language: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+    """Async twin of generate_comic_script (full prompt, then one short-prompt retry)."""
+    client = get_async_ai_client()
+    sit = analyze_text(situation or "Exam stress").clip(240)
+    try:
+        with _phase(deadline, "comic_full"):
+            script = await client.generate_comic_script(sit, _lang(language), short_prompt=False, deadline=deadline)
+    except (AITimeoutError, AIUnavailableError, AIStructuredOutputError):
+        if deadline is not None and not deadline.can_afford():
+            raise
+        with _phase(deadline, "comic_short"):
+            script = await client.generate_comic_script(sit, _lang(language), short_prompt=True, deadline=deadline)
+    return script.model_dump()
+
+
+async def summarize_journal_async(text: TextLike, language: str, store_raw: bool = False) -> JournalSummary:
+    txt = analyze_text(text)
+    if not txt.text:
+        raise ValueError("Empty journal text.")
+    client = get_async_ai_client()
+    return await client.summarize_journal(txt, _lang(language), store_raw=store_raw)
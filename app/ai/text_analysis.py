@@ -0,0 +1,101 @@
+"""Request-scoped analysis of one user-submitted text.
+
+A journal entry used to be crisis-scanned in the route, scanned again in the task, and
+PII-redacted once per prompt builder. ``analyze_text`` computes each of those at most once per
+text and request: the result is memoised on ``flask.g`` by content hash, so the route's
+``check_crisis_paths``, the task and every ``GeminiClient`` builder see the same object (and
+cannot disagree). Tasks and client methods accept either a string or a ``TextAnalysis``.
+
+Everything is lazy: a route that only needs the crisis signal never pays for redaction.
+``clip(limit)`` is the prompt-sized view (``masked`` cut to ``limit`` without splitting a
+``<<TAG:n>>`` mask); it shares the parent's crisis signal, which was computed on the full text.
+
+Outside a request (CLI workers, drains) nothing is memoised; passing the object down still
+avoids repeated work within one task.
+"""
+from __future__ import annotations
+import hashlib
+from functools import cached_property
+from typing import Dict, Optional, Tuple, Union
+
+from flask import current_app, g, has_app_context, has_request_context
+
+from .crisis_lexicon import get_crisis_detector, normalize
+from .redaction import get_redactor
+from .schemas import CrisisSignal
+
+
+class TextAnalysis:
+    def __init__(self, text: str):
+        self.text = (text or "").strip()
+        self.digest = hashlib.sha256(self.text.encode("utf-8")).hexdigest()
+        self._clips: Dict[int, TextAnalysis] = {}
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    @cached_property
+    def normalized(self) -> str:
+        return normalize(self.text)
+
+    @cached_property
+    def crisis(self) -> CrisisSignal:
+        if not self.text:
+            return CrisisSignal(triggered=False, category=None, confidence=0.0)
+        min_conf = float(current_app.config.get("CRISIS_MIN_CONFIDENCE", 0.5)) if has_app_context() else 0.5
+        return get_crisis_detector().detect(self.normalized, min_conf, normalized=True)
+
+    @cached_property
+    def _redacted(self) -> Tuple[str, Dict[str, str]]:
+        return get_redactor().redact(self.text)
+
+    @property
+    def masked(self) -> str:
+        return self._redacted[0]
+
+    @property
+    def mapping(self) -> Dict[str, str]:
+        return self._redacted[1]
+
+    def head(self, limit: int) -> str:
+        """``masked`` cut to ``limit`` chars, dropping a mask the cut would split."""
+        masked = self.masked
+        if len(masked) <= limit:
+            return masked
+        cut = masked[:limit]
+        opened = cut.rfind("<<")
+        if opened != -1 and cut.find(">>", opened) == -1:
+            cut = cut[:opened]
+        return cut
+
+    def clip(self, limit: int) -> "TextAnalysis":
+        """Prompt-sized view of this analysis (memoised per limit)."""
+        if len(self.masked) <= limit:
+            return self
+        clipped = self._clips.get(limit)
+        if clipped is None:
+            clipped = TextAnalysis.__new__(TextAnalysis)
+            masked = self.head(limit)
+            clipped.text = self.text[:limit]
+            clipped.digest = f"{self.digest}:{limit}"
+            clipped._clips = {}
+            clipped.__dict__["crisis"] = self.crisis
+            clipped.__dict__["_redacted"] = (masked, {k: v for k, v in self.mapping.items() if k in masked})
+            self._clips[limit] = clipped
+        return clipped
+
+
+TextLike = Union[str, TextAnalysis, None]
+
+
+def analyze_text(text: TextLike) -> TextAnalysis:
+    """The TextAnalysis for ``text``; memoised per request by content hash."""
+    if isinstance(text, TextAnalysis):
+        return text
+    if not has_request_context():
+        return TextAnalysis(text or "")
+    analysis = TextAnalysis(text or "")
+    memo: Optional[Dict[str, TextAnalysis]] = getattr(g, "_text_analyses", None)
+    if memo is None:
+        memo = g._text_analyses = {}
+    return memo.setdefault(analysis.digest, analysis)
@@ -0,0 +1,27 @@
+from __future__ import annotations
+import click
+from flask.cli import with_appcontext
+
+from ..services.ai_jobs import default_worker_id, run_worker
+
+
+@click.command("ai-worker")
+@click.option("--once", is_flag=True, help="Run every ready job, then exit (cron / one-off drain).")
+@click.option("--poll", type=float, default=None, help="Seconds between polls when idle (AI_JOB_POLL_S).")
+@click.option("--max-jobs", type=int, default=None, help="Exit after this many jobs.")
+@click.option("--worker-id", default=None, help="Lease owner name (default host:pid).")
+@with_appcontext
+def ai_worker_cmd(once: bool, poll: float | None, max_jobs: int | None, worker_id: str | None) -> None:
+    """Process background AI jobs (journal insights) from the AIJob table."""
+    wid = worker_id or default_worker_id()
+    click.echo(f"ai-worker {wid} started")
+    try:
+        stats = run_worker(wid, once=once, poll_s=poll, max_jobs=max_jobs)
+    except KeyboardInterrupt:
+        click.echo("ai-worker interrupted")
+        return
+    click.echo("ai-worker finished: " + ", ".join(f"{k}={v}" for k, v in stats.items()))
+
+
+def register_ai_worker_cli(app):
+    app.cli.add_command(ai_worker_cmd)
@@ -0,0 +1,29 @@
+from __future__ import annotations
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import with_appcontext
+
+from ..services.emotion_rollups import rebuild_rollups
+
+
+@click.command("emotion-rollups-rebuild")
+@click.option("--user-id", type=int, default=None, help="Only this user.")
+@click.option("--days", type=int, default=None, help="Only the last N days (default: all history).")
+@click.option("--batch-users", type=int, default=None, help="Users per transaction (EMOTION_ROLLUP_REBUILD_USERS).")
+@with_appcontext
+def emotion_rollups_rebuild_cmd(user_id, days, batch_users) -> None:
+    """Recompute the daily emotion rollups (Emotion Lens) from the emotion snapshots."""
+    since = datetime.utcnow().date() - timedelta(days=days - 1) if days else None
+
+    def report(b):
+        click.echo(f"batch {b['batch']}: {b['users']} users, {b['snapshots']} snapshots -> "
+                   f"{b['rollups']} rollups in {b['dur_s']}s")
+
+    summary = rebuild_rollups(user_id=user_id, since=since, batch_users=batch_users, on_batch=report)
+    click.echo(f"users={summary['users']} snapshots={summary['snapshots']} rollups={summary['rollups']} "
+               f"batches={summary['batches']} elapsed={summary['elapsed_s']}s")
+
+
+def register_emotion_rollups_cli(app):
+    app.cli.add_command(emotion_rollups_rebuild_cmd)
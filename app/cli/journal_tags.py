@@ -0,0 +1,29 @@
+from __future__ import annotations
+import click
+from flask.cli import with_appcontext
+
+from ..services.journal_tags import backfill_entry_tags
+
+
+@click.command("journal-tags-backfill")
+@click.option("--batch-size", type=int, default=None, help="Entries per transaction (JOURNAL_TAG_BACKFILL_BATCH).")
+@click.option("--start-id", type=int, default=0, help="Resume after this JournalEntry id.")
+@with_appcontext
+def journal_tags_backfill_cmd(batch_size, start_id) -> None:
+    """Build the emotion / keyword tag links of existing journal entries from their JSON columns."""
+
+    def report(b):
+        click.echo(f"batch {b['batch']}: {b['size']} entries, {b['links']} links up to id {b['last_id']} "
+                   f"in {b['dur_s']}s")
+
+    try:
+        summary = backfill_entry_tags(batch_size=batch_size, start_id=start_id, on_batch=report)
+    except KeyboardInterrupt:
+        click.echo("journal-tags-backfill interrupted (rerun with --start-id to resume)")
+        return
+    click.echo(f"entries={summary['entries']} links={summary['links']} batches={summary['batches']} "
+               f"last_id={summary['last_id']} elapsed={summary['elapsed_s']}s")
+
+
+def register_journal_tags_cli(app):
+    app.cli.add_command(journal_tags_backfill_cmd)
@@ -0,0 +1,37 @@
+from __future__ import annotations
+import click
+from flask.cli import with_appcontext
+
+from ..services.question_drain import backlog_size, drain_pending
+
+
+@click.command("questions-drain")
+@click.option("--batch-size", type=int, default=None, help="Rows per transaction (QUESTION_DRAIN_BATCH).")
+@click.option("--concurrency", type=int, default=None, help="Max parallel AI calls (QUESTION_DRAIN_CONCURRENCY).")
+@click.option("--max-items", type=int, default=None, help="Stop after this many items.")
+@click.option("--loop", is_flag=True, help="Keep polling for new pending items instead of exiting when empty.")
+@click.option("--poll", type=float, default=None, help="Idle poll interval with --loop (QUESTION_DRAIN_POLL_S).")
+@with_appcontext
+def questions_drain_cmd(batch_size, concurrency, max_items, loop, poll) -> None:
+    """Moderate and answer Question Box items left pending while moderation was unavailable."""
+    click.echo(f"pending backlog: {backlog_size()}")
+
+    def report(b):
+        click.echo(f"batch {b['batch']}: {b['done']}/{b['size']} done, {b['deferred']} deferred "
+                   f"in {b['dur_s']}s (next concurrency {b['next_workers']})")
+
+    try:
+        summary = drain_pending(batch_size=batch_size, concurrency=concurrency, max_items=max_items,
+                                loop=loop, poll_s=poll, on_batch=report)
+    except KeyboardInterrupt:
+        click.echo("questions-drain interrupted")
+        return
+    click.echo(
+        f"answered={summary['answered']} flagged={summary['flagged']} deferred={summary['deferred']} "
+        f"throughput={summary['items_per_s']}/s elapsed={summary['elapsed_s']}s "
+        f"breaker_waits={summary['breaker_waits']} backlog={summary['backlog']}"
+    )
+
+
+def register_questions_drain_cli(app):
+    app.cli.add_command(questions_drain_cmd)
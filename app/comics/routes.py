@@ -9,6 +9,8 @@ from .services import save_panel_images
 from ..extensions import db
 from ..model import MediaAsset, SafetyEvent
 from ..ai.tasks import generate_comic_script, check_crisis_paths
+from ..ai.deadline import Deadline
+from ..ai.exceptions import AIStructuredOutputError, AITimeoutError, AIUnavailableError
 
 
 @comics_bp.route("/comics/new", methods=["GET", "POST"], endpoint="comics_new")
@@ -26,8 +28,12 @@ def new_comic():
             db.session.commit()
             return render_template("journal/_partials/_grounding_modal.html", show_as_page=True)
 
-        script = generate_comic_script(
-            text, current_user.language_pref or "en")
+        try:
+            script = generate_comic_script(
+                text, current_user.language_pref or "en", deadline=Deadline.from_config())
+        except (AIUnavailableError, AITimeoutError, AIStructuredOutputError):
+            flash("Comic could not be generated right now. Please try again in a moment.", "warning")
+            return render_template("comics/new.html", form=form)
         panels_meta = script.get("panels", [])
         paths = save_panel_images(len(panels_meta) or 3)
 
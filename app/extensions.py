@@ -2,7 +2,10 @@
 from __future__ import annotations
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import event
+from sqlalchemy.engine import make_url
+import os
 import time
+import weakref
 from app.logging_config import get_logger, log_extra_safe
 from flask_migrate import Migrate
 from flask_wtf.csrf import CSRFProtect
@@ -40,3 +43,120 @@ def init_sql_listeners(app):
 		start = conn.info.get('_query_start_time').pop(-1) if conn.info.get('_query_start_time') else None
 		dur = int((time.time() - start) * 1000) if start else 0
 		log_extra_safe(log, "debug", "sql_end", extra={"event":"sql_end","duration_ms":dur,"rowcount":getattr(cursor, 'rowcount', -1)})
+
+
+# ---------------------------------------------------------------------------
+# SQLite engine profile
+# ---------------------------------------------------------------------------
+# The default rollback journal lets one writer block every reader (and vice versa), which shows
+# up as "database is locked" once several gunicorn workers write journals at the same time.
+# WAL lets readers proceed during a write; busy_timeout makes a second writer wait for the lock
+# instead of failing. Pragmas are per connection (journal_mode=WAL also persists in the file),
+# so they are applied on every new DB-API connection.
+_PRAGMA_CHOICES = {
+    "journal_mode": {"WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY", "OFF"},
+    "synchronous": {"OFF", "NORMAL", "FULL", "EXTRA"},
+    "temp_store": {"DEFAULT", "FILE", "MEMORY"},
+}
+
+
+def _is_sqlite(uri: str) -> bool:
+    return make_url(uri).get_backend_name() == "sqlite"
+
+
+def _is_memory_sqlite(uri: str) -> bool:
+    url = make_url(uri)
+    return _is_sqlite(uri) and (url.database in (None, "", ":memory:") or url.query.get("mode") == "memory")
+
+
+def sqlite_pragmas(config) -> list[str]:
+    """PRAGMA statements for the configured profile (validated; raises ValueError on typos)."""
+    choices = {
+        "journal_mode": str(config.get("SQLITE_JOURNAL_MODE", "WAL")).upper(),
+        "synchronous": str(config.get("SQLITE_SYNCHRONOUS", "NORMAL")).upper(),
+        "temp_store": str(config.get("SQLITE_TEMP_STORE", "MEMORY")).upper(),
+    }
+    for name, value in choices.items():
+        if value not in _PRAGMA_CHOICES[name]:
+            raise ValueError(f"SQLITE_{name.upper()}={value!r}; expected one of {sorted(_PRAGMA_CHOICES[name])}")
+    return [
+        f"PRAGMA busy_timeout={int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))}",  # first: the others may wait on it
+        f"PRAGMA journal_mode={choices['journal_mode']}",
+        f"PRAGMA synchronous={choices['synchronous']}",
+        f"PRAGMA foreign_keys={'ON' if config.get('SQLITE_FOREIGN_KEYS', True) else 'OFF'}",
+        f"PRAGMA cache_size={-abs(int(config.get('SQLITE_CACHE_SIZE_KIB', 16384)))}",  # negative = KiB
+        f"PRAGMA mmap_size={int(config.get('SQLITE_MMAP_SIZE_MB', 128)) * 1024 * 1024}",
+        f"PRAGMA temp_store={choices['temp_store']}",
+    ]
+
+
+def apply_sqlite_pragmas(dbapi_conn, pragmas: list[str]) -> None:
+    cur = dbapi_conn.cursor()
+    try:
+        for stmt in pragmas:
+            cur.execute(stmt)
+    finally:
+        cur.close()
+
+
+def configure_engine_options(app) -> None:
+    """Fill SQLALCHEMY_ENGINE_OPTIONS (call before ``db.init_app``); explicit options win.
+
+    Each worker process gets its own pool: ``DB_POOL_SIZE`` connections (one per request thread,
+    e.g. gunicorn ``--threads``) plus ``DB_MAX_OVERFLOW`` for background threads. In-memory
+    SQLite keeps Flask-SQLAlchemy's single shared connection.
+    """
+    uri = app.config.get("SQLALCHEMY_DATABASE_URI") or ""
+    if not uri or _is_memory_sqlite(uri):
+        return
+    options = {
+        "pool_size": int(app.config.get("DB_POOL_SIZE", 4)),
+        "max_overflow": int(app.config.get("DB_MAX_OVERFLOW", 2)),
+        "pool_timeout": float(app.config.get("DB_POOL_TIMEOUT_S", 10)),
+    }
+    if _is_sqlite(uri) and app.config.get("SQLITE_PROFILE_ENABLED", True):
+        connect_args = {"timeout": int(app.config.get("SQLITE_BUSY_TIMEOUT_MS", 5000)) / 1000.0}
+        options["connect_args"] = connect_args
+    options.update(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+
+def init_sqlite_profile(app) -> None:
+    """Apply the SQLite pragmas to every new connection of the app's engine (after ``db.init_app``).
+
+    Also takes transaction control away from pysqlite (SQLAlchemy's documented workaround): the
+    driver otherwise defers BEGIN to the first write and commits on its own before some
+    statements, which breaks SAVEPOINTs, so ``begin_nested()`` would not roll back cleanly.
+    """
+    uri = app.config.get("SQLALCHEMY_DATABASE_URI") or ""
+    if not uri or not _is_sqlite(uri):
+        return
+    with app.app_context():
+        engine = db.engine
+    profile = bool(app.config.get("SQLITE_PROFILE_ENABLED", True))
+    pragmas = sqlite_pragmas(app.config) if profile else []
+    if _is_memory_sqlite(uri):
+        # No WAL / mmap for in-memory databases; keep the semantic ones.
+        pragmas = [p for p in pragmas if p.startswith(("PRAGMA foreign_keys", "PRAGMA busy_timeout"))]
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, connection_record):  # type: ignore
+        dbapi_conn.isolation_level = None  # no implicit BEGIN / COMMIT from the driver
+        apply_sqlite_pragmas(dbapi_conn, pragmas)
+
+    @event.listens_for(engine, "begin")
+    def _on_begin(conn):  # type: ignore
+        conn.exec_driver_sql("BEGIN")
+
+    if not profile:
+        return
+
+    if hasattr(os, "register_at_fork"):
+        # A connection opened before a --preload fork must not be shared with the workers.
+        ref = weakref.ref(engine)
+        os.register_at_fork(after_in_child=lambda: ref() is not None and ref().dispose(close=False))
+
+    log_extra_safe(log, "info", "sqlite_profile", extra={
+        "pragmas": [p[len("PRAGMA "):] for p in pragmas],
+        "pool": type(engine.pool).__name__,
+    })
@@ -1,10 +1,10 @@
 from __future__ import annotations
 import json
-from datetime import datetime, timedelta
-from typing import Dict, List
+from datetime import datetime
+from typing import Dict
 
 from flask import (
-    render_template, request, redirect, url_for, flash, current_app, abort
+    render_template, request, redirect, url_for, flash, current_app, abort, jsonify
 )
 from flask_login import login_required, current_user
 
@@ -14,7 +14,13 @@ from .forms import NewJournalForm
 from ..extensions import db, limiter
 from ..model import JournalEntry, EmotionSnapshot, SafetyEvent
 from ..services.db_helpers import list_paginated, get_or_404
-from ..ai.tasks import prepare_journal_insights, check_crisis_paths
+from ..services.ai_jobs import JOURNAL_INSIGHTS, enqueue, job_state
+from ..services.emotion_rollups import FALLBACK_LABEL, daily_stats, record_snapshot
+from ..services.journal_tags import EMOTION, KEYWORD, clear_entry_tags, entries_with_tag, entry_tags, set_entry_tags, tag_counts
+from ..ai.schemas import EMOTION_KEY_ORDER
+from ..ai.tasks import prepare_journal_insights, check_crisis_paths, provisional_emotions
+from ..ai.text_analysis import analyze_text
+from ..ai.deadline import Deadline
 from ..ai.exceptions import AITimeoutError, AIUnavailableError, AIStructuredOutputError, AIConfigError
 import traceback
 from app.logging_config import log_extra_safe, get_logger
@@ -59,8 +65,10 @@ def new():
         language = current_user.language_pref or "en"
         store_raw_flag = bool(form.store_raw.data)
 
-        # Crisis check (if triggered, we do not proceed with AI)
-        crisis = check_crisis_paths(text)
+        # Crisis check (if triggered, we do not proceed with AI). The analysis (crisis scan, PII
+        # redaction) is computed once and reused by the insights task below.
+        analysis = analyze_text(text)
+        crisis = check_crisis_paths(analysis)
         
         if crisis.triggered:
             ev = SafetyEvent(
@@ -73,13 +81,44 @@ def new():
             flash("We noticed you might need extra care. Here are grounding steps 💙", "warning")
             return render_template("journal/_partials/_grounding_modal.html", show_as_page=True)
 
+        if current_app.config.get("AI_JOBS_ENABLED"):
+            # Save now; `flask ai-worker` fills in the insights and the emotion snapshot.
+            entry = JournalEntry(
+                user_id=current_user.id,
+                raw_text=text if store_raw_flag else None,
+                store_raw=store_raw_flag,
+                ai_summary="",
+                ai_emotions="[]",
+                ai_keywords="[]",
+                visibility="private",
+                is_deleted=False,
+            )
+            try:
+                db.session.add(entry)
+                db.session.flush()
+                # PII-redacted text only: the provider never sees more, and store_raw stays honest.
+                enqueue(JOURNAL_INSIGHTS, current_user.id, entry.id,
+                        {"text": analysis.masked, "language": language, "store_raw": store_raw_flag})
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                flash("Could not save your entry. Please try again.", "danger")
+                return render_template("journal/new.html", form=form)
+            flash("Journal saved ✨ Your AI insights are on their way.", "success")
+            return redirect(url_for("journal.journal_detail", entry_id=entry.id))
+
+        deadline = Deadline.from_config()
         try:
-            summary, emotions, keywords = prepare_journal_insights(text=text, language=language, store_raw=store_raw_flag)
+            summary, emotions, keywords = prepare_journal_insights(
+                text=analysis, language=language, store_raw=store_raw_flag, deadline=deadline
+            )
             print(summary)
+            log_extra_safe(_jlog, "info", "journal_ai_budget", extra=deadline.summary())
         except (AITimeoutError, AIUnavailableError, AIStructuredOutputError, AIConfigError) as e:
             log_extra_safe(
                 _jlog, "warning", "journal_ai_fail",
-                extra={"event": "journal_ai_fail", "len": len(text), "lang": language, "etype": type(e).__name__}
+                extra={"event": "journal_ai_fail", "len": len(text), "lang": language, "etype": type(e).__name__,
+                       "budget": deadline.summary()}
             )
             # fallback: no AI insights
             entry = JournalEntry(
@@ -100,6 +139,22 @@ def new():
                 flash("Could not save your entry. Please try again.", "danger")
                 return render_template("journal/new.html", form=form)
 
+            # Provisional snapshot from the local lexicon so the Emotion Lens still sees the entry
+            local = provisional_emotions(text)
+            if local is not None:
+                try:
+                    record_snapshot(EmotionSnapshot(
+                        user_id=current_user.id,
+                        source="journal_local",
+                        score_map=json.dumps(local.scores),
+                        label=local.primary_label,
+                        created_at=datetime.utcnow(),
+                    ))
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    log_extra_safe(_jlog, "warning", "emotion_snapshot_save_failed", extra={"uid": current_user.id})
+
             flash("AI insights could not be generated. Please try again.", "warning")
             return redirect(url_for("journal.journal_detail", entry_id=entry.id))
 
@@ -129,6 +184,7 @@ def new():
             )
             try:
                 db.session.add(entry)
+                set_entry_tags(entry, summary.detected_emotions or [], keywords or [])
                 db.session.commit()
             except Exception:
                 db.session.rollback()
@@ -145,7 +201,7 @@ def new():
                         label=emotions.primary_label or _primary_from_scores(emotions.scores or {}),
                         created_at=datetime.utcnow(),
                     )
-                    db.session.add(snap)
+                    record_snapshot(snap)
                     db.session.commit()
                 except Exception:
                     db.session.rollback()
@@ -162,8 +218,17 @@ def new():
 def journal_emotion_lens():
     page = max(1, int(request.args.get("page", 1)))
     per_page = 9
-    pagination = list_paginated(JournalEntry, user_id=current_user.id, page=page, per_page=per_page, order="-created_at")
-    return render_template("journal/list.html", pagination=pagination)
+    # ?emotion=anxious / ?keyword=exams filter through the tag index
+    kind = EMOTION if request.args.get("emotion") else KEYWORD if request.args.get("keyword") else None
+    tag = (request.args.get(kind) or "").strip() if kind else ""
+    if tag:
+        pagination = entries_with_tag(current_user.id, kind, tag).paginate(page=page, per_page=per_page, error_out=False)
+    else:
+        pagination = list_paginated(JournalEntry, user_id=current_user.id, page=page, per_page=per_page, order="-created_at")
+    return render_template(
+        "journal/list.html", pagination=pagination, filter_kind=kind if tag else None, filter_tag=tag,
+        top_emotions=tag_counts(current_user.id, EMOTION, limit=6),
+    )
 
 
 @journal_bp.route("/journal/<int:entry_id>", methods=["GET"], endpoint="journal_detail")
@@ -172,18 +237,31 @@ def journal_emotion_lens():
 def detail(entry_id: int):
     entry = get_or_404(JournalEntry, id=entry_id)
     _ensure_owner(entry)
-    # Derive chips for emotions/keywords
-    emotions = []
-    try:
-        emotions = json.loads(entry.ai_emotions) if entry.ai_emotions else []
-    except Exception:
-        emotions = []
-    keywords = []
-    try:
-        keywords = json.loads(entry.ai_keywords) if entry.ai_keywords else []
-    except Exception:
-        keywords = []
-    return render_template("journal/detail.html", entry=entry, emotions=emotions, keywords=keywords)
+    # Chips for emotions/keywords (tag links; JSON columns for entries not yet backfilled)
+    emotions, keywords = entry_tags(entry)
+    insights_state = job_state(JOURNAL_INSIGHTS, entry.id)
+    return render_template(
+        "journal/detail.html", entry=entry, emotions=emotions, keywords=keywords, insights_state=insights_state
+    )
+
+
+@journal_bp.route("/journal/grounding", methods=["GET"], endpoint="journal_grounding")
+@login_required
+@trace_route("journal.grounding")
+def grounding():
+    """Grounding steps as a page: where streamed (SSE) forms send the browser on a crisis hit."""
+    return render_template("journal/_partials/_grounding_modal.html", show_as_page=True)
+
+
+@journal_bp.route("/journal/<int:entry_id>/insights-status", methods=["GET"], endpoint="journal_insights_status")
+@login_required
+@limiter.limit("120 per minute")
+@trace_route("journal.insights_status")
+def insights_status(entry_id: int):
+    """Polled by the detail page while background insights are pending."""
+    entry = get_or_404(JournalEntry, id=entry_id)
+    _ensure_owner(entry)
+    return jsonify({"state": job_state(JOURNAL_INSIGHTS, entry.id)})
 
 
 @journal_bp.route("/journal/<int:entry_id>/delete", methods=["POST"], endpoint="journal_delete")
@@ -193,6 +271,7 @@ def delete_entry(entry_id: int):
     entry = get_or_404(JournalEntry, id=entry_id)
     _ensure_owner(entry)
     entry.is_deleted = True
+    clear_entry_tags(entry.id)
     db.session.commit()
     flash("Entry moved to private archive.", "info")
     return redirect(url_for("journal.journal_emotion_lens"))
@@ -205,15 +284,9 @@ def delete_entry(entry_id: int):
 @login_required
 @trace_route("journal.emotion_lens")
 def emotion_lens():
-    """Aggregate last 30 days EmotionSnapshot for the current user and render charts."""
-    since = datetime.utcnow() - timedelta(days=30)
-    snaps: List[EmotionSnapshot] = (
-        EmotionSnapshot.query
-        .filter(EmotionSnapshot.user_id == current_user.id)
-        .filter(EmotionSnapshot.created_at >= since)
-        .order_by(EmotionSnapshot.created_at.asc())
-        .all()
-    )
+    """Last 30 (or ?days=365) days of the user's daily emotion rollups, shaped for the charts."""
+    days = 365 if request.args.get("days") == "365" else 30
+    rollups = daily_stats(current_user.id, days)
 
     # Prepare data for charts
     daily = []
@@ -221,43 +294,20 @@ def emotion_lens():
     heat_days = []
     heat_values = []
 
-    key_order = [
-    "calm",
-    "anxious",
-    "sad",
-    "angry",
-    "hopeful",
-    "tired",
-    "stressed",
-    "motivated",
-    "happy",
-    "lonely",
-    "confused",
-    "grateful",
-    "excited",
-    "frustrated",
-    "guilty",
-    "embarrassed",
-    "insecure",
-    "relieved",
-    "proud",
-]
-
-    for s in snaps:
-        scores = {}
-        try:
-            scores = json.loads(s.score_map or "{}")
-        except Exception:
-            scores = {}
-        label = s.label or _primary_from_scores(scores)
-        dist_counts[label] = dist_counts.get(label, 0) + 1
+    key_order = list(EMOTION_KEY_ORDER)
+
+    for d in rollups:
+        for label, n in d.label_counts.items():
+            dist_counts[label] = dist_counts.get(label, 0) + n
 
-        primary_score = scores.get(label, max(scores.values()) if scores else 0)
-        daily.append({"date": s.created_at.strftime("%Y-%m-%d"), "label": label, "score": round(float(primary_score or 0), 3)})
+        label = d.dominant or FALLBACK_LABEL
+        day = d.day.strftime("%Y-%m-%d")
+        daily.append({"date": day, "label": label, "score": round(d.label_mean(label), 3)})
 
-        # Heatmap rows in fixed key order
-        heat_days.append(s.created_at.strftime("%Y-%m-%d"))
-        heat_values.append([round(float(scores.get(k, 0)), 3) for k in key_order])
+        # Heatmap columns (last 30 days at most) in fixed key order
+        heat_days.append(day)
+        heat_values.append([round(d.mean(k), 3) for k in key_order])
+    heat_days, heat_values = heat_days[-30:], heat_values[-30:]
 
     # Today’s primary
     todays = daily[-1]["label"] if daily else "—"
@@ -275,4 +325,5 @@ def emotion_lens():
         key_order=key_order,
         todays=todays,
         micro=micro,
+        days=days,
     )
@@ -0,0 +1,66 @@
+from __future__ import annotations
+import hmac
+import time
+from flask import Response, abort, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.utils import metrics
+
+_sql_listener_installed = False
+
+
+def _count_sql(conn, cursor, statement, parameters, context, executemany):  # type: ignore
+    if has_request_context():
+        g._metrics_sql = getattr(g, "_metrics_sql", 0) + 1
+
+
+def register_metrics(app):
+    """Route latency + SQL-per-request hooks and the ``/metrics`` endpoint (METRICS_ENABLED)."""
+    global _sql_listener_installed
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    if not _sql_listener_installed:
+        event.listen(Engine, "before_cursor_execute", _count_sql)
+        _sql_listener_installed = True
+
+    @app.before_request
+    def _metrics_start():
+        g._metrics_t0 = time.perf_counter()
+
+    def _record(status: int) -> None:
+        t0 = getattr(g, "_metrics_t0", None)
+        if t0 is None or getattr(g, "_metrics_done", False) or request.endpoint == "metrics":
+            return
+        g._metrics_done = True
+        endpoint = request.endpoint or "unmatched"
+        metrics.observe(
+            "http_request_duration_seconds", time.perf_counter() - t0,
+            endpoint=endpoint, method=request.method, status=status,
+        )
+        metrics.observe("sql_queries_per_request", getattr(g, "_metrics_sql", 0), endpoint=endpoint)
+        metrics.flush()
+
+    @app.after_request
+    def _metrics_record(resp):
+        _record(resp.status_code)
+        return resp
+
+    @app.teardown_request
+    def _metrics_record_error(exc):
+        # An exception that escaped the error handlers never reaches after_request.
+        if exc is not None:
+            _record(500)
+
+    def metrics_view():
+        # Deny by default. Outside debug/testing the endpoint only exists with a token: behind a
+        # reverse proxy every request comes from loopback, so the client address proves nothing.
+        token = app.config.get("METRICS_TOKEN")
+        if not token:
+            if not (app.debug or app.testing):
+                abort(404)
+        elif not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            abort(403)
+        return Response(metrics.exposition(), mimetype="text/plain; version=0.0.4")
+
+    app.add_url_rule("/metrics", endpoint="metrics", view_func=metrics_view, methods=["GET"])
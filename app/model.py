@@ -144,6 +144,37 @@ class JournalEntry(TimestampMixin, db.Model):
         return f"<JournalEntry id={self.id} user={self.user_id}>"
 
 
+class JournalTag(db.Model):
+    """Interned emotion / keyword vocabulary for journal entries (one row per kind + name)."""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(16), nullable=False)   # 'emotion'|'keyword'
+    name = db.Column(db.String(64), nullable=False)   # normalised: casefolded, single spaces
+
+    __table_args__ = (
+        db.UniqueConstraint("kind", "name", name="uq_journal_tag_kind_name"),
+    )
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<JournalTag id={self.id} {self.kind}={self.name!r}>"
+
+
+class JournalEntryTag(db.Model):
+    """Entry <-> tag link. `user_id`/`created_at` are copied from the entry so per-user filters
+    and counts are answered from the index alone; links of soft-deleted entries are removed."""
+    entry_id = db.Column(db.Integer, db.ForeignKey("journal_entry.id", ondelete="CASCADE"), primary_key=True)
+    tag_id = db.Column(db.Integer, db.ForeignKey("journal_tag.id", ondelete="CASCADE"), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+    position = db.Column(db.SmallInteger, nullable=False, default=0)  # order the AI returned them in
+
+    __table_args__ = (
+        db.Index("ix_journal_entry_tag_user_tag_created", "user_id", "tag_id", "created_at"),
+    )
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<JournalEntryTag entry={self.entry_id} tag={self.tag_id}>"
+
+
 class EmotionSnapshot(db.Model):
     """Lightweight emotion vector snapshot (journal/doodle/question/system)."""
     id = db.Column(db.Integer, primary_key=True)
@@ -161,6 +192,29 @@ class EmotionSnapshot(db.Model):
         return f"<EmotionSnapshot id={self.id} user={self.user_id} src={self.source}>"
 
 
+class EmotionDailyRollup(db.Model):
+    """Per-user, per-day aggregate of EmotionSnapshot rows (what the Emotion Lens reads).
+
+    Maintained in the snapshot's own transaction by `services.emotion_rollups.record_snapshot`;
+    `flask emotion-rollups-rebuild` recomputes it from the snapshots.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    day = db.Column(db.Date, nullable=False)                             # UTC day of created_at
+    snapshots = db.Column(db.Integer, nullable=False, default=0)
+    stats = db.Column(db.Text, nullable=False, default="{}")            # JSON: {"calm": [sum, count, max]}
+    label_counts = db.Column(db.Text, nullable=False, default="{}")     # JSON: {"calm": 2}
+    dominant = db.Column(db.String(50), nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "day", name="uq_emotion_rollup_user_day"),
+    )
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<EmotionDailyRollup user={self.user_id} day={self.day} n={self.snapshots}>"
+
+
 class GratitudeEntry(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
@@ -183,10 +237,14 @@ class QuestionBoxItem(TimestampMixin, db.Model):
     question_text = db.Column(db.Text, nullable=False)
     ai_answer_text = db.Column(db.Text, nullable=True)
     language = db.Column(db.String(16), nullable=False, default="en")
-    status = db.Column(db.String(20), nullable=False, default="submitted")  # 'submitted'|'answered'|'flagged'
+    status = db.Column(db.String(20), nullable=False, default="submitted")  # 'submitted'|'answered'|'flagged'|'pending'
     is_flagged = db.Column(db.Boolean, default=False, nullable=False)
     flag_reason = db.Column(db.String(255), nullable=True)
 
+    __table_args__ = (
+        db.Index("ix_question_status_id", "status", "id"),  # pending-drain scan
+    )
+
     def __repr__(self) -> str:  # pragma: no cover
         return f"<QuestionBoxItem id={self.id} status={self.status}>"
 
@@ -313,3 +371,30 @@ class AppSetting(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     def __repr__(self) -> str:  # pragma: no cover
         return f"<AppSetting key={self.key!r}>"
+
+
+class AIJob(TimestampMixin, db.Model):
+    """Durable background AI work item, claimed by `flask ai-worker` under a lease.
+
+    `payload` holds the job input (for journal insights: the PII-redacted entry text, the same
+    text the provider is sent) and is cleared once the job is done or has failed for good.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(40), nullable=False)                    # 'journal_insights'
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    subject_id = db.Column(db.Integer, nullable=True)                  # e.g. JournalEntry.id
+    payload = db.Column(db.Text, nullable=True)                        # JSON string
+    status = db.Column(db.String(16), nullable=False, default="queued")  # 'queued'|'running'|'done'|'failed'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    run_after = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    lease_owner = db.Column(db.String(64), nullable=True)
+    lease_expires_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.String(120), nullable=True)              # exception type only
+
+    __table_args__ = (
+        db.Index("ix_ai_job_status_run_after", "status", "run_after"),
+        db.Index("ix_ai_job_kind_subject", "kind", "subject_id"),
+    )
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<AIJob id={self.id} kind={self.kind} status={self.status}>"
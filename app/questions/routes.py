@@ -1,10 +1,11 @@
 from __future__ import annotations
 from typing import List
-from flask import render_template, request, redirect, url_for, flash
+from flask import current_app, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from flask_limiter.util import get_remote_address
 
-from app.ai.exceptions import AIUnavailableError
+from app.ai.exceptions import AIUnavailableError, AIConfigError, AISafetyError, AIStructuredOutputError, AITimeoutError
+from app.utils.sse import sse_event, sse_response
 from app.model import db
 
 from . import questions_bp
@@ -12,7 +13,22 @@ from app.utils.tracing import trace_route
 from .forms import AskQuestionForm
 from ..extensions import db, limiter
 from ..model import QuestionBoxItem
-from ..ai.tasks import moderate_and_rewrite_peer_post, answer_user_question, check_crisis_paths
+from ..ai.tasks import (
+    moderate_and_rewrite_peer_post, answer_user_question, moderate_and_answer_question, check_crisis_paths,
+    stream_user_answer,
+)
+from ..ai.deadline import Deadline
+
+# Failures after which the question is saved as pending for `flask questions-drain`: the provider
+# is down, the route budget ran out (``Deadline`` raises AITimeoutError), or the output was unusable.
+_PENDING_ERRORS = (AIUnavailableError, AITimeoutError, AIStructuredOutputError)
+
+
+# /questions/ask and its SSE twin draw from one bucket, so streaming is not a second allowance.
+_ask_limit = limiter.shared_limit(
+    "3 per hour", scope="questions_ask",
+    key_func=lambda: str(current_user.id) if current_user.is_authenticated else get_remote_address(),
+)
 
 
 def _simple_paginate(query, page: int, per_page: int = 10):
@@ -33,7 +49,7 @@ def _simple_paginate(query, page: int, per_page: int = 10):
 
 @questions_bp.route("/questions/ask", methods=["GET", "POST"], endpoint="questions_ask")
 @login_required
-@limiter.limit("3 per hour", key_func=lambda: str(current_user.id) if current_user.is_authenticated else get_remote_address())
+@_ask_limit
 @trace_route("questions.ask")
 def ask():
     form = AskQuestionForm()
@@ -52,9 +68,15 @@ def ask():
             # do not persist raw; show supportive modal page
             return render_template("journal/_partials/_grounding_modal.html", show_as_page=True)
 
+        # One budget for moderation + answer, so a slow moderation call shortens the answer attempt
+        deadline = Deadline.from_config()
         try:
-            # Moderate first
-            mod = moderate_and_rewrite_peer_post(text, language)
+            # Moderate first (single combined call unless AI_QA_COMBINED_ENABLED is off)
+            answer = None
+            if current_app.config.get("AI_QA_COMBINED_ENABLED", True):
+                mod, answer = moderate_and_answer_question(text, language, deadline=deadline)
+            else:
+                mod = moderate_and_rewrite_peer_post(text, language, deadline=deadline)
             if not mod.safe:
                 item = QuestionBoxItem(
                     user_id=current_user.id,
@@ -70,8 +92,9 @@ def ask():
                 flash("Your question seems sensitive. We’ve flagged it for safety; please try a different phrasing.", "warning")
                 return redirect(url_for("questions.detail", item_id=item.id))
 
-            # Safe → Answer
-            answer = answer_user_question(mod.suggested_rewrite or text, language)
+            # Safe → Answer (second round trip only on the two-call path or if the combined answer was empty)
+            if answer is None:
+                answer = answer_user_question(mod.suggested_rewrite or text, language, deadline=deadline)
             item = QuestionBoxItem(
                 user_id=current_user.id,
                 question_text=mod.suggested_rewrite or text,
@@ -85,7 +108,8 @@ def ask():
             db.session.commit()
             flash("Answer ready ✅", "success")
             return redirect(url_for("questions.questions_detail", item_id=item.id))
-        except AIUnavailableError:
+        except _PENDING_ERRORS:
+            db.session.rollback()
             item = QuestionBoxItem(
                 user_id=current_user.id,
                 question_text=text,
@@ -102,6 +126,74 @@ def ask():
     return render_template("questions/ask.html", form=form)
 
 
+@questions_bp.route("/questions/ask/stream", methods=["POST"], endpoint="questions_ask_stream")
+@login_required
+@_ask_limit
+@trace_route("questions.ask_stream")
+def ask_stream():
+    """SSE twin of /questions/ask: moderation runs first, then the answer streams token by token.
+
+    The final event carries the validated answer and the saved item's detail URL.
+    """
+    form = AskQuestionForm()
+    if not form.validate_on_submit():
+        return sse_response([sse_event("error", {"message": "Please write your question."})])
+    text = (form.question_text.data or "").strip()
+    language = form.language.data or "en"
+
+    crisis = check_crisis_paths(text)
+    if crisis.triggered:
+        flash("We noticed crisis words — showing grounding steps 💙", "warning")
+        return sse_response([sse_event("crisis", {"redirect": url_for("journal.journal_grounding")})])
+
+    # Same budget as the form path: moderation time shortens the streamed answer's allowance.
+    deadline = Deadline.from_config()
+
+    def frames():
+        try:
+            mod = moderate_and_rewrite_peer_post(text, language, deadline=deadline)
+        except _PENDING_ERRORS:
+            item = QuestionBoxItem(user_id=current_user.id, question_text=text, ai_answer_text=None,
+                                   language=language, status="pending", is_flagged=False)
+            db.session.add(item)
+            db.session.commit()
+            yield sse_event("pending", {"url": url_for("questions.questions_detail", item_id=item.id)})
+            return
+        if not mod.safe:
+            item = QuestionBoxItem(
+                user_id=current_user.id, question_text=text, ai_answer_text=None, language=language,
+                status="flagged", is_flagged=True, flag_reason=mod.reason[:255] if mod.reason else "unsafe",
+            )
+            db.session.add(item)
+            db.session.commit()
+            yield sse_event("flagged", {"url": url_for("questions.questions_detail", item_id=item.id)})
+            return
+
+        question = mod.suggested_rewrite or text
+        try:
+            for kind, value in stream_user_answer(question, language, deadline=deadline):
+                if kind == "token":
+                    yield sse_event("token", {"text": value})
+                    continue
+                item = QuestionBoxItem(
+                    user_id=current_user.id, question_text=question, ai_answer_text=value.answer,
+                    language=value.language or language, status="answered", is_flagged=False, flag_reason=None,
+                )
+                db.session.add(item)
+                db.session.commit()
+                payload = value.model_dump()
+                payload["url"] = url_for("questions.questions_detail", item_id=item.id)
+                yield sse_event("final", payload)
+        except ValueError:
+            # Empty or over-long after moderation's rewrite.
+            yield sse_event("error", {"message": "Please keep your question shorter.", "etype": "ValueError"})
+        except (AITimeoutError, AIUnavailableError, AIStructuredOutputError, AIConfigError, AISafetyError) as e:
+            db.session.rollback()
+            yield sse_event("error", {"message": "Answer could not be generated. Please try again.", "etype": type(e).__name__})
+
+    return sse_response(frames())
+
+
 @questions_bp.route("/questions", methods=["GET"], endpoint="questions_list")
 @login_required
 @trace_route("questions.list")
@@ -0,0 +1,260 @@
+"""Durable background AI jobs (AIJob table) and the worker loop behind `flask ai-worker`.
+
+Routes enqueue a job in the same transaction as the row it will fill in and return at once.
+A worker claims ready jobs with a lease: a conditional UPDATE moves a job to 'running' with
+``lease_owner``/``lease_expires_at`` set, so concurrent workers (or processes) never run the
+same job twice, and a job whose worker crashed is picked up again once its lease expires.
+
+Each kind has a handler split in two: ``run`` does the slow AI work with no DB writes, ``apply``
+writes the results and is committed together with the job's completion. Completion is again
+conditional on still holding the lease, so a worker that overran its lease drops its result
+instead of writing it twice. Typed transient AI errors are retried with exponential backoff up
+to ``AI_JOB_MAX_ATTEMPTS``; anything else fails the job. Finished jobs drop their payload.
+Payloads never hold raw user text: routes enqueue the PII-redacted ``TextAnalysis.masked``.
+
+Like the rest of the app, logs carry ids / counts / exception types only, never content.
+"""
+from __future__ import annotations
+import json
+import os
+import socket
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from flask import current_app
+from sqlalchemy import and_, or_
+
+from ..extensions import db
+from ..model import AIJob, EmotionSnapshot, JournalEntry
+from .emotion_rollups import record_snapshot
+from .journal_tags import set_entry_tags
+from app.logging_config import get_logger, log_extra_safe
+from app.ai.exceptions import AITimeoutError, AIUnavailableError, AIStructuredOutputError
+
+log = get_logger("sahai.ai_jobs")
+
+JOURNAL_INSIGHTS = "journal_insights"
+PENDING_STATES = ("queued", "running")
+
+# Provider hiccups worth another attempt later (AIOverloadedError is an AIUnavailableError).
+RETRYABLE_ERRORS = (AITimeoutError, AIUnavailableError, AIStructuredOutputError)
+
+
+@dataclass(frozen=True)
+class JobHandler:
+    run: Callable[[Dict[str, Any]], Any]                   # slow part: AI calls, no DB writes
+    apply: Callable[[AIJob, Any], None]                    # DB writes, committed with completion
+    on_failure: Optional[Callable[[AIJob, Dict[str, Any]], None]] = None  # after the last attempt
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue(kind: str, user_id: int, subject_id: Optional[int], payload: Dict[str, Any]) -> AIJob:
+    """Add a queued job to the session; the caller commits it with the subject row."""
+    job = AIJob(kind=kind, user_id=user_id, subject_id=subject_id, payload=json.dumps(payload),
+                status="queued", attempts=0, run_after=datetime.utcnow())
+    db.session.add(job)
+    return job
+
+
+def job_state(kind: str, subject_id: int) -> Optional[str]:
+    """'pending' | 'failed' | 'done' for the latest job about ``subject_id``; None if there is none."""
+    job = (
+        AIJob.query.filter_by(kind=kind, subject_id=subject_id)
+        .order_by(AIJob.id.desc())
+        .first()
+    )
+    if job is None:
+        return None
+    return "pending" if job.status in PENDING_STATES else job.status
+
+
+def _claimable(now: datetime):
+    return or_(
+        and_(AIJob.status == "queued", AIJob.run_after <= now),
+        and_(AIJob.status == "running", AIJob.lease_expires_at < now),
+    )
+
+
+def claim_next(worker_id: str, lease_s: float) -> Optional[AIJob]:
+    """Lease the oldest ready job (or one whose lease expired); None when nothing is ready."""
+    now = datetime.utcnow()
+    candidates = [
+        row.id for row in
+        AIJob.query.with_entities(AIJob.id).filter(_claimable(now)).order_by(AIJob.run_after, AIJob.id).limit(8)
+    ]
+    for job_id in candidates:
+        won = (
+            AIJob.query.filter(AIJob.id == job_id, _claimable(now))
+            .update(
+                {
+                    "status": "running",
+                    "lease_owner": worker_id,
+                    "lease_expires_at": now + timedelta(seconds=lease_s),
+                    "attempts": AIJob.attempts + 1,
+                },
+                synchronize_session=False,
+            )
+        )
+        db.session.commit()
+        if won:
+            return db.session.get(AIJob, job_id)
+    return None
+
+
+def _finish(job: AIJob, worker_id: str, values: Dict[str, Any]) -> bool:
+    """Conditionally close out ``job`` (still leased by us) within the current transaction."""
+    values = dict(values, lease_owner=None, lease_expires_at=None)
+    won = (
+        AIJob.query.filter(AIJob.id == job.id, AIJob.status == "running", AIJob.lease_owner == worker_id)
+        .update(values, synchronize_session=False)
+    )
+    return bool(won)
+
+
+def _fail(job: AIJob, worker_id: str, payload: Dict[str, Any], etype: str) -> str:
+    handler = HANDLERS.get(job.kind)
+    if not _finish(job, worker_id, {"status": "failed", "payload": None, "last_error": etype[:120]}):
+        db.session.rollback()
+        return "lost_lease"
+    if handler is not None and handler.on_failure is not None:
+        try:
+            handler.on_failure(job, payload)
+        except Exception as e:
+            log_extra_safe(log, "warning", "ai_job_on_failure_error", extra={"job_id": job.id, "etype": type(e).__name__})
+    db.session.commit()
+    return "failed"
+
+
+def run_job(job: AIJob, worker_id: str) -> str:
+    """Run one claimed job; returns 'done' | 'retry' | 'failed' | 'lost_lease'."""
+    cfg = current_app.config
+    max_attempts = int(cfg.get("AI_JOB_MAX_ATTEMPTS", 4))
+    payload = json.loads(job.payload or "{}")
+    handler = HANDLERS.get(job.kind)
+    t0 = time.monotonic()
+    if handler is None:
+        return _fail(job, worker_id, payload, "UnknownJobKind")
+    if job.attempts > max_attempts:
+        # Reclaimed after its last lease expired (worker crash): give up.
+        return _fail(job, worker_id, payload, "LeaseExpired")
+
+    try:
+        result = handler.run(payload)
+    except RETRYABLE_ERRORS as e:
+        etype = type(e).__name__
+        if job.attempts >= max_attempts:
+            outcome = _fail(job, worker_id, payload, etype)
+        else:
+            base = float(cfg.get("AI_JOB_RETRY_BASE_S", 10))
+            delay = min(float(cfg.get("AI_JOB_RETRY_MAX_S", 600)), base * (2 ** (job.attempts - 1)))
+            ok = _finish(job, worker_id, {
+                "status": "queued", "last_error": etype[:120],
+                "run_after": datetime.utcnow() + timedelta(seconds=delay),
+            })
+            db.session.commit()
+            outcome = "retry" if ok else "lost_lease"
+        log_extra_safe(log, "warning", "ai_job_error", extra={
+            "job_id": job.id, "kind": job.kind, "attempt": job.attempts, "etype": etype, "outcome": outcome,
+        })
+        return outcome
+    except Exception as e:
+        outcome = _fail(job, worker_id, payload, type(e).__name__)
+        log_extra_safe(log, "error", "ai_job_error", extra={
+            "job_id": job.id, "kind": job.kind, "attempt": job.attempts, "etype": type(e).__name__, "outcome": outcome,
+        })
+        return outcome
+
+    try:
+        if not _finish(job, worker_id, {"status": "done", "payload": None, "last_error": None}):
+            db.session.rollback()
+            log_extra_safe(log, "warning", "ai_job_lost_lease", extra={"job_id": job.id, "kind": job.kind})
+            return "lost_lease"
+        handler.apply(job, result)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        outcome = _fail(job, worker_id, payload, type(e).__name__)
+        log_extra_safe(log, "error", "ai_job_apply_error", extra={"job_id": job.id, "etype": type(e).__name__})
+        return outcome
+    log_extra_safe(log, "info", "ai_job_done", extra={
+        "job_id": job.id, "kind": job.kind, "attempt": job.attempts, "dur_s": round(time.monotonic() - t0, 3),
+    })
+    return "done"
+
+
+def run_worker(worker_id: str, *, once: bool = False, poll_s: Optional[float] = None,
+               max_jobs: Optional[int] = None) -> Dict[str, int]:
+    """Claim and run jobs until interrupted (or, with ``once``, until none are ready)."""
+    cfg = current_app.config
+    lease_s = float(cfg.get("AI_JOB_LEASE_S", 300))
+    poll_s = float(poll_s if poll_s is not None else cfg.get("AI_JOB_POLL_S", 2))
+    stats: Dict[str, int] = {"done": 0, "retry": 0, "failed": 0, "lost_lease": 0}
+    handled = 0
+    while max_jobs is None or handled < max_jobs:
+        job = claim_next(worker_id, lease_s)
+        if job is None:
+            db.session.remove()
+            if once:
+                break
+            time.sleep(poll_s)
+            continue
+        outcome = run_job(job, worker_id)
+        stats[outcome] = stats.get(outcome, 0) + 1
+        handled += 1
+        db.session.remove()
+    return stats
+
+
+# ---------------------------
+# Handlers
+# ---------------------------
+def _journal_insights_run(payload: Dict[str, Any]):
+    from app.ai.deadline import Deadline
+    from app.ai.tasks import prepare_journal_insights
+    budget = float(current_app.config.get("AI_JOB_BUDGET_S", 120))
+    return prepare_journal_insights(
+        text=payload.get("text", ""), language=payload.get("language", "en"),
+        store_raw=bool(payload.get("store_raw")), deadline=Deadline.from_config(budget),
+    )
+
+
+def _journal_insights_apply(job: AIJob, result) -> None:
+    summary, emotions, keywords = result
+    entry = db.session.get(JournalEntry, job.subject_id)
+    if entry is None or entry.is_deleted:
+        return
+    entry.ai_summary = summary.summary[:2000]
+    entry.ai_emotions = json.dumps(summary.detected_emotions or [])
+    entry.ai_keywords = json.dumps(keywords or [])
+    set_entry_tags(entry, summary.detected_emotions or [], keywords or [])
+    if emotions.scores:
+        label = emotions.primary_label or max(emotions.scores.items(), key=lambda kv: kv[1])[0]
+        record_snapshot(EmotionSnapshot(
+            user_id=entry.user_id, source="journal", score_map=json.dumps(emotions.scores),
+            label=label, created_at=datetime.utcnow(),
+        ))
+
+
+def _journal_insights_failed(job: AIJob, payload: Dict[str, Any]) -> None:
+    # Same fallback as the synchronous route: a provisional snapshot from the local lexicon.
+    from app.ai.tasks import provisional_emotions
+    entry = db.session.get(JournalEntry, job.subject_id)
+    local = provisional_emotions(payload.get("text", ""))
+    if entry is None or entry.is_deleted or local is None:
+        return
+    record_snapshot(EmotionSnapshot(
+        user_id=entry.user_id, source="journal_local", score_map=json.dumps(local.scores),
+        label=local.primary_label, created_at=datetime.utcnow(),
+    ))
+
+
+HANDLERS: Dict[str, JobHandler] = {
+    JOURNAL_INSIGHTS: JobHandler(
+        run=_journal_insights_run, apply=_journal_insights_apply, on_failure=_journal_insights_failed,
+    ),
+}
@@ -0,0 +1,208 @@
+"""Daily emotion rollups behind the Emotion Lens.
+
+The dashboard used to load every ``EmotionSnapshot`` in its window and decode each
+``score_map``. ``EmotionDailyRollup`` keeps one row per user and UTC day instead:
+- per-emotion ``[sum, count, max]`` of the scores;
+- how many snapshots carried each label;
+- the dominant label.
+A 30- or 365-day view then reads at most that many small rows, however many snapshots there are.
+
+Every snapshot insert goes through ``record_snapshot``. It adds the snapshot and folds it into
+its day's rollup in the caller's transaction, so the two are committed or rolled back together.
+The snapshot is flushed before the rollup is read. On SQLite that takes the write lock first, so
+two workers cannot both read the same old row. Elsewhere the read is ``SELECT ... FOR UPDATE``.
+
+``flask emotion-rollups-rebuild`` recomputes rollups from the snapshots. Use it for the initial
+backfill, or after snapshots were written or deleted some other way.
+"""
+from __future__ import annotations
+import json
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from ..extensions import db
+from ..model import EmotionDailyRollup, EmotionSnapshot
+from app.logging_config import get_logger, log_extra_safe
+
+log = get_logger("sahai.emotion_rollups")
+
+FALLBACK_LABEL = "neutral"  # label of a snapshot without label or scores (as the dashboard always did)
+
+
+def _scores(score_map: Optional[str]) -> Dict[str, float]:
+    try:
+        data = json.loads(score_map or "{}")
+    except (TypeError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    out = {}
+    for k, v in data.items():
+        try:
+            out[str(k)] = float(v or 0)
+        except (TypeError, ValueError):
+            continue
+    return out
+
+
+def _label(label: Optional[str], scores: Dict[str, float]) -> str:
+    if label:
+        return label
+    return max(scores.items(), key=lambda kv: kv[1])[0] if scores else FALLBACK_LABEL
+
+
+class DayStats:
+    """One day's aggregate (the decoded form of an EmotionDailyRollup row)."""
+
+    __slots__ = ("day", "snapshots", "stats", "label_counts")
+
+    def __init__(self, day: date, snapshots: int = 0, stats: Optional[Dict[str, List[float]]] = None,
+                 label_counts: Optional[Dict[str, int]] = None):
+        self.day = day
+        self.snapshots = snapshots
+        self.stats = stats if stats is not None else {}
+        self.label_counts = label_counts if label_counts is not None else {}
+
+    @classmethod
+    def from_row(cls, row) -> "DayStats":
+        return cls(row.day, row.snapshots or 0, json.loads(row.stats or "{}"), json.loads(row.label_counts or "{}"))
+
+    def add(self, scores: Dict[str, float], label: str) -> None:
+        self.snapshots += 1
+        self.label_counts[label] = self.label_counts.get(label, 0) + 1
+        for k, v in scores.items():
+            s = self.stats.get(k)
+            if s is None:
+                self.stats[k] = [v, 1, v]
+            else:
+                s[0] += v
+                s[1] += 1
+                s[2] = max(s[2], v)
+
+    @property
+    def dominant(self) -> Optional[str]:
+        """Most frequent label of the day; ties go to the higher summed score."""
+        if not self.label_counts:
+            return None
+        return max(self.label_counts, key=lambda k: (self.label_counts[k], self.stats.get(k, (0.0,))[0], k))
+
+    def mean(self, emotion: str) -> float:
+        """Average score over all of the day's snapshots (absent = 0)."""
+        s = self.stats.get(emotion)
+        return s[0] / self.snapshots if s and self.snapshots else 0.0
+
+    def label_mean(self, emotion: str) -> float:
+        """Average score over the snapshots that scored ``emotion``."""
+        s = self.stats.get(emotion)
+        return s[0] / s[1] if s and s[1] else 0.0
+
+    def columns(self) -> Dict[str, object]:
+        stats = {k: [round(s[0], 6), s[1], round(s[2], 6)] for k, s in self.stats.items()}
+        return {"snapshots": self.snapshots, "stats": json.dumps(stats, separators=(",", ":")),
+                "label_counts": json.dumps(self.label_counts, separators=(",", ":")), "dominant": self.dominant}
+
+
+def _locked_rollup(user_id: int, day: date) -> EmotionDailyRollup:
+    query = EmotionDailyRollup.query.filter_by(user_id=user_id, day=day).with_for_update()
+    row = query.first()
+    if row is not None:
+        return row
+    try:
+        with db.session.begin_nested():
+            row = EmotionDailyRollup(user_id=user_id, day=day, snapshots=0, stats="{}", label_counts="{}")
+            db.session.add(row)
+    except IntegrityError:
+        row = query.first()  # created concurrently
+    return row
+
+
+def record_snapshot(snap: EmotionSnapshot) -> EmotionSnapshot:
+    """Add ``snap`` and fold it into its day's rollup (in the current transaction; the caller commits)."""
+    if snap.created_at is None:
+        snap.created_at = datetime.utcnow()
+    db.session.add(snap)
+    db.session.flush()
+    scores = _scores(snap.score_map)
+    row = _locked_rollup(snap.user_id, snap.created_at.date())
+    day = DayStats.from_row(row)
+    day.add(scores, _label(snap.label, scores))
+    for k, v in day.columns().items():
+        setattr(row, k, v)
+    return snap
+
+
+def daily_stats(user_id: int, days: int, *, today: Optional[date] = None) -> List[DayStats]:
+    """The user's rollups for the last ``days`` days (today included), oldest first."""
+    today = today or datetime.utcnow().date()
+    rows = db.session.execute(
+        select(EmotionDailyRollup.day, EmotionDailyRollup.snapshots, EmotionDailyRollup.stats,
+               EmotionDailyRollup.label_counts)
+        .where(EmotionDailyRollup.user_id == user_id, EmotionDailyRollup.day > today - timedelta(days=days))
+        .order_by(EmotionDailyRollup.day.asc())
+    ).all()
+    return [DayStats.from_row(r) for r in rows]
+
+
+def _aggregate(snaps: Iterable[Tuple[int, datetime, Optional[str], Optional[str]]]) -> Dict[Tuple[int, date], DayStats]:
+    out: Dict[Tuple[int, date], DayStats] = {}
+    for user_id, created_at, score_map, label in snaps:
+        key = (user_id, created_at.date())
+        day = out.get(key)
+        if day is None:
+            day = out[key] = DayStats(key[1])
+        scores = _scores(score_map)
+        day.add(scores, _label(label, scores))
+    return out
+
+
+def rebuild_rollups(*, user_id: Optional[int] = None, since: Optional[date] = None,
+                    batch_users: Optional[int] = None,
+                    on_batch: Optional[Callable[[Dict[str, object]], None]] = None) -> Dict[str, object]:
+    """Recompute rollups from the snapshots, one transaction per ``batch_users`` users.
+
+    ``since`` limits the rebuild to days on or after it (older rollups are left alone).
+    """
+    batch_users = int(batch_users or current_app.config.get("EMOTION_ROLLUP_REBUILD_USERS", 100))
+    users_stmt = select(EmotionSnapshot.user_id).distinct().order_by(EmotionSnapshot.user_id)
+    if user_id is not None:
+        users_stmt = users_stmt.where(EmotionSnapshot.user_id == user_id)
+    user_ids = list(db.session.execute(users_stmt).scalars())
+    if user_id is not None and user_id not in user_ids:
+        user_ids.append(user_id)  # no snapshots left: still clear its rollups
+    snapshots = rows = batches = 0
+    t0 = time.monotonic()
+    for i in range(0, len(user_ids), batch_users):
+        tb = time.monotonic()
+        chunk = user_ids[i:i + batch_users]
+        stmt = (
+            select(EmotionSnapshot.user_id, EmotionSnapshot.created_at, EmotionSnapshot.score_map, EmotionSnapshot.label)
+            .where(EmotionSnapshot.user_id.in_(chunk))
+            .order_by(EmotionSnapshot.user_id, EmotionSnapshot.created_at)
+        )
+        wipe = delete(EmotionDailyRollup).where(EmotionDailyRollup.user_id.in_(chunk))
+        if since is not None:
+            stmt = stmt.where(EmotionSnapshot.created_at >= datetime.combine(since, datetime.min.time()))
+            wipe = wipe.where(EmotionDailyRollup.day >= since)
+        snaps = db.session.execute(stmt).all()
+        days = _aggregate(snaps)
+        db.session.execute(wipe)
+        now = datetime.utcnow()
+        values = [{"user_id": uid, "day": day, "updated_at": now, **stats.columns()} for (uid, day), stats in days.items()]
+        if values:
+            db.session.execute(insert(EmotionDailyRollup), values)
+        db.session.commit()
+        snapshots += len(snaps)
+        rows += len(values)
+        batches += 1
+        if on_batch is not None:
+            on_batch({"batch": batches, "users": len(chunk), "snapshots": len(snaps), "rollups": len(values),
+                      "dur_s": round(time.monotonic() - tb, 3)})
+    summary = {"users": len(user_ids), "snapshots": snapshots, "rollups": rows, "batches": batches,
+               "elapsed_s": round(time.monotonic() - t0, 2)}
+    log_extra_safe(log, "info", "emotion_rollups_rebuild", extra=summary)
+    return summary
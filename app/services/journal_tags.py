@@ -0,0 +1,212 @@
+"""Normalised emotion / keyword tags for journal entries.
+
+``JournalEntry.ai_emotions`` / ``ai_keywords`` stay as JSON strings (they are what the entry
+was saved with), but every write also records one ``JournalEntryTag`` row per tag, pointing at
+an interned ``JournalTag`` id. "Entries mentioning exams" and "how often was I anxious" are
+then answered from ``ix_journal_entry_tag_user_tag_created`` instead of decoding every row.
+
+Tags are written in the caller's transaction (``set_entry_tags`` flushes, never commits), so an
+entry and its tags are saved or rolled back together. Rows written before the tag tables existed
+are filled in by ``flask journal-tags-backfill``.
+"""
+from __future__ import annotations
+import json
+import re
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from flask import current_app
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from ..extensions import db
+from ..model import JournalEntry, JournalEntryTag, JournalTag
+from app.logging_config import get_logger, log_extra_safe
+
+log = get_logger("sahai.journal_tags")
+
+EMOTION = "emotion"
+KEYWORD = "keyword"
+KINDS = (EMOTION, KEYWORD)
+MAX_TAG_LEN = 64
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_tag(name) -> str:
+    return _SPACES.sub(" ", str(name or "")).strip().casefold()[:MAX_TAG_LEN].strip()
+
+
+def _clean(names: Iterable) -> List[str]:
+    """Normalised, de-duplicated tags in their original order."""
+    seen: Dict[str, None] = {}
+    for n in names or ():
+        tag = normalize_tag(n)
+        if tag:
+            seen.setdefault(tag, None)
+    return list(seen)
+
+
+def decode_tags(raw: Optional[str]) -> List[str]:
+    """The JSON list stored in ``ai_emotions`` / ``ai_keywords`` (anything malformed -> [])."""
+    if not raw:
+        return []
+    try:
+        data = json.loads(raw)
+    except (TypeError, ValueError):
+        return []
+    return [str(x) for x in data] if isinstance(data, list) else []
+
+
+def intern_tags(kind: str, names: Sequence[str]) -> Dict[str, int]:
+    """``{name: tag id}`` for already-normalised ``names``, inserting the ones not seen before."""
+    if not names:
+        return {}
+    wanted = set(names)
+    rows = db.session.execute(
+        select(JournalTag.name, JournalTag.id).where(JournalTag.kind == kind, JournalTag.name.in_(wanted))
+    ).all()
+    ids = {name: tag_id for name, tag_id in rows}
+    missing = [n for n in names if n not in ids]
+    if missing:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(JournalTag), [{"kind": kind, "name": n} for n in missing])
+        except IntegrityError:
+            # Another writer interned some of them first; theirs are as good as ours.
+            for n in missing:
+                try:
+                    with db.session.begin_nested():
+                        db.session.execute(insert(JournalTag), [{"kind": kind, "name": n}])
+                except IntegrityError:
+                    pass
+        rows = db.session.execute(
+            select(JournalTag.name, JournalTag.id).where(JournalTag.kind == kind, JournalTag.name.in_(missing))
+        ).all()
+        ids.update({name: tag_id for name, tag_id in rows})
+    return ids
+
+
+def _link_rows(entry_id: int, user_id: int, created_at: datetime,
+               tagged: Dict[str, List[str]], ids: Dict[str, Dict[str, int]]) -> List[Dict[str, object]]:
+    rows = []
+    for kind, names in tagged.items():
+        for pos, name in enumerate(names):
+            rows.append({"entry_id": entry_id, "tag_id": ids[kind][name], "user_id": user_id,
+                         "created_at": created_at, "position": pos})
+    return rows
+
+
+def set_entry_tags(entry: JournalEntry, emotions: Iterable, keywords: Iterable) -> None:
+    """Replace the entry's tag links (in the current transaction; the caller commits)."""
+    if entry.id is None or entry.created_at is None:
+        db.session.flush()
+    tagged = {EMOTION: _clean(emotions), KEYWORD: _clean(keywords)}
+    ids = {kind: intern_tags(kind, names) for kind, names in tagged.items()}
+    db.session.execute(delete(JournalEntryTag).where(JournalEntryTag.entry_id == entry.id))
+    rows = _link_rows(entry.id, entry.user_id, entry.created_at, tagged, ids)
+    if rows:
+        db.session.execute(insert(JournalEntryTag), rows)
+
+
+def clear_entry_tags(entry_id: int) -> None:
+    """Drop the links of a (soft-)deleted entry so it no longer shows up in filters and counts."""
+    db.session.execute(delete(JournalEntryTag).where(JournalEntryTag.entry_id == entry_id))
+
+
+def entry_tags(entry: JournalEntry) -> Tuple[List[str], List[str]]:
+    """(emotions, keywords) for one entry, from the links; JSON fallback for un-backfilled rows."""
+    rows = db.session.execute(
+        select(JournalTag.kind, JournalTag.name)
+        .join(JournalEntryTag, JournalEntryTag.tag_id == JournalTag.id)
+        .where(JournalEntryTag.entry_id == entry.id)
+        .order_by(JournalEntryTag.position)
+    ).all()
+    if not rows:
+        return decode_tags(entry.ai_emotions), decode_tags(entry.ai_keywords)
+    out: Dict[str, List[str]] = {EMOTION: [], KEYWORD: []}
+    for kind, name in rows:
+        out.setdefault(kind, []).append(name)
+    return out[EMOTION], out[KEYWORD]
+
+
+def _tag_id(kind: str, name: str) -> Optional[int]:
+    return db.session.execute(
+        select(JournalTag.id).where(JournalTag.kind == kind, JournalTag.name == normalize_tag(name))
+    ).scalar()
+
+
+def entries_with_tag(user_id: int, kind: str, name: str):
+    """Query of the user's entries carrying the tag, newest first (paginate it like any query)."""
+    tag_id = _tag_id(kind, name)
+    query = JournalEntry.query.join(JournalEntryTag, JournalEntryTag.entry_id == JournalEntry.id)
+    return (
+        query.filter(JournalEntryTag.user_id == user_id, JournalEntryTag.tag_id == (tag_id or -1))
+        .order_by(JournalEntryTag.created_at.desc())
+    )
+
+
+def tag_counts(user_id: int, kind: str, *, since: Optional[datetime] = None,
+               limit: Optional[int] = 10) -> List[Tuple[str, int]]:
+    """``[(tag, entries)]`` for the user, most frequent first."""
+    n = func.count(JournalEntryTag.entry_id)
+    stmt = (
+        select(JournalTag.name, n)
+        .join(JournalTag, JournalTag.id == JournalEntryTag.tag_id)
+        .where(JournalEntryTag.user_id == user_id, JournalTag.kind == kind)
+    )
+    if since is not None:
+        stmt = stmt.where(JournalEntryTag.created_at >= since)
+    stmt = stmt.group_by(JournalTag.name).order_by(n.desc(), JournalTag.name)
+    if limit:
+        stmt = stmt.limit(limit)
+    return [(name, count) for name, count in db.session.execute(stmt).all()]
+
+
+def backfill_entry_tags(*, batch_size: Optional[int] = None, start_id: int = 0,
+                        on_batch: Optional[Callable[[Dict[str, object]], None]] = None) -> Dict[str, object]:
+    """(Re)build the links of every entry from its JSON columns, one transaction per batch.
+
+    Walks the primary key in order, so it can be stopped and resumed with ``start_id``, and is
+    idempotent: a batch's links are replaced, not appended to.
+    """
+    batch_size = int(batch_size or current_app.config.get("JOURNAL_TAG_BACKFILL_BATCH", 500))
+    last_id = start_id
+    entries = links = batches = 0
+    t0 = time.monotonic()
+    while True:
+        tb = time.monotonic()
+        batch = db.session.execute(
+            select(JournalEntry.id, JournalEntry.user_id, JournalEntry.created_at, JournalEntry.is_deleted,
+                   JournalEntry.ai_emotions, JournalEntry.ai_keywords)
+            .where(JournalEntry.id > last_id)
+            .order_by(JournalEntry.id)
+            .limit(batch_size)
+        ).all()
+        if not batch:
+            break
+        tagged = {
+            row.id: {EMOTION: _clean(decode_tags(row.ai_emotions)), KEYWORD: _clean(decode_tags(row.ai_keywords))}
+            for row in batch if not row.is_deleted
+        }
+        ids = {kind: intern_tags(kind, _clean(n for t in tagged.values() for n in t[kind])) for kind in KINDS}
+        rows = []
+        for row in batch:
+            if row.id in tagged:
+                rows.extend(_link_rows(row.id, row.user_id, row.created_at, tagged[row.id], ids))
+        db.session.execute(delete(JournalEntryTag).where(JournalEntryTag.entry_id.in_([r.id for r in batch])))
+        if rows:
+            db.session.execute(insert(JournalEntryTag), rows)
+        db.session.commit()
+        last_id = batch[-1].id
+        entries += len(batch)
+        links += len(rows)
+        batches += 1
+        if on_batch is not None:
+            on_batch({"batch": batches, "size": len(batch), "links": len(rows), "last_id": last_id,
+                      "dur_s": round(time.monotonic() - tb, 3)})
+    summary = {"entries": entries, "links": links, "batches": batches, "last_id": last_id,
+               "elapsed_s": round(time.monotonic() - t0, 2)}
+    log_extra_safe(log, "info", "journal_tags_backfill", extra=summary)
+    return summary
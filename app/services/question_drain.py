@@ -0,0 +1,206 @@
+"""Drain Question Box items saved as "pending" while moderation was unavailable.
+
+Pending rows are read in id order through ``ix_question_status_id`` one batch at a time. Each
+batch is moderated (and answered) on a small thread pool, and the results are written back in
+one transaction. AI calls never touch the DB session.
+
+Recovery without a thundering herd:
+- before a batch, an open breaker for the moderation key pauses the drain for its cooldown
+  (shared across processes with ``AI_BREAKER_BACKEND=sqlite``);
+- concurrency slow-starts at 1 and doubles per clean batch up to ``concurrency``, and drops back
+  to 1 when a batch hits ``AIUnavailableError`` (the half-open probe then decides);
+- on such an error the rest of the batch is not submitted and stays pending.
+
+The adaptive limiter (app.ai.concurrency) still applies per call on top of this.
+"""
+from __future__ import annotations
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from flask import current_app
+
+from ..extensions import db
+from ..model import QuestionBoxItem
+from app.logging_config import get_logger, log_extra_safe
+from app.ai.breaker import get_breaker_registry
+from app.ai.deadline import Deadline
+from app.ai.exceptions import AISafetyError, AIStructuredOutputError, AITimeoutError, AIUnavailableError
+from app.ai.gemini_client import get_ai_client
+from app.ai.tasks import answer_user_question, moderate_and_answer_question, moderate_and_rewrite_peer_post
+
+log = get_logger("sahai.question_drain")
+
+# Per-item result: (item id, outcome, fields to set). outcome: answered | flagged | deferred
+_Result = Tuple[int, str, Dict[str, object]]
+
+
+@dataclass
+class DrainStats:
+    answered: int = 0
+    flagged: int = 0
+    deferred: int = 0
+    batches: int = 0
+    breaker_waits: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def processed(self) -> int:
+        return self.answered + self.flagged
+
+    def as_dict(self, backlog: int) -> Dict[str, object]:
+        elapsed = max(1e-9, time.monotonic() - self.started)
+        return {
+            "answered": self.answered, "flagged": self.flagged, "deferred": self.deferred,
+            "batches": self.batches, "breaker_waits": self.breaker_waits,
+            "elapsed_s": round(elapsed, 2), "items_per_s": round(self.processed / elapsed, 2),
+            "backlog": backlog,
+        }
+
+
+def backlog_size() -> int:
+    return QuestionBoxItem.query.filter_by(status="pending").count()
+
+
+def _breaker_key() -> str:
+    suffix = "moderate_and_answer" if current_app.config.get("AI_QA_COMBINED_ENABLED", True) else "moderate_peer_post"
+    return f"{get_ai_client().text_model_name}:text:{suffix}"
+
+
+def _process(app, item_id: int, text: str, language: str) -> _Result:
+    """Moderate + answer one question (worker thread; no DB access)."""
+    with app.app_context():
+        deadline = Deadline.from_config()
+        try:
+            answer = None
+            if app.config.get("AI_QA_COMBINED_ENABLED", True):
+                mod, answer = moderate_and_answer_question(text, language, deadline=deadline)
+            else:
+                mod = moderate_and_rewrite_peer_post(text, language, deadline=deadline)
+            if not mod.safe:
+                return item_id, "flagged", {
+                    "status": "flagged", "is_flagged": True,
+                    "flag_reason": mod.reason[:255] if mod.reason else "unsafe",
+                }
+            if answer is None:
+                answer = answer_user_question(mod.suggested_rewrite or text, language, deadline=deadline)
+            return item_id, "answered", {
+                "status": "answered", "question_text": mod.suggested_rewrite or text,
+                "ai_answer_text": answer.answer, "language": answer.language or language,
+                "is_flagged": False, "flag_reason": None,
+            }
+        except AISafetyError:
+            return item_id, "flagged", {"status": "flagged", "is_flagged": True, "flag_reason": "safety"}
+        except ValueError:
+            # Empty / over-long text can never be answered; don't keep retrying it.
+            return item_id, "flagged", {"status": "flagged", "is_flagged": True, "flag_reason": "invalid_length"}
+        except (AIUnavailableError, AITimeoutError, AIStructuredOutputError) as e:
+            return item_id, "deferred", {"etype": type(e).__name__}
+
+
+def _run_batch(items: List[QuestionBoxItem], workers: int) -> List[_Result]:
+    app = current_app._get_current_object()
+    jobs = [(it.id, it.question_text, it.language or "en") for it in items]
+    results: List[_Result] = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="qdrain") as pool:
+        queue = iter(jobs)
+        running = {pool.submit(_process, app, *job) for job in (next(queue, None) for _ in range(workers)) if job}
+        stop = False
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                res = fut.result()
+                results.append(res)
+                if res[1] == "deferred" and res[2].get("etype") == "AIUnavailableError":
+                    stop = True  # provider down / breaker open: stop feeding the pool
+                job = None if stop else next(queue, None)
+                if job is not None:
+                    running.add(pool.submit(_process, app, *job))
+    return results
+
+
+def _apply(results: List[_Result], stats: DrainStats) -> None:
+    updates = {item_id: fields for item_id, outcome, fields in results if outcome != "deferred"}
+    stats.deferred += sum(1 for _, outcome, _ in results if outcome == "deferred")
+    if not updates:
+        return
+    # Only rows still pending: a concurrent drain (or an admin) may have handled some already.
+    rows = QuestionBoxItem.query.filter(QuestionBoxItem.id.in_(list(updates)), QuestionBoxItem.status == "pending").all()
+    for row in rows:
+        for name, value in updates[row.id].items():
+            setattr(row, name, value)
+        if row.status == "answered":
+            stats.answered += 1
+        else:
+            stats.flagged += 1
+    db.session.commit()
+
+
+def drain_pending(
+    *,
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    max_items: Optional[int] = None,
+    loop: bool = False,
+    poll_s: Optional[float] = None,
+    on_batch=None,
+) -> Dict[str, object]:
+    """Process pending items until the backlog is empty (or forever with ``loop``)."""
+    cfg = current_app.config
+    batch_size = int(batch_size or cfg.get("QUESTION_DRAIN_BATCH", 20))
+    concurrency = max(1, int(concurrency or cfg.get("QUESTION_DRAIN_CONCURRENCY", 4)))
+    poll_s = float(poll_s if poll_s is not None else cfg.get("QUESTION_DRAIN_POLL_S", 30))
+    stats = DrainStats()
+    workers = 1
+    last_id = 0
+    key = _breaker_key()
+    breakers = get_breaker_registry()
+
+    while max_items is None or stats.processed + stats.deferred < max_items:
+        wait_s = breakers.cooldown_left(key)
+        if wait_s > 0:
+            stats.breaker_waits += 1
+            workers = 1
+            if not loop:
+                break
+            # Jitter so several drainers don't all probe the moment the breaker half-opens.
+            time.sleep(wait_s + random.uniform(0, 1.0))
+            continue
+        limit = batch_size if max_items is None else min(batch_size, max_items - stats.processed - stats.deferred)
+        items = (
+            QuestionBoxItem.query.filter(QuestionBoxItem.status == "pending", QuestionBoxItem.id > last_id)
+            .order_by(QuestionBoxItem.id.asc())
+            .limit(limit)
+            .all()
+        )
+        if not items:
+            if not loop:
+                break
+            last_id = 0  # start over so deferred items get another pass
+            db.session.remove()
+            time.sleep(poll_s)
+            continue
+        last_id = items[-1].id
+        t0 = time.monotonic()
+        results = _run_batch(items, min(workers, len(items)))
+        _apply(results, stats)
+        stats.batches += 1
+        unavailable = any(r[1] == "deferred" and r[2].get("etype") == "AIUnavailableError" for r in results)
+        workers = 1 if unavailable else min(concurrency, workers * 2)
+        batch_info = {
+            "batch": stats.batches, "size": len(items), "done": sum(1 for r in results if r[1] != "deferred"),
+            "deferred": sum(1 for r in results if r[1] == "deferred"), "dur_s": round(time.monotonic() - t0, 2),
+            "next_workers": workers,
+        }
+        log_extra_safe(log, "info", "question_drain_batch", extra=batch_info)
+        if on_batch is not None:
+            on_batch(batch_info)
+        if unavailable:
+            if not loop:
+                break
+            last_id = 0  # unsubmitted items of this batch are still pending; rescan after the breaker check
+    summary = stats.as_dict(backlog_size())
+    log_extra_safe(log, "info", "question_drain_done", extra=summary)
+    return summary
@@ -14,6 +14,8 @@ from ..model import (
     User, JournalEntry, EmotionSnapshot, GratitudeEntry, CulturalStory,
     ExamTip, PeerWallPost, MeditationScript, MediaAsset, AppSetting, FutureLetter
 )
+from .emotion_rollups import record_snapshot
+from .journal_tags import set_entry_tags
 from werkzeug.security import generate_password_hash
 import os
 import secrets
@@ -49,6 +51,8 @@ def _seed_journal_and_emotions(user: User):
             visibility="private",
         )
         db.session.add_all([je1, je2])
+        set_entry_tags(je1, ["anxious", "hopeful"], ["study", "breathing"])
+        set_entry_tags(je2, ["calm", "hopeful"], ["walk", "calm"])
         db.session.commit()
 
         # Emotion snapshots
@@ -65,7 +69,8 @@ def _seed_journal_and_emotions(user: User):
             score_map=json.dumps({"calm": 0.7, "anxious": 0.2, "hopeful": 0.6}),
             label="calm",
         )
-        db.session.add_all([snap1, snap2])
+        record_snapshot(snap1)
+        record_snapshot(snap2)
         db.session.commit()
 
 
@@ -197,14 +202,14 @@ def seed() -> None:
             visibility="private",
         )
         db.session.add(je)
-        db.session.flush()
+        set_entry_tags(je, ["anxious", "hopeful"], ["exam", "breathing", "win"])
         snap = EmotionSnapshot(
             user_id=demo.id,
             source="journal",
             score_map=json.dumps({"anxious": 0.4, "hopeful": 0.5}),
             label="hopeful",
         )
-        db.session.add(snap)
+        record_snapshot(snap)
 
     # Peer posts
     if PeerWallPost.query.filter_by(status="published").count() == 0:
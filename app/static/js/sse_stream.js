@@ -0,0 +1,82 @@
+/* Progressive SSE streaming for long-form AI outputs (story, meditation, Q&A).
+ * A form with data-sse-url posts via fetch and reads text/event-stream frames:
+ *   token  -> appended to the live preview (prose only; the server strips the JSON)
+ *   final  -> rendered (or followed if it carries a url)
+ *   crisis -> navigate to the grounding page; pending / flagged -> the saved item
+ *   error  -> message shown; the form stays usable.
+ * Without fetch streaming support the form submits normally.
+ */
+(function () {
+  if (!window.fetch || !window.ReadableStream || !window.TextDecoder) return;
+
+  function esc(s) {
+    const d = document.createElement("div");
+    d.textContent = s == null ? "" : String(s);
+    return d.innerHTML;
+  }
+
+  const renderers = {
+    story: (o, form) => `<div class="card rounded-4 shadow-sm"><div class="card-body">
+      <span class="badge bg-success rounded-pill mb-2">${esc(o.language)}</span>
+      <h2 class="h5">${esc(o.title)}</h2><p class="mb-2">${esc(o.story)}</p>
+      <div class="alert alert-info rounded-3"><strong>Moral:</strong> ${esc(o.moral)}</div></div></div>
+      <form method="POST" class="mt-2">
+        <input type="hidden" name="csrf_token" value="${esc((form.querySelector("[name=csrf_token]") || {}).value)}">
+        <input type="hidden" name="theme" value="${esc((form.querySelector("[name=theme]") || {}).value)}">
+        <input type="hidden" name="action" value="save">
+        <button class="btn btn-outline-success rounded-pill"><i class="bi bi-download"></i> Save Story</button>
+      </form>`,
+    meditation: (o) => `<h2 class="h6">${esc(o.title)} • ${Math.round((o.duration_sec || 0) / 60)} min</h2><hr>
+      <ol class="mt-3">${(o.steps || []).map((s) => `<li class="mb-2 step-line">${esc(s)}</li>`).join("")}</ol>`,
+  };
+
+  function parseFrames(buffer, onFrame) {
+    let idx;
+    while ((idx = buffer.indexOf("\n\n")) !== -1) {
+      const raw = buffer.slice(0, idx);
+      buffer = buffer.slice(idx + 2);
+      let event = "message", data = "";
+      raw.split("\n").forEach((line) => {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      });
+      try { onFrame(event, data ? JSON.parse(data) : null); } catch (e) { /* ignore bad frame */ }
+    }
+    return buffer;
+  }
+
+  document.querySelectorAll("form[data-sse-url]").forEach((form) => {
+    const target = document.querySelector(form.dataset.sseTarget);
+    if (!target) return;
+    form.addEventListener("submit", async (ev) => {
+      ev.preventDefault();
+      const btn = form.querySelector("[type=submit]");
+      if (btn) btn.disabled = true;
+      target.innerHTML = '<pre class="sse-preview small text-muted mb-0" style="white-space:pre-wrap"></pre>';
+      const preview = target.querySelector("pre");
+      const render = renderers[form.dataset.sseRender];
+      try {
+        const resp = await fetch(form.dataset.sseUrl, { method: "POST", body: new FormData(form), credentials: "same-origin" });
+        const reader = resp.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        for (;;) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer = parseFrames(buffer + decoder.decode(value, { stream: true }), (event, data) => {
+            if (event === "token") preview.textContent += data.text;
+            else if (event === "final") {
+              if (data.url) window.location = data.url;
+              else target.innerHTML = render ? render(data, form) : esc(JSON.stringify(data));
+            } else if (data && (data.redirect || data.url)) window.location = data.redirect || data.url;
+            else if (event === "error") target.innerHTML = `<div class="alert alert-warning rounded-3">${esc(data.message)}</div>`;
+          });
+        }
+      } catch (e) {
+        target.innerHTML = '<div class="alert alert-warning rounded-3">Connection lost. Please try again.</div>';
+      } finally {
+        if (btn) btn.disabled = false;
+      }
+    });
+  });
+})();
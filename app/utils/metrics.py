@@ -0,0 +1,253 @@
+"""Dependency-free Prometheus-style metrics (counters, gauges, fixed-bucket histograms).
+
+Each process records into an in-memory registry. Every ``METRICS_FLUSH_INTERVAL_S`` a worker
+writes its full snapshot to a host-local SQLite file (one row per pid); ``/metrics`` merges the
+rows of all live workers and renders the text exposition format (gauges are summed, so
+per-worker limits add up to the host total). With ``METRICS_DB_PATH=""`` only the serving
+process's own numbers are exported.
+"""
+from __future__ import annotations
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from flask import current_app
+
+from app.logging_config import get_logger, log_extra_safe
+
+log = get_logger("metrics")
+
+_ROUTE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+_AI_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+_SQL_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# name -> (type, help, buckets)
+METRICS: Dict[str, Tuple[str, str, Tuple[float, ...]]] = {
+    "http_request_duration_seconds": ("histogram", "Route latency by endpoint, method and status.", _ROUTE_BUCKETS),
+    "sql_queries_per_request": ("histogram", "SQL statements executed per request by endpoint.", _SQL_BUCKETS),
+    "ai_call_duration_seconds": ("histogram", "Provider call latency by breaker key, attempt and outcome.", _AI_BUCKETS),
+    "ai_retries_total": ("counter", "AI call attempts that failed and will be retried.", ()),
+    "ai_breaker_open_total": ("counter", "AI calls rejected because the circuit breaker was open.", ()),
+    "ai_json_parse_total": ("counter", "Structured output parses by outcome (clean, repaired, failed).", ()),
+    "ai_json_repairs_total": ("counter", "Repairs applied to structured output by kind (closed_string, dropped_incomplete, ...).", ()),
+    "ai_limiter_limit": ("gauge", "Adaptive in-flight limit per breaker key.", ()),
+    "ai_limiter_inflight": ("gauge", "In-flight provider calls per breaker key.", ()),
+    "ai_limiter_queued": ("gauge", "Callers waiting for a limiter slot per breaker key.", ()),
+    "ai_limiter_rejected_total": ("counter", "Calls rejected by the adaptive limiter.", ()),
+    "ai_vision_bytes_total": ("counter", "Image bytes received for vision calls vs. sent after preprocessing.", ()),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics_snapshot (
+    pid INTEGER PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._gauges: Dict[Tuple[str, LabelKey], float] = {}
+        # (name, labels) -> [per-bucket counts (non-cumulative, +Inf last), sum, count]
+        self._hists: Dict[Tuple[str, LabelKey], list] = {}
+
+    def _check_fork(self) -> None:
+        # A registry inherited across fork would double-count the parent's numbers.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._counters = {}
+            self._gauges = {}
+            self._hists = {}
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._check_fork()
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._check_fork()
+            self._gauges[key] = float(value)
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        buckets = METRICS[name][2]
+        key = (name, _label_key(labels))
+        idx = len(buckets)
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                idx = i
+                break
+        with self._lock:
+            self._check_fork()
+            h = self._hists.get(key)
+            if h is None:
+                h = self._hists[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+            h[0][idx] += 1
+            h[1] += value
+            h[2] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._check_fork()
+            return {
+                "c": [[n, list(map(list, lk)), v] for (n, lk), v in self._counters.items()],
+                "g": [[n, list(map(list, lk)), v] for (n, lk), v in self._gauges.items()],
+                "h": [[n, list(map(list, lk)), list(h[0]), h[1], h[2]] for (n, lk), h in self._hists.items()],
+            }
+
+
+def merge_snapshots(snaps: Iterable[dict]) -> dict:
+    counters: Dict[Tuple[str, LabelKey], float] = {}
+    gauges: Dict[Tuple[str, LabelKey], float] = {}
+    hists: Dict[Tuple[str, LabelKey], list] = {}
+    for snap in snaps:
+        for n, lk, v in snap.get("c", []):
+            key = (n, tuple(tuple(p) for p in lk))
+            counters[key] = counters.get(key, 0.0) + v
+        for n, lk, v in snap.get("g", []):
+            key = (n, tuple(tuple(p) for p in lk))
+            gauges[key] = gauges.get(key, 0.0) + v
+        for n, lk, counts, total, count in snap.get("h", []):
+            if n not in METRICS or len(counts) != len(METRICS[n][2]) + 1:
+                continue  # bucket layout changed between deploys
+            key = (n, tuple(tuple(p) for p in lk))
+            h = hists.get(key)
+            if h is None:
+                h = hists[key] = [[0] * len(counts), 0.0, 0]
+            h[0] = [a + b for a, b in zip(h[0], counts)]
+            h[1] += total
+            h[2] += count
+    return {"c": counters, "g": gauges, "h": hists}
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(lk: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(lk) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _fmt_num(v: float) -> str:
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+def render(merged: dict) -> str:
+    lines: List[str] = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind in ("counter", "gauge"):
+            for (n, lk), v in sorted(merged["c" if kind == "counter" else "g"].items()):
+                if n == name:
+                    lines.append(f"{name}{_fmt_labels(lk)} {_fmt_num(v)}")
+            continue
+        for (n, lk), (counts, total, count) in sorted(merged["h"].items()):
+            if n != name:
+                continue
+            cum = 0
+            for bound, c in zip(list(buckets) + ["+Inf"], counts):
+                cum += c
+                le = bound if bound == "+Inf" else _fmt_num(bound)
+                lines.append(f"{name}_bucket{_fmt_labels(lk, ('le', le))} {cum}")
+            lines.append(f"{name}_sum{_fmt_labels(lk)} {_fmt_num(total)}")
+            lines.append(f"{name}_count{_fmt_labels(lk)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+class _SharedSnapshots:
+    def __init__(self, path: str, stale_s: float):
+        from app.ai.local_store import LocalSQLite
+        self.db = LocalSQLite(path, schema=_SCHEMA)
+        self.stale_s = stale_s
+
+    def write(self, snap: dict) -> None:
+        self.db.conn().execute(
+            "INSERT OR REPLACE INTO metrics_snapshot (pid, data, updated_at) VALUES (?, ?, ?)",
+            (os.getpid(), json.dumps(snap), time.time()),
+        )
+
+    def read_all(self) -> List[dict]:
+        conn = self.db.conn()
+        # Rows of workers that stopped flushing long ago (restarted / recycled) are dropped;
+        # Prometheus treats the resulting decrease as a counter reset.
+        conn.execute("DELETE FROM metrics_snapshot WHERE updated_at < ?", (time.time() - self.stale_s,))
+        return [json.loads(r[0]) for r in conn.execute("SELECT data FROM metrics_snapshot")]
+
+
+_registry = MetricsRegistry()
+_shared: Optional[_SharedSnapshots] = None
+_shared_lock = threading.Lock()
+_last_flush = 0.0
+
+
+def inc(name: str, value: float = 1.0, **labels) -> None:
+    _registry.inc(name, value, **labels)
+
+
+def set_gauge(name: str, value: float, **labels) -> None:
+    _registry.set_gauge(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels) -> None:
+    _registry.observe(name, value, **labels)
+
+
+def _get_shared() -> Optional[_SharedSnapshots]:
+    global _shared
+    if _shared is None:
+        from app.ai.local_store import resolve_store_path
+        path = resolve_store_path("METRICS_DB_PATH", "metrics.sqlite3")
+        if not path:
+            return None
+        with _shared_lock:
+            if _shared is None:
+                _shared = _SharedSnapshots(path, float(current_app.config.get("METRICS_STALE_S", 3600)))
+    return _shared
+
+
+def flush(force: bool = False) -> None:
+    """Publish this worker's snapshot for cross-worker aggregation (rate-limited unless forced)."""
+    global _last_flush
+    now = time.monotonic()
+    if not force and now - _last_flush < float(current_app.config.get("METRICS_FLUSH_INTERVAL_S", 5)):
+        return
+    _last_flush = now
+    try:
+        shared = _get_shared()
+        if shared is not None:
+            shared.write(_registry.snapshot())
+    except sqlite3.Error as e:
+        log_extra_safe(log, "warning", "metrics_flush_fail", extra={"etype": type(e).__name__})
+
+
+def exposition() -> str:
+    flush(force=True)
+    snaps: List[dict] = []
+    try:
+        shared = _get_shared()
+        if shared is not None:
+            snaps = shared.read_all()
+    except sqlite3.Error as e:
+        log_extra_safe(log, "warning", "metrics_read_fail", extra={"etype": type(e).__name__})
+    if not snaps:
+        snaps = [_registry.snapshot()]
+    return render(merge_snapshots(snaps))
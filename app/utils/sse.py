@@ -0,0 +1,19 @@
+from __future__ import annotations
+import json
+from typing import Any, Iterable
+
+from flask import Response, stream_with_context
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Events frame (data is JSON-encoded)."""
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def sse_response(frames: Iterable[str]) -> Response:
+    """Stream frames with request context kept alive and proxy buffering disabled."""
+    resp = Response(stream_with_context(frames), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
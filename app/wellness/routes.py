@@ -13,10 +13,15 @@ from . import wellness_bp
 from app.utils.tracing import trace_route
 from ..extensions import db, limiter
 from ..model import EmotionSnapshot, MeditationScript, Doodle, CulturalStory as StoryModel, ResiliencePrompt, SafetyEvent
+from ..services.emotion_rollups import record_snapshot
 from ..ai.tasks import (
-    build_meditation_for_user, vision_describe_image, generate_cultural_story, create_resilience_prompts, check_crisis_paths, NoMoodSelectedError
+    build_meditation_for_user, vision_describe_image, generate_cultural_story, create_resilience_prompts, check_crisis_paths, NoMoodSelectedError,
+    stream_cultural_story, stream_meditation_for_user,
 )
+from ..ai.exceptions import AIConfigError, AISafetyError, AIStructuredOutputError, AITimeoutError, AIUnavailableError
+from app.utils.sse import sse_event, sse_response
 from app.utils.mood_resolver import latest_detected_mood_for_current_user
+from ..ai.emotion_lexicon import score_emotions
 from .forms import MeditationForm, DoodleUploadForm, StoryForm, ResilienceContextForm
 
 
@@ -28,35 +33,6 @@ def _latest_emotion_label() -> str | None:
     return latest_detected_mood_for_current_user()
 
 
-def _infer_label_from_text(text: str) -> str:
-    low = (text or "").lower()
-    for k in [
-        "calm",
-        "anxious",
-        "sad",
-        "angry",
-        "hopeful",
-        "tired",
-        "stressed",
-        "motivated",
-        "happy",
-        "lonely",
-        "confused",
-        "grateful",
-        "excited",
-        "frustrated",
-        "guilty",
-        "embarrassed",
-        "insecure",
-        "relieved",
-        "proud",
-    ]:
-        if k in low:
-            return k
-
-    return None
-
-
 def _save_image_from_data_url(data_url: str) -> tuple[bool, str | None, str]:
     """
     Accepts a data URL like: data:image/png;base64,XXXXX
@@ -130,6 +106,46 @@ def meditation():
     return render_template("wellness/meditation.html", form=form, detected=detected, chosen_emotions=chosen_emotions, plan=plan)
 
 
+@wellness_bp.route("/wellness/meditation/stream", methods=["POST"], endpoint="wellness_meditation_stream")
+@login_required
+@limiter.limit("30 per hour")
+@trace_route("wellness.wellness_meditation_stream")
+def meditation_stream():
+    """SSE twin of the meditation form: pushes tokens, then the validated plan (persisted like the form)."""
+    form = MeditationForm()
+    if not form.validate_on_submit():
+        return sse_response([sse_event("error", {"message": "Invalid form submission."})])
+    chosen_emotions = [e.strip().lower() for e in (form.emotions.data or "").split(",") if e.strip()]
+    if not chosen_emotions:
+        detected = _latest_emotion_label()
+        chosen_emotions = [detected] if detected else []
+    if not chosen_emotions:
+        return sse_response([sse_event("error", {"message": "Please choose a mood before generating a meditation."})])
+    duration = int(form.duration_hint.data or "180")
+    language = current_user.language_pref or "en"
+
+    def frames():
+        try:
+            for kind, value in stream_meditation_for_user(chosen_emotions, duration, language):
+                if kind == "token":
+                    yield sse_event("token", {"text": value})
+                    continue
+                ms = MeditationScript(
+                    user_id=current_user.id,
+                    context_mood=",".join(chosen_emotions),
+                    script_text="\n".join(value.steps),
+                    duration_sec=int(value.duration_sec),
+                )
+                db.session.add(ms)
+                db.session.commit()
+                yield sse_event("final", value.model_dump())
+        except (AITimeoutError, AIUnavailableError, AIStructuredOutputError, AIConfigError, AISafetyError) as e:
+            db.session.rollback()
+            yield sse_event("error", {"message": "Meditation could not be generated. Please try again.", "etype": type(e).__name__})
+
+    return sse_response(frames())
+
+
 # -------- Routes: Doodle --------
 @wellness_bp.route("/wellness/doodle/new", methods=["GET", "POST"], endpoint="wellness_doodle_new")
 @login_required
@@ -166,17 +182,18 @@ def doodle_new():
         db.session.add(doodle)
         db.session.commit()
 
-        # Add a soft EmotionSnapshot (source='doodle'); naive label from text
-        label = _infer_label_from_text(interpretation)
-        snap = EmotionSnapshot(
-            user_id=current_user.id,
-            source="doodle",
-            score_map=json.dumps({label: 0.7}),
-            label=label,
-            created_at=datetime.utcnow(),
-        )
-        db.session.add(snap)
-        db.session.commit()
+        # Add a soft EmotionSnapshot (source='doodle') scored locally from the interpretation
+        local = score_emotions(interpretation)
+        if local.label is not None:
+            snap = EmotionSnapshot(
+                user_id=current_user.id,
+                source="doodle",
+                score_map=json.dumps(local.scores),
+                label=local.label,
+                created_at=datetime.utcnow(),
+            )
+            record_snapshot(snap)
+            db.session.commit()
 
         flash("Saved your doodle 🎨", "success")
         return redirect(url_for("wellness.wellness_doodle_detail", doodle_id=doodle.id))
@@ -225,6 +242,37 @@ def story():
     return render_template("wellness/story.html", form=form, story=story_obj)
 
 
+@wellness_bp.route("/wellness/story/stream", methods=["POST"], endpoint="wellness_story_stream")
+@login_required
+@limiter.limit("20 per hour")
+@trace_route("wellness.wellness_story_stream")
+def story_stream():
+    """SSE twin of the story form: pushes tokens, then the validated story for the Save form."""
+    form = StoryForm()
+    if not form.validate_on_submit():
+        return sse_response([sse_event("error", {"message": "Invalid form submission."})])
+    theme = form.theme.data
+    crisis = check_crisis_paths(theme or "")
+    if crisis.triggered:
+        ev = SafetyEvent(user_id=current_user.id, event_type="rate_limit", event_details=json.dumps({"source": "story"}))
+        db.session.add(ev)
+        db.session.commit()
+        return sse_response([sse_event("crisis", {"redirect": url_for("journal.journal_grounding")})])
+    language = current_user.language_pref or "en"
+
+    def frames():
+        try:
+            for kind, value in stream_cultural_story(theme, language):
+                if kind == "token":
+                    yield sse_event("token", {"text": value})
+                else:
+                    yield sse_event("final", value.model_dump())
+        except (AITimeoutError, AIUnavailableError, AIStructuredOutputError, AIConfigError, AISafetyError) as e:
+            yield sse_event("error", {"message": "Story could not be generated. Please try again.", "etype": type(e).__name__})
+
+    return sse_response(frames())
+
+
 # -------- Routes: Resilience Prompts --------
 @wellness_bp.route("/wellness/prompts", methods=["GET", "POST"], endpoint="wellness_prompts")
 @login_required
@@ -0,0 +1,65 @@
+"""Throughput of the compiled crisis detector (app.ai.crisis_lexicon) vs. the old substring loop.
+
+Scans texts of growing size with the built-in lexicon and with synthetic lexicons of 1k / 10k
+extra phrases. Usage: python benchmarks/bench_crisis_detector.py [--n 20]
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ai.crisis_lexicon import CrisisDetector, build_lexicon  # noqa: E402
+
+CONFIG_WORDS = ["suicide", "kill myself", "end my life", "hurt myself",
+                "self-harm", "cut myself", "i want to die", "no reason to live"]
+FILLER = ("Today was long and my exams are close. Aaj bahut tension thi, par dost ke saath chai "
+          "pee aur thoda better laga. आज मौसम अच्छा था और मैंने थोड़ा पढ़ाई की। ")
+
+
+def _synthetic(n: int, rng: random.Random) -> dict:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = ["".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(max(50, n // 4))]
+    phrases = {" ".join(rng.sample(words, rng.randint(1, 3))): 0.6 for _ in range(n)}
+    return {"synthetic": phrases}
+
+
+def _naive(words, text: str) -> bool:
+    low = text.lower()
+    return any(w in low for w in words)
+
+
+def _time(fn, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20)
+    args = ap.parse_args()
+    rng = random.Random(7)
+    # No crisis phrase in the text: the worst case for both (every phrase / position is tried).
+    texts = {size: (FILLER * (size // len(FILLER) + 1))[:size] for size in (2_000, 50_000, 500_000)}
+    for label, extra in (("built-in", None), ("+1k", _synthetic(1_000, rng)), ("+10k", _synthetic(10_000, rng))):
+        lexicon = build_lexicon(CONFIG_WORDS, extra)
+        flat = [p.rstrip("*") for phrases in lexicon.values() for p in phrases]
+        t0 = time.perf_counter()
+        det = CrisisDetector(lexicon)
+        build_ms = (time.perf_counter() - t0) * 1000
+        print(f"lexicon {label}: {det.size} phrases, compiled in {build_ms:.0f} ms")
+        for size, text in texts.items():
+            n = max(1, args.n * 2_000 // size)
+            compiled = _time(lambda: det.detect(text), n)
+            naive = _time(lambda: _naive(flat, text), n)
+            print(f"  {size:>7} chars: compiled {compiled * 1000:8.2f} ms ({size / compiled / 1e6:6.1f} MB/s)"
+                  f" | substring loop {naive * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
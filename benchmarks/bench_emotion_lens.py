@@ -0,0 +1,100 @@
+"""Emotion Lens data path: aggregate raw snapshots (old) vs. read daily rollups (new).
+
+Seeds one user with N snapshots per day over a year into a temporary SQLite file, builds the
+rollups with ``rebuild_rollups`` and times both ways of producing the 30-day and 365-day views.
+
+Usage: python benchmarks/bench_emotion_lens.py [--per-day 2 8 32] [--n 20]
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+
+import config  # noqa: E402
+from app import create_app  # noqa: E402
+from app.ai.schemas import EMOTION_KEY_ORDER  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.model import EmotionSnapshot, User  # noqa: E402
+from app.services.emotion_rollups import daily_stats, rebuild_rollups  # noqa: E402
+
+
+def _old_view(user_id: int, days: int) -> int:
+    """The previous emotion_lens aggregation, verbatim in effect."""
+    since = datetime.utcnow() - timedelta(days=days)
+    snaps = (EmotionSnapshot.query.filter(EmotionSnapshot.user_id == user_id)
+             .filter(EmotionSnapshot.created_at >= since).order_by(EmotionSnapshot.created_at.asc()).all())
+    dist, heat = {}, []
+    for s in snaps:
+        scores = json.loads(s.score_map or "{}")
+        label = s.label or max(scores.items(), key=lambda kv: kv[1])[0]
+        dist[label] = dist.get(label, 0) + 1
+        heat.append([round(float(scores.get(k, 0)), 3) for k in EMOTION_KEY_ORDER])
+    return len(snaps)
+
+
+def _new_view(user_id: int, days: int) -> int:
+    rollups = daily_stats(user_id, days)
+    dist, heat = {}, []
+    for d in rollups:
+        for label, n in d.label_counts.items():
+            dist[label] = dist.get(label, 0) + n
+        heat.append([round(d.mean(k), 3) for k in EMOTION_KEY_ORDER])
+    return len(rollups)
+
+
+def _time(fn, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+        db.session.remove()
+    return (time.perf_counter() - t0) / n
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--per-day", type=int, nargs="+", default=[2, 8, 32])
+    ap.add_argument("--n", type=int, default=20)
+    args = ap.parse_args()
+    rng = random.Random(3)
+    keys = list(EMOTION_KEY_ORDER)
+    for per_day in args.per_day:
+        with tempfile.TemporaryDirectory() as tmp:
+            app = create_app(type("BenchConfig", (config.TestingConfig,), {
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp}/lens.db"}))
+            with app.app_context():
+                db.create_all()
+                user = User(username="bench", email="bench@example.com")
+                user.set_password("x")
+                db.session.add(user)
+                db.session.commit()
+                now = datetime.utcnow()
+                rows = []
+                for d in range(365):
+                    for i in range(per_day):
+                        scores = {k: round(rng.random(), 3) for k in rng.sample(keys, 4)}
+                        rows.append({"user_id": user.id, "source": "journal", "score_map": json.dumps(scores),
+                                     "label": max(scores, key=scores.get),
+                                     "created_at": now - timedelta(days=d, minutes=i)})
+                db.session.execute(insert(EmotionSnapshot), rows)
+                db.session.commit()
+                rebuild_rollups()
+                print(f"{per_day} snapshots/day ({len(rows)} total):")
+                for days in (30, 365):
+                    old = _time(lambda: _old_view(user.id, days), args.n)
+                    new = _time(lambda: _new_view(user.id, days), args.n)
+                    print(f"  {days:>3} days: snapshots {old * 1e3:8.2f} ms | rollups {new * 1e3:6.2f} ms "
+                          f"({old / new:5.1f}x)")
+                db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Micro-benchmark for the local lexicon emotion scorer (app.ai.emotion_lexicon).
+
+Usage: python benchmarks/bench_emotion_lexicon.py [--n 20000]
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ai.emotion_lexicon import score_emotions  # noqa: E402
+
+SAMPLES = [
+    "I feel calm and peaceful today",
+    "main khush nahi hoon, bahut tension hai exams ki",
+    "मैं बहुत उदास हूँ और अकेला महसूस करता हूँ",
+    "Not happy at all. So tired of deadlines and really stressed about the results",
+    "A blue swirl with a small sun in the corner, gentle lines and soft colours",
+    ("Today was long. I woke up anxious about the presentation, skipped breakfast and felt "
+     "drained by noon. Finally relieved when it was over, and honestly a little proud. ") * 6,
+]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20000)
+    args = ap.parse_args()
+    for text in SAMPLES:
+        res = score_emotions(text)
+        t0 = time.perf_counter()
+        for _ in range(args.n):
+            score_emotions(text)
+        us = (time.perf_counter() - t0) / args.n * 1e6
+        print(f"{len(text):5d} chars  {us:8.1f} us/call  label={res.label} conf={res.confidence}")
+
+
+if __name__ == "__main__":
+    main()
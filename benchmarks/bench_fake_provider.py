@@ -0,0 +1,92 @@
+"""End-to-end load run against the offline fake provider (no network, no API key).
+
+Drives the real client stack (cache, single-flight, limiter, breaker, retries, JSON repair)
+with a mix of Question Box answers, exam snacks and stories from a thread pool.
+
+    python benchmarks/bench_fake_provider.py --requests 400 --concurrency 32 \\
+        --latency lognormal:0.8:0.5 --rate-429 0.05 --rate-malformed 0.05 --rate-fenced 0.2
+"""
+from __future__ import annotations
+import argparse
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=400)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--latency", default="lognormal:0.8:0.5")
+    ap.add_argument("--rate-429", type=float, default=0.0)
+    ap.add_argument("--rate-5xx", type=float, default=0.0)
+    ap.add_argument("--rate-timeout", type=float, default=0.0)
+    ap.add_argument("--rate-malformed", type=float, default=0.0)
+    ap.add_argument("--rate-fenced", type=float, default=0.0)
+    ap.add_argument("--timeout", type=int, default=5, help="AI_REQUEST_TIMEOUT (hang injection waits for this)")
+    ap.add_argument("--cache", action="store_true", help="enable the response cache")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    app = create_app("config.TestingConfig")
+    app.config.update(
+        AI_PROVIDER="fake",
+        AI_FAKE_LATENCY=args.latency,
+        AI_FAKE_RATE_429=args.rate_429,
+        AI_FAKE_RATE_5XX=args.rate_5xx,
+        AI_FAKE_RATE_TIMEOUT=args.rate_timeout,
+        AI_FAKE_RATE_MALFORMED=args.rate_malformed,
+        AI_FAKE_RATE_FENCED=args.rate_fenced,
+        AI_FAKE_SEED=args.seed,
+        AI_REQUEST_TIMEOUT=args.timeout,
+        AI_CACHE_ENABLED=args.cache,
+        AI_CACHE_DB_PATH="",
+    )
+
+    from app.ai import tasks
+    from app.ai.gemini_client import get_ai_client
+
+    def one(i: int):
+        with app.app_context():
+            t0 = time.perf_counter()
+            try:
+                kind = i % 3
+                if kind == 0:
+                    tasks.answer_user_question(f"How do I focus before exam {i}?", "en")
+                elif kind == 1:
+                    tasks.exam_snack("focus", 60, "en")
+                else:
+                    tasks.generate_cultural_story(("hope", "courage", "patience")[i % 3], "en")
+                outcome = "ok"
+            except Exception as e:  # noqa: BLE001 - tally by type
+                outcome = type(e).__name__
+            return outcome, time.perf_counter() - t0
+
+    t_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(one, range(args.requests)))
+    wall = time.perf_counter() - t_start
+
+    outcomes = Counter(o for o, _ in results)
+    lat = sorted(d for o, d in results if o == "ok")
+    print(f"requests={args.requests} concurrency={args.concurrency} wall={wall:.2f}s "
+          f"throughput={args.requests / wall:.1f} req/s")
+    print("outcomes:", dict(outcomes))
+    if lat:
+        q = statistics.quantiles(lat, n=100) if len(lat) > 1 else [lat[0]] * 99
+        print(f"ok latency p50={q[49]:.3f}s p95={q[94]:.3f}s p99={q[98]:.3f}s")
+    with app.app_context():
+        meta = get_ai_client().health_probe()["meta"]
+    for k in ("executor", "cache", "singleflight", "limiter", "breakers"):
+        print(f"{k}: {meta.get(k)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Size/latency of vision image preprocessing (app.ai.image_prep) on synthetic canvas doodles.
+
+Needs Pillow. Usage: python benchmarks/bench_image_prep.py [--n 20]
+"""
+from __future__ import annotations
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from PIL import Image, ImageDraw
+except ImportError:  # pragma: no cover
+    sys.exit("Pillow is not installed; nothing to benchmark.")
+
+from flask import Flask  # noqa: E402
+
+from app.ai import image_prep  # noqa: E402
+
+
+def _doodle(w: int, h: int) -> bytes:
+    img = Image.new("RGBA", (w, h), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    for x in range(0, w, 40):
+        draw.line((x, 0, w - x, h), fill=(x % 255, 80, 200, 255), width=6)
+    draw.ellipse((w // 4, h // 4, w // 2, h // 2), outline=(240, 180, 20, 255), width=12)
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20)
+    args = ap.parse_args()
+    app = Flask(__name__)
+    app.config.update(AI_VISION_CACHE_SIZE=0)  # measure the real work, not cache hits
+    with app.app_context():
+        for w, h in ((640, 480), (1280, 960), (2400, 1800), (4000, 3000)):
+            data = _doodle(w, h)
+            t0 = time.perf_counter()
+            for _ in range(args.n):
+                out = image_prep.prepare_image(data)
+            ms = (time.perf_counter() - t0) * 1000 / args.n
+            print(f"{w}x{h}: {len(data):>9} B png -> {len(out.data):>7} B {out.mime:<10} "
+                  f"({len(out.data) / len(data):.0%}), {ms:.1f} ms/image")
+
+
+if __name__ == "__main__":
+    main()
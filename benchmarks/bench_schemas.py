@@ -0,0 +1,64 @@
+"""Per-call CPU cost of schema building + validation for the AI output models.
+
+"before" is what every request used to pay: ``X.as_schema()`` + ``X.model_validate(payload)``.
+"after" is the registry path GeminiClient uses now: ``gemini_schema(X)`` + ``validate_output(X, payload)``.
+
+    python benchmarks/bench_schemas.py [iterations]
+"""
+from __future__ import annotations
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ai.schemas import (  # noqa: E402
+    SCHEMA_CLASSES, EmotionAnalysis, JournalSummary, MeditationPlan, CulturalStory, ResiliencePrompts,
+    QAAnswer, PeerModeration, CrisisSignal, ComicScript, JournalInsightsUnified, ModeratedAnswer,
+    gemini_schema, validate_output, warm_schema_registry,
+)
+
+PAYLOADS = {
+    EmotionAnalysis: {"primary_label": "anxious", "scores": {"anxious": 0.8, "calm": 0.1},
+                      "keywords": ["exam", "sleep"], "confidence": 0.8, "explanations": ["mentions exams"]},
+    JournalSummary: {"summary": "Worried about exams.", "actionable_suggestions": ["Take a walk"],
+                     "detected_emotions": ["anxious"], "tone": "supportive"},
+    MeditationPlan: {"title": "Box breathing", "duration_sec": 180, "steps": ["Inhale 4", "Hold 4", "Exhale 4"]},
+    CulturalStory: {"title": "The Banyan", "story": "Once upon a time...", "moral": "Patience", "language": "en"},
+    ResiliencePrompts: {"prompts": ["What helped last time?", "Who can you call?", "One small step?"]},
+    QAAnswer: {"answer": "Try short study blocks.", "reading_grade": "6", "language": "en", "references": []},
+    PeerModeration: {"safe": True, "reason": "ok", "suggested_rewrite": None},
+    CrisisSignal: {"triggered": False, "category": None, "confidence": 0.1},
+    ComicScript: {"panels": [{"panel_caption": "Desk", "dialogue": "So many notes!", "visual_style": "pastel"}] * 3},
+    JournalInsightsUnified: {"summary": "Worried about exams.", "actionable_suggestions": ["Walk"],
+                             "detected_emotions": ["anxious"], "tone": "supportive", "primary_label": "anxious",
+                             "scores": {"anxious": 0.8}, "keywords": ["exam"], "confidence": 0.8,
+                             "explanations": ["mentions exams"]},
+    ModeratedAnswer: {"safe": True, "reason": "ok", "suggested_rewrite": None, "answer": "Try short study blocks.",
+                      "reading_grade": "6", "language": "en", "references": []},
+}
+
+
+def _per_call_us(fn, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def main(n: int = 2000) -> None:
+    warm_schema_registry()
+    print(f"{'schema':<24}{'before us':>12}{'after us':>12}{'speedup':>10}")
+    tot_before = tot_after = 0.0
+    for cls in SCHEMA_CLASSES:
+        payload = PAYLOADS[cls]
+        before = _per_call_us(lambda: (cls.as_schema(), cls.model_validate(payload)), n)
+        after = _per_call_us(lambda: (gemini_schema(cls), validate_output(cls, payload)), n)
+        tot_before += before
+        tot_after += after
+        print(f"{cls.__name__:<24}{before:>12.1f}{after:>12.1f}{before / after:>9.1f}x")
+    print(f"{'total':<24}{tot_before:>12.1f}{tot_after:>12.1f}{tot_before / tot_after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,110 @@
+"""Concurrent writers / readers on a SQLite file, with and without the engine profile.
+
+Each writer process inserts journal-sized rows in short transactions (one request = one commit)
+while reader processes run the kind of aggregate the dashboard does. The "default" run uses
+pysqlite's defaults with a short lock timeout (rollback journal, no busy_timeout of its own);
+the "profile" run applies ``app.extensions.sqlite_pragmas`` on connect, like the app does.
+
+Usage: python benchmarks/bench_sqlite_profile.py [--writers 4] [--readers 2] [--seconds 5]
+"""
+from __future__ import annotations
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, text  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from app.extensions import apply_sqlite_pragmas, sqlite_pragmas  # noqa: E402
+from config import BaseConfig  # noqa: E402
+
+BODY = "Aaj exams ki tension thi, par shaam ko dost se baat karke better laga. " * 12
+
+
+def _engine(path: str, profile: bool):
+    if not profile:
+        # pysqlite's own default is a 5 s lock wait; the old app never configured one, so any
+        # contention beyond a moment surfaced as "database is locked". Keep it short to show that.
+        return create_engine(f"sqlite:///{path}", connect_args={"timeout": 0.05})
+    cfg = {k: getattr(BaseConfig, k) for k in dir(BaseConfig) if k.startswith("SQLITE_")}
+    pragmas = sqlite_pragmas(cfg)
+    engine = create_engine(f"sqlite:///{path}", connect_args={"timeout": cfg["SQLITE_BUSY_TIMEOUT_MS"] / 1000.0})
+    event.listen(engine, "connect", lambda conn, rec: apply_sqlite_pragmas(conn, pragmas))
+    return engine
+
+
+def _writer(path: str, profile: bool, seconds: float, out) -> None:
+    engine = _engine(path, profile)
+    ok = locked = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            with engine.begin() as conn:
+                conn.execute(text("INSERT INTO entry (user_id, body, created) VALUES (:u, :b, :t)"),
+                             {"u": os.getpid() % 50, "b": BODY, "t": time.time()})
+            ok += 1
+        except OperationalError as e:
+            if "locked" not in str(e) and "busy" not in str(e):
+                raise
+            locked += 1
+    out.put(("w", ok, locked))
+
+
+def _reader(path: str, profile: bool, seconds: float, out) -> None:
+    engine = _engine(path, profile)
+    ok = locked = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT user_id, COUNT(*), AVG(LENGTH(body)) FROM entry GROUP BY user_id")).all()
+            ok += 1
+        except OperationalError as e:
+            if "locked" not in str(e) and "busy" not in str(e):
+                raise
+            locked += 1
+    out.put(("r", ok, locked))
+
+
+def run(profile: bool, writers: int, readers: int, seconds: float) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        with _engine(path, profile).begin() as conn:
+            conn.execute(text("CREATE TABLE entry (id INTEGER PRIMARY KEY, user_id INTEGER, body TEXT, created REAL)"))
+            conn.execute(text("CREATE INDEX ix_entry_user ON entry (user_id)"))
+        ctx = mp.get_context("spawn")
+        out = ctx.Queue()
+        procs = [ctx.Process(target=_writer, args=(path, profile, seconds, out)) for _ in range(writers)]
+        procs += [ctx.Process(target=_reader, args=(path, profile, seconds, out)) for _ in range(readers)]
+        for p in procs:
+            p.start()
+        results = [out.get() for _ in procs]
+        for p in procs:
+            p.join()
+    w_ok = sum(r[1] for r in results if r[0] == "w")
+    w_locked = sum(r[2] for r in results if r[0] == "w")
+    r_ok = sum(r[1] for r in results if r[0] == "r")
+    r_locked = sum(r[2] for r in results if r[0] == "r")
+    label = "profile" if profile else "default"
+    print(f"{label:>8}: {w_ok / seconds:8.0f} writes/s, {w_locked:6d} write lock errors | "
+          f"{r_ok / seconds:7.0f} reads/s, {r_locked:6d} read lock errors")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--writers", type=int, default=4)
+    ap.add_argument("--readers", type=int, default=2)
+    ap.add_argument("--seconds", type=float, default=5.0)
+    args = ap.parse_args()
+    print(f"{args.writers} writer / {args.readers} reader processes, {args.seconds:.0f} s each")
+    for profile in (False, True):
+        run(profile, args.writers, args.readers, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,23 @@ class BaseConfig:
     # Database
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///sahai.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # SQLite engine profile (app.extensions), applied to every new connection of a file database
+    SQLITE_PROFILE_ENABLED = os.getenv("SQLITE_PROFILE_ENABLED", "1") == "1"
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")  # readers no longer block the writer
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # durable across app crashes in WAL mode
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))  # wait for the write lock, don't fail
+    SQLITE_CACHE_SIZE_KIB = int(os.getenv("SQLITE_CACHE_SIZE_KIB", "16384"))  # page cache per connection
+    SQLITE_MMAP_SIZE_MB = int(os.getenv("SQLITE_MMAP_SIZE_MB", "128"))
+    SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+    SQLITE_FOREIGN_KEYS = os.getenv("SQLITE_FOREIGN_KEYS", "1") == "1"  # makes ondelete=CASCADE / SET NULL real
+    # Connection pool per worker process: one per request thread (gunicorn --threads) + headroom
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", os.getenv("GUNICORN_THREADS", "4")))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "2"))
+    DB_POOL_TIMEOUT_S = float(os.getenv("DB_POOL_TIMEOUT_S", "10"))
+    # `flask journal-tags-backfill`: entries per transaction
+    JOURNAL_TAG_BACKFILL_BATCH = int(os.getenv("JOURNAL_TAG_BACKFILL_BATCH", "500"))
+    # `flask emotion-rollups-rebuild`: users per transaction
+    EMOTION_ROLLUP_REBUILD_USERS = int(os.getenv("EMOTION_ROLLUP_REBUILD_USERS", "100"))
 
     # WTForms CSRF
     WTF_CSRF_TIME_LIMIT = None
@@ -40,26 +57,117 @@ class BaseConfig:
     RATELIMIT_STRATEGY = "fixed-window"
 
     # --- AI (Gemini) ---
+    # 'gemini' or 'fake' (offline backend with latency/fault injection, see app/ai/fake_provider.py)
+    AI_PROVIDER = os.getenv("AI_PROVIDER", "gemini")
+    AI_FAKE_LATENCY = os.getenv("AI_FAKE_LATENCY", "lognormal:0.8:0.5")  # fixed:S | uniform:A:B | normal:MU:SD | lognormal:MEDIAN:SIGMA
+    AI_FAKE_RATE_429 = float(os.getenv("AI_FAKE_RATE_429", "0"))
+    AI_FAKE_RATE_5XX = float(os.getenv("AI_FAKE_RATE_5XX", "0"))
+    AI_FAKE_RATE_TIMEOUT = float(os.getenv("AI_FAKE_RATE_TIMEOUT", "0"))
+    AI_FAKE_RATE_MALFORMED = float(os.getenv("AI_FAKE_RATE_MALFORMED", "0"))
+    AI_FAKE_RATE_FENCED = float(os.getenv("AI_FAKE_RATE_FENCED", "0"))
+    AI_FAKE_HANG_S = float(os.getenv("AI_FAKE_HANG_S", "120"))
+    AI_FAKE_SEED = os.getenv("AI_FAKE_SEED")
     # Gemini (production only – external calls). API key MUST be set in environment.
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
     GEMINI_TEXT_MODEL = os.getenv("GEMINI_TEXT_MODEL", "gemini-1.5-pro")
     GEMINI_VISION_MODEL = os.getenv("GEMINI_VISION_MODEL", "gemini-2.5-flash-image-preview")  # unified vision-capable model
     AI_REQUEST_TIMEOUT = int(os.getenv("AI_REQUEST_TIMEOUT", "60"))
+    # Client lifecycle (app.ai.lifecycle): vision model built on first vision call; per-worker warmup
+    # from gunicorn's post_worker_init (probe = one 1-token call to open the transport)
+    AI_VISION_LAZY_INIT = os.getenv("AI_VISION_LAZY_INIT", "1") == "1"
+    AI_WARMUP_ENABLED = os.getenv("AI_WARMUP_ENABLED", "1") == "1"
+    AI_WARMUP_PROBE = os.getenv("AI_WARMUP_PROBE", "0") == "1"
+    AI_WARMUP_TIMEOUT_S = float(os.getenv("AI_WARMUP_TIMEOUT_S", "5"))
+    # Vision preprocessing (app.ai.image_prep; resizing/re-encoding needs Pillow, else bytes go as-is)
+    AI_VISION_MAX_EDGE = int(os.getenv("AI_VISION_MAX_EDGE", "768"))
+    AI_VISION_FORMAT = os.getenv("AI_VISION_FORMAT", "webp")  # 'webp' | 'jpeg'
+    AI_VISION_QUALITY = int(os.getenv("AI_VISION_QUALITY", "80"))
+    AI_VISION_CACHE_SIZE = int(os.getenv("AI_VISION_CACHE_SIZE", "64"))
     AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "3"))
     AI_BACKOFF_BASE = float(os.getenv("AI_BACKOFF_BASE", "0.6"))
     AI_BACKOFF_MAX = float(os.getenv("AI_BACKOFF_MAX", "4.0"))
+    # Bounded executor for blocking provider calls (per process)
+    AI_EXECUTOR_MAX_WORKERS = int(os.getenv("AI_EXECUTOR_MAX_WORKERS", "16"))
+    AI_EXECUTOR_MAX_QUEUE = int(os.getenv("AI_EXECUTOR_MAX_QUEUE", "16"))
+    # Response cache for non-personal generations (LRU per worker + shared SQLite file)
+    AI_CACHE_ENABLED = os.getenv("AI_CACHE_ENABLED", "1") == "1"
+    AI_CACHE_LRU_SIZE = int(os.getenv("AI_CACHE_LRU_SIZE", "256"))
+    AI_CACHE_DB_PATH = os.getenv("AI_CACHE_DB_PATH")  # None -> <instance>/ai_cache.sqlite3; "" -> LRU only
+    AI_CACHE_MAX_ROWS = int(os.getenv("AI_CACHE_MAX_ROWS", "5000"))
+    AI_CACHE_TTLS = {  # seconds; tasks not listed are never cached
+        "music_rationale": 24 * 3600,
+        "generate_art_prompt": 24 * 3600,
+        "exam_snack": 6 * 3600,
+        "tell_cultural_story": 6 * 3600,
+        "generate_meditation": 24 * 3600,
+    }
+    # Single-flight: coalesce identical in-flight prompts (threads always; workers via SQLite lease if SHARED)
+    AI_SINGLEFLIGHT_ENABLED = os.getenv("AI_SINGLEFLIGHT_ENABLED", "1") == "1"
+    AI_SINGLEFLIGHT_SHARED = os.getenv("AI_SINGLEFLIGHT_SHARED", "0") == "1"
+    AI_SINGLEFLIGHT_DB_PATH = os.getenv("AI_SINGLEFLIGHT_DB_PATH")  # None -> <instance>/ai_singleflight.sqlite3
+    AI_SINGLEFLIGHT_LINGER_S = float(os.getenv("AI_SINGLEFLIGHT_LINGER_S", "2"))
+    # Hedged full/short prompt calls (journal insights, comic script)
+    AI_HEDGE_ENABLED = os.getenv("AI_HEDGE_ENABLED", "0") == "1"
+    AI_HEDGE_PERCENTILE = float(os.getenv("AI_HEDGE_PERCENTILE", "0.95"))
+    AI_HEDGE_DEFAULT_DELAY_S = float(os.getenv("AI_HEDGE_DEFAULT_DELAY_S", "8"))  # until enough samples
+    AI_HEDGE_MIN_DELAY_S = float(os.getenv("AI_HEDGE_MIN_DELAY_S", "2"))
+    # Adaptive (AIMD) in-flight limit per model:text:task key
+    AI_LIMITER_ENABLED = os.getenv("AI_LIMITER_ENABLED", "1") == "1"
+    AI_LIMITER_INITIAL = int(os.getenv("AI_LIMITER_INITIAL", "4"))
+    AI_LIMITER_MIN = int(os.getenv("AI_LIMITER_MIN", "1"))
+    AI_LIMITER_MAX = int(os.getenv("AI_LIMITER_MAX", "16"))
+    AI_LIMITER_BACKOFF = float(os.getenv("AI_LIMITER_BACKOFF", "0.5"))  # multiplicative cut on 429/timeout
+    AI_LIMITER_LATENCY_TARGET_S = float(os.getenv("AI_LIMITER_LATENCY_TARGET_S", "10"))  # slower successes don't grow the limit
+    AI_LIMITER_QUEUE_TIMEOUT_S = float(os.getenv("AI_LIMITER_QUEUE_TIMEOUT_S", "2"))
+    AI_LIMITER_MAX_QUEUE = int(os.getenv("AI_LIMITER_MAX_QUEUE", "32"))
+    # Question Box: moderation + answer in one structured call (0 -> two sequential calls)
+    AI_QA_COMBINED_ENABLED = os.getenv("AI_QA_COMBINED_ENABLED", "1") == "1"
+    # Local lexicon emotion scorer: free-text moods map to a label (cacheable prompt) at/above this confidence
+    AI_LEXICON_MIN_CONFIDENCE = float(os.getenv("AI_LEXICON_MIN_CONFIDENCE", "0.6"))
+    # Background AI jobs (`flask ai-worker`): with AI_JOBS_ENABLED=1 /journal/new saves at once and a
+    # worker fills in insights. Keep the lease above the job budget so a live worker never loses it.
+    AI_JOBS_ENABLED = os.getenv("AI_JOBS_ENABLED", "0") == "1"
+    AI_JOB_LEASE_S = float(os.getenv("AI_JOB_LEASE_S", "300"))
+    AI_JOB_BUDGET_S = float(os.getenv("AI_JOB_BUDGET_S", "120"))
+    AI_JOB_MAX_ATTEMPTS = int(os.getenv("AI_JOB_MAX_ATTEMPTS", "4"))
+    AI_JOB_RETRY_BASE_S = float(os.getenv("AI_JOB_RETRY_BASE_S", "10"))
+    AI_JOB_RETRY_MAX_S = float(os.getenv("AI_JOB_RETRY_MAX_S", "600"))
+    AI_JOB_POLL_S = float(os.getenv("AI_JOB_POLL_S", "2"))
+    # `flask questions-drain`: Question Box items saved as pending while moderation was down
+    QUESTION_DRAIN_BATCH = int(os.getenv("QUESTION_DRAIN_BATCH", "20"))
+    QUESTION_DRAIN_CONCURRENCY = int(os.getenv("QUESTION_DRAIN_CONCURRENCY", "4"))
+    QUESTION_DRAIN_POLL_S = float(os.getenv("QUESTION_DRAIN_POLL_S", "30"))
+    # Per-request AI budget (keep below the gunicorn worker timeout); attempts are trimmed to what is left
+    AI_ROUTE_BUDGET_S = float(os.getenv("AI_ROUTE_BUDGET_S", "25"))
+    AI_DEADLINE_MIN_ATTEMPT_S = float(os.getenv("AI_DEADLINE_MIN_ATTEMPT_S", "2"))
     # Circuit breaker tuning
     AI_BREAKER_FAILURE_THRESHOLD = int(os.getenv("AI_BREAKER_FAILURE_THRESHOLD", "3"))
     AI_BREAKER_BASE_COOLDOWN_S = int(os.getenv("AI_BREAKER_BASE_COOLDOWN_S", "30"))
     AI_BREAKER_MAX_COOLDOWN_S = int(os.getenv("AI_BREAKER_MAX_COOLDOWN_S", "120"))
     AI_BREAKER_HALF_OPEN_INTERVAL_S = int(os.getenv("AI_BREAKER_HALF_OPEN_INTERVAL_S", "10"))
     AI_LOG_RATE_LIMIT_S = int(os.getenv("AI_LOG_RATE_LIMIT_S", "60"))
+    # 'memory' (per process) or 'sqlite' (shared by all workers on the host)
+    AI_BREAKER_BACKEND = os.getenv("AI_BREAKER_BACKEND", "memory")
+    AI_BREAKER_DB_PATH = os.getenv("AI_BREAKER_DB_PATH")  # None -> <instance>/ai_breaker.sqlite3
+    # Prometheus-style /metrics (aggregated across workers through a host-local SQLite file)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+    METRICS_DB_PATH = os.getenv("METRICS_DB_PATH")  # None -> <instance>/metrics.sqlite3; "" -> this process only
+    METRICS_FLUSH_INTERVAL_S = float(os.getenv("METRICS_FLUSH_INTERVAL_S", "5"))
+    METRICS_STALE_S = float(os.getenv("METRICS_STALE_S", "3600"))
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")  # bearer token for /metrics; unset -> 404 outside debug/testing
     ENABLE_SAFETY_FILTERS = os.getenv("ENABLE_SAFETY_FILTERS", "True").lower() == "true"
     CRISIS_WORDS = [
         # Lightweight, non-exhaustive (kept in code for demo; can be externalized)
         "suicide", "kill myself", "end my life", "hurt myself",
         "self-harm", "cut myself", "i want to die", "no reason to live",
     ]
+    # Extra phrases on top of the built-in lexicon (app.ai.crisis_lexicon): JSON {"category": {"phrase": weight}},
+    # re-checked every CRISIS_LEXICON_RELOAD_S and recompiled when it changes
+    CRISIS_LEXICON_PATH = os.getenv("CRISIS_LEXICON_PATH")
+    CRISIS_LEXICON_RELOAD_S = float(os.getenv("CRISIS_LEXICON_RELOAD_S", "5"))
+    CRISIS_MIN_CONFIDENCE = float(os.getenv("CRISIS_MIN_CONFIDENCE", "0.5"))
+    # PII masked before prompting (app.ai.redaction), in priority order; empty -> all built-in detectors
+    PII_DETECTORS = os.getenv("PII_DETECTORS", "email,url,upi,aadhaar,phone_in,phone")
     timeout = int(os.getenv("AI_TIMEOUT", 60))  # default 60s
 
 
@@ -82,4 +190,8 @@ class TestingConfig(BaseConfig):
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
     WTF_CSRF_ENABLED = False
     SESSION_COOKIE_SECURE = False
-    # Tests still hit Gemini unless GEMINI_API_KEY unset; consider stubbing externally if needed.
+    AI_CACHE_ENABLED = False
+    METRICS_DB_PATH = ""
+    # Offline fake provider: no network, instant schema-valid responses.
+    AI_PROVIDER = "fake"
+    AI_FAKE_LATENCY = "fixed:0"
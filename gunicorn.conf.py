@@ -0,0 +1,13 @@
+"""Gunicorn hooks for SahAI (picked up automatically from the working directory).
+
+    gunicorn wsgi:app [--preload] [-w 4]
+
+Process-wide AI state is reset in every forked worker (app.ai.lifecycle registers an
+``os.register_at_fork`` hook), so ``--preload`` is safe. Each worker then warms its own
+client here, after it has loaded the app and before it accepts requests.
+"""
+
+
+def post_worker_init(worker):
+    from app.ai.lifecycle import warmup_ai_client
+    warmup_ai_client(worker.wsgi)
@@ -0,0 +1,59 @@
+"""journal tags
+
+Adds ``journal_tag`` and ``journal_entry_tag``. The tables start empty: after upgrading an
+existing database run ``flask journal-tags-backfill`` (required; until then tag filters and
+counts only see entries saved after the upgrade).
+
+Revision ID: 24268468d158
+Revises: 28027fd04919
+Create Date: 2026-10-17 07:58:11.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '24268468d158'
+down_revision = '28027fd04919'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def _has_index(table, name):
+    return any(ix['name'] == name for ix in sa.inspect(op.get_bind()).get_indexes(table))
+
+
+def upgrade():
+    if not _has_table('journal_tag'):
+        op.create_table('journal_tag',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=16), nullable=False),
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('kind', 'name', name='uq_journal_tag_kind_name')
+        )
+    if not _has_table('journal_entry_tag'):
+        op.create_table('journal_entry_tag',
+        sa.Column('entry_id', sa.Integer(), nullable=False),
+        sa.Column('tag_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('position', sa.SmallInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['entry_id'], ['journal_entry.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['tag_id'], ['journal_tag.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('entry_id', 'tag_id')
+        )
+    if not _has_index('journal_entry_tag', 'ix_journal_entry_tag_user_tag_created'):
+        op.create_index('ix_journal_entry_tag_user_tag_created', 'journal_entry_tag',
+                        ['user_id', 'tag_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_table('journal_entry_tag')
+    op.drop_table('journal_tag')
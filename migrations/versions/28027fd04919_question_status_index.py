@@ -0,0 +1,31 @@
+"""question status index
+
+Adds ``ix_question_status_id`` on ``question_box_item`` for the pending-question drain.
+
+Revision ID: 28027fd04919
+Revises: 86363bd0e182
+Create Date: 2026-10-17 07:41:06.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '28027fd04919'
+down_revision = '86363bd0e182'
+branch_labels = None
+depends_on = None
+
+
+def _has_index(table, name):
+    return any(ix['name'] == name for ix in sa.inspect(op.get_bind()).get_indexes(table))
+
+
+def upgrade():
+    if not _has_index('question_box_item', 'ix_question_status_id'):
+        op.create_index('ix_question_status_id', 'question_box_item', ['status', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_question_status_id', table_name='question_box_item')
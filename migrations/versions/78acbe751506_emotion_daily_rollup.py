@@ -0,0 +1,45 @@
+"""emotion daily rollup
+
+Adds ``emotion_daily_rollup``. The table starts empty: after upgrading an existing database run
+``flask emotion-rollups-rebuild`` (required; until then the Emotion Lens only shows days with
+snapshots recorded after the upgrade).
+
+Revision ID: 78acbe751506
+Revises: 24268468d158
+Create Date: 2026-10-17 08:00:59.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '78acbe751506'
+down_revision = '24268468d158'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    if not _has_table('emotion_daily_rollup'):
+        op.create_table('emotion_daily_rollup',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('snapshots', sa.Integer(), nullable=False),
+        sa.Column('stats', sa.Text(), nullable=False),
+        sa.Column('label_counts', sa.Text(), nullable=False),
+        sa.Column('dominant', sa.String(length=50), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'day', name='uq_emotion_rollup_user_day')
+        )
+
+
+def downgrade():
+    op.drop_table('emotion_daily_rollup')
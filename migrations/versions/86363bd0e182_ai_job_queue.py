@@ -0,0 +1,58 @@
+"""ai job queue
+
+Adds ``ai_job``, the durable queue behind ``flask ai-worker``.
+
+First revision: databases created before migrations existed have no ``alembic_version``, so the
+table and its indexes are only created when missing (every revision in this chain does the same).
+
+Revision ID: 86363bd0e182
+Revises: 
+Create Date: 2026-10-17 07:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '86363bd0e182'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def _has_index(table, name):
+    return any(ix['name'] == name for ix in sa.inspect(op.get_bind()).get_indexes(table))
+
+
+def upgrade():
+    if not _has_table('ai_job'):
+        op.create_table('ai_job',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=40), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('subject_id', sa.Integer(), nullable=True),
+        sa.Column('payload', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('run_after', sa.DateTime(), nullable=False),
+        sa.Column('lease_owner', sa.String(length=64), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.String(length=120), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if not _has_index('ai_job', 'ix_ai_job_status_run_after'):
+        op.create_index('ix_ai_job_status_run_after', 'ai_job', ['status', 'run_after'], unique=False)
+    if not _has_index('ai_job', 'ix_ai_job_kind_subject'):
+        op.create_index('ix_ai_job_kind_subject', 'ai_job', ['kind', 'subject_id'], unique=False)
+
+
+def downgrade():
+    op.drop_table('ai_job')
@@ -0,0 +1,48 @@
+"""Question Box routes against the offline fake provider (AI_PROVIDER=fake)."""
+import pytest
+
+from app import create_app
+from app.extensions import db
+from app.model import QuestionBoxItem, User
+from config import TestingConfig
+
+
+class SlowProviderConfig(TestingConfig):
+    WTF_CSRF_ENABLED = False
+    RATELIMIT_ENABLED = False
+    AI_QA_COMBINED_ENABLED = False      # moderation and answer are two calls
+    AI_FAKE_LATENCY = "fixed:1"
+    AI_ROUTE_BUDGET_S = 2.5             # moderation leaves less than AI_DEADLINE_MIN_ATTEMPT_S
+    AI_DEADLINE_MIN_ATTEMPT_S = 2
+    AI_CACHE_ENABLED = False
+
+
+@pytest.fixture
+def client():
+    app = create_app(SlowProviderConfig)
+    with app.app_context():
+        db.create_all()
+        user = User(username="asha", email="asha@example.com", password_hash="x")
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(user_id)
+    yield app, client
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+def test_ask_saves_pending_when_deadline_runs_out_between_moderation_and_answer(client):
+    app, c = client
+    resp = c.post("/questions/ask", data={"question_text": "How do I stop panicking before exams?", "language": "en"})
+
+    assert resp.status_code == 302
+    with app.app_context():
+        items = QuestionBoxItem.query.all()
+        assert len(items) == 1
+        assert items[0].status == "pending"
+        assert items[0].ai_answer_text is None
+        assert resp.headers["Location"].endswith(f"/questions/{items[0].id}")